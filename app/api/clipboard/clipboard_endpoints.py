@@ -1,89 +1,214 @@
-from fastapi import APIRouter, Query
+import json
+from collections.abc import AsyncIterator, Iterator
+
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Body, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
 from app.services.clipboard import clipboard_service
-from app.models.clipboard.clipboard_models import Clips, Clip, ClipInput
+from app.models.clipboard.clipboard_models import (
+    AddedClips, Clips, Clip, ClipContent, ClipInput, ClipsPage, ResultCacheStats,
+)
+from app.core.constants import (
+    DEFAULT_PAGE_SIZE, EVENT_KEEPALIVE_SECONDS, MAX_ADD_CLIPS, MAX_MULTI_GET_IDS, MAX_PAGE_SIZE,
+)
 
 router = APIRouter(prefix="/clipboard", tags=["Clipboard"])
 
-@router.get("/get_recent_clips")
-def get_recent_clips(n: int = Query(10, ge=1)) -> Clips:
-    return clipboard_service.get_recent_clips(n)
 
-@router.get("/get_all_clips")
-def get_all_clips() -> Clips:
-    return clipboard_service.get_all_clips()
+def _ndjson(clips: Iterator[Clip]) -> StreamingResponse:
+    """Stream clips as newline-delimited JSON, one clip per line.
+
+    The first row is read before responding, so a stream that cannot be opened
+    (e.g. too many open streams) gets a 503 instead of an empty 200. A failure
+    after that point ends the body with an `{"error": ...}` line, so clients can
+    tell a cut-short stream from a complete one.
+    """
+    try:
+        first = next(clips, None)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    def lines() -> Iterator[str]:
+        try:
+            if first is None:
+                return
+            yield first.model_dump_json() + "\n"
+            for clip in clips:
+                yield clip.model_dump_json() + "\n"
+        except RuntimeError as exc:
+            yield json.dumps({"error": str(exc)}) + "\n"
+        finally:
+            # Client gone or stream done: release the DB cursor right away
+            close = getattr(clips, "close", None)
+            if close is not None:
+                close()
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _json(result: BaseModel) -> Response:
+    """Serialize a service result as is.
+
+    Clip reads are built from trusted DB rows (see `_clip_from_row`), so the
+    route skips FastAPI's response validation, a second pass over every clip;
+    the declared `response_model` still documents the body.
+    """
+    return Response(result.model_dump_json(), media_type="application/json")
+
+
+# `preview` on the list reads: each clip's content is cut to its first CONTENT_HEAD_CHARS
+# characters, with `content_length` telling whether there is more (see /clip_content)
+Preview = Annotated[bool, Query(description="Return only the head of each clip's content, plus content_length")]
+
+
+@router.get("/get_recent_clips", response_model=Clips)
+async def get_recent_clips(n: int = Query(10, ge=1), preview: Preview = False) -> Response:
+    return _json(await clipboard_service.get_recent_clips_async(n, preview))
+
+@router.get("/get_all_clips", response_model=Clips)
+async def get_all_clips(preview: Preview = False) -> Response:
+    return _json(await clipboard_service.get_all_clips_async(preview))
+
+@router.get("/clip/{clip_id}", response_model=Clip)
+async def get_clip(clip_id: int) -> Response:
+    clip = await clipboard_service.get_clip_async(clip_id)
+    if clip is None:
+        raise HTTPException(status_code=404, detail="Clip not found")
+    return _json(clip)
+
+@router.post("/clips/multi_get", response_model=Clips)
+async def multi_get_clips(clip_ids: Annotated[list[int], Body(max_length=MAX_MULTI_GET_IDS)]) -> Response:
+    """Refresh specific clips: those of `clip_ids` that exist, newest first."""
+    return _json(await clipboard_service.get_clips_by_ids_async(clip_ids))
+
+@router.get("/clip_content", response_model=ClipContent)
+async def get_clip_content(clip_id: int, offset: int = Query(0, ge=0)) -> Response:
+    """The rest of a clip after a preview: its content from character `offset` on."""
+    content = await clipboard_service.get_clip_content_async(clip_id, offset)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Clip not found")
+    return _json(content)
+
+# Streams stay sync: the row iterator blocks between batches, so Starlette drains it on its threadpool
+@router.get("/stream_all_clips", response_class=StreamingResponse)
+def stream_all_clips() -> StreamingResponse:
+    return _ndjson(clipboard_service.stream_all_clips())
 
 @router.post("/add_clip")
-def add_clip(clip: ClipInput, from_app_name: str | None = None) -> None:
+async def add_clip(clip: ClipInput, from_app_name: str | None = None) -> Clip:
     # Use timestamp from clip if provided, otherwise service will generate UTC timestamp
-    clipboard_service.add_clip_with_timestamp_support(
+    return await clipboard_service.add_clip_with_timestamp_support_async(
         content=clip.content,
         timestamp=clip.timestamp,
-        from_app_name=from_app_name or clip.from_app_name
+        from_app_name=from_app_name or clip.from_app_name,
+        tags=clip.tags,
+        is_favorite=clip.is_favorite,
     )
 
+@router.post("/add_clips")
+async def add_clips(
+    clips: Annotated[list[ClipInput], Body(max_length=MAX_ADD_CLIPS)],
+    from_app_name: str | None = None,
+) -> AddedClips:
+    # One transaction for the whole list: IDs and dedupe outcomes come back in request order
+    return await clipboard_service.add_clips_async(clips, from_app_name=from_app_name)
+
 @router.post("/delete_clip")
-def delete_clip(id: int) -> None:
-    clipboard_service.delete_clip(id)
+async def delete_clip(id: int) -> None:
+    await clipboard_service.delete_clip_async(id)
 
 @router.post("/delete_all_clips")
-def delete_all_clips() -> None:
-    clipboard_service.delete_all_clips()
+async def delete_all_clips() -> None:
+    await clipboard_service.delete_all_clips_async()
 
 
 # New endpoints: static queries
-@router.get("/get_all_clips_after_id")
-def get_all_clips_after_id(before_id: int = Query(..., ge=0)) -> Clips:
-    return clipboard_service.get_all_clips_after_id(before_id)
+@router.get("/get_all_clips_after_id", response_model=Clips, deprecated=True)  # superseded by /clips
+async def get_all_clips_after_id(before_id: int = Query(..., ge=0)) -> Response:
+    return _json(await clipboard_service.get_all_clips_after_id_async(before_id))
 
 
-@router.get("/get_n_clips_before_id")
-def get_n_clips_before_id(n: int | None = Query(None, ge=1), before_id: int = Query(..., ge=0)) -> Clips:
-    return clipboard_service.get_n_clips_before_id(n, before_id)
+@router.get("/get_n_clips_before_id", response_model=Clips, deprecated=True)  # superseded by /clips
+async def get_n_clips_before_id(n: int | None = Query(None, ge=1), before_id: int = Query(..., ge=0)) -> Response:
+    return _json(await clipboard_service.get_n_clips_before_id_async(n, before_id))
 
 
 @router.get("/get_num_clips")
-def get_num_clips() -> int:
-    return clipboard_service.get_num_clips()
+async def get_num_clips() -> int:
+    return await clipboard_service.get_num_clips_async()
 
 
 # New endpoints: dynamic filter queries
-@router.get("/filter_all_clips")
-def filter_all_clips(
+@router.get("/filter_all_clips", response_model=Clips)
+async def filter_all_clips(
     search: str = "",
     time_frame: str = "",
     selected_tags: list[str] = Query(default=[]),
     selected_apps: list[str] = Query(default=[]),
     favorites_only: bool = False,
-) -> Clips:
-    return clipboard_service.filter_all_clips(search, time_frame, selected_tags, selected_apps, favorites_only)
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+    preview: Preview = False,
+) -> Response:
+    return _json(await clipboard_service.filter_all_clips_async(
+        search, time_frame, selected_tags, selected_apps, favorites_only, sort_by_relevance, word_search, preview
+    ))
 
 
-@router.get("/filter_n_clips")
-def filter_n_clips(
+@router.get("/stream_filter_all_clips", response_class=StreamingResponse)
+def stream_filter_all_clips(
     search: str = "",
     time_frame: str = "",
-    n: int | None = Query(None, ge=1),
     selected_tags: list[str] = Query(default=[]),
     selected_apps: list[str] = Query(default=[]),
     favorites_only: bool = False,
-) -> Clips:
-    return clipboard_service.filter_n_clips(search, time_frame, n, selected_tags, selected_apps, favorites_only)
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+) -> StreamingResponse:
+    return _ndjson(
+        clipboard_service.stream_filter_all_clips(
+            search, time_frame, selected_tags, selected_apps, favorites_only, sort_by_relevance, word_search
+        )
+    )
 
 
-@router.get("/filter_all_clips_after_id")
-def filter_all_clips_after_id(
+@router.get("/filter_n_clips", response_model=Clips)
+async def filter_n_clips(
+    search: str = "",
+    time_frame: str = "",
+    n: int | None = Query(None, ge=1),
+    selected_tags: list[str] = Query(default=[]),
+    selected_apps: list[str] = Query(default=[]),
+    favorites_only: bool = False,
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+    preview: Preview = False,
+) -> Response:
+    return _json(await clipboard_service.filter_n_clips_async(
+        search, time_frame, n, selected_tags, selected_apps, favorites_only, sort_by_relevance, word_search,
+        preview,
+    ))
+
+
+@router.get("/filter_all_clips_after_id", response_model=Clips, deprecated=True)  # superseded by /clips
+async def filter_all_clips_after_id(
     search: str = "",
     time_frame: str = "",
     after_id: int = Query(..., ge=0),
     selected_tags: list[str] = Query(default=[]),
     selected_apps: list[str] = Query(default=[]),
     favorites_only: bool = False,
-) -> Clips:
-    return clipboard_service.filter_all_clips_after_id(search, time_frame, after_id, selected_tags, selected_apps, favorites_only)
+    word_search: bool = False,
+    preview: Preview = False,
+) -> Response:
+    return _json(await clipboard_service.filter_all_clips_after_id_async(
+        search, time_frame, after_id, selected_tags, selected_apps, favorites_only, word_search, preview
+    ))
 
 
-@router.get("/filter_n_clips_before_id")
-def filter_n_clips_before_id(
+@router.get("/filter_n_clips_before_id", response_model=Clips, deprecated=True)  # superseded by /clips
+async def filter_n_clips_before_id(
     search: str = "",
     time_frame: str = "",
     n: int | None = Query(None, ge=1),
@@ -91,63 +216,135 @@ def filter_n_clips_before_id(
     selected_tags: list[str] = Query(default=[]),
     selected_apps: list[str] = Query(default=[]),
     favorites_only: bool = False,
-) -> Clips:
-    return clipboard_service.filter_n_clips_before_id(search, time_frame, n, before_id, selected_tags, selected_apps, favorites_only)
+    word_search: bool = False,
+    preview: Preview = False,
+) -> Response:
+    return _json(await clipboard_service.filter_n_clips_before_id_async(
+        search, time_frame, n, before_id, selected_tags, selected_apps, favorites_only, word_search, preview
+    ))
 
 
 @router.get("/get_num_filtered_clips")
-def get_num_filtered_clips(
+async def get_num_filtered_clips(
     search: str = "",
     time_frame: str = "",
     selected_tags: list[str] = Query(default=[]),
     selected_apps: list[str] = Query(default=[]),
     favorites_only: bool = False,
+    word_search: bool = False,
 ) -> int:
-    return clipboard_service.get_num_filtered_clips(search, time_frame, selected_tags, selected_apps, favorites_only)
+    return await clipboard_service.get_num_filtered_clips_async(
+        search, time_frame, selected_tags, selected_apps, favorites_only, word_search
+    )
+
+
+# Cursor pagination
+@router.get("/clips", response_model=ClipsPage)
+async def get_clips(
+    search: str = "",
+    time_frame: str = "",
+    selected_tags: list[str] = Query(default=[]),
+    selected_apps: list[str] = Query(default=[]),
+    favorites_only: bool = False,
+    word_search: bool = False,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    preview: Preview = False,
+) -> Response:
+    try:
+        return _json(await clipboard_service.get_clips_page_async(
+            search, time_frame, selected_tags, selected_apps, favorites_only, word_search, cursor, limit, preview
+        ))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 # Tag endpoints
 @router.post("/add_clip_tag")
-def add_clip_tag(clip_id: int, tag_name: str) -> None:
-    clipboard_service.add_clip_tag(clip_id, tag_name)
+async def add_clip_tag(clip_id: int, tag_name: str) -> None:
+    await clipboard_service.add_clip_tag_async(clip_id, tag_name)
 
 
 @router.post("/remove_clip_tag")
-def remove_clip_tag(clip_id: int, tag_id: int) -> None:
-    clipboard_service.remove_clip_tag(clip_id, tag_id)
+async def remove_clip_tag(clip_id: int, tag_id: int) -> None:
+    await clipboard_service.remove_clip_tag_async(clip_id, tag_id)
 
 
 @router.get("/get_all_tags")
-def get_all_tags():
-    return clipboard_service.get_all_tags()
+async def get_all_tags():
+    return await clipboard_service.get_all_tags_async()
 
 
 @router.get("/get_num_clips_per_tag")
-def get_num_clips_per_tag(tag_id: int) -> int:
-    return clipboard_service.get_num_clips_per_tag(tag_id)
+async def get_num_clips_per_tag(tag_id: int) -> int:
+    return await clipboard_service.get_num_clips_per_tag_async(tag_id)
 
 
 # Favorite endpoints
 @router.post("/add_favorite")
-def add_favorite(clip_id: int) -> None:
-    clipboard_service.add_favorite(clip_id)
+async def add_favorite(clip_id: int) -> None:
+    await clipboard_service.add_favorite_async(clip_id)
 
 
 @router.post("/remove_favorite")
-def remove_favorite(clip_id: int) -> None:
-    clipboard_service.remove_favorite(clip_id)
+async def remove_favorite(clip_id: int) -> None:
+    await clipboard_service.remove_favorite_async(clip_id)
 
 
 @router.get("/get_all_favorites")
-def get_all_favorites():
-    return clipboard_service.get_all_favorites()
+async def get_all_favorites():
+    return await clipboard_service.get_all_favorites_async()
 
 
 @router.get("/get_num_favorites")
-def get_num_favorites() -> int:
-    return clipboard_service.get_num_favorites()
+async def get_num_favorites() -> int:
+    return await clipboard_service.get_num_favorites_async()
 
 
 @router.get("/get_all_from_apps")
-def get_all_from_apps() -> list[str]:
-    return clipboard_service.get_all_from_apps()
+async def get_all_from_apps() -> list[str]:
+    return await clipboard_service.get_all_from_apps_async()
+
+
+# Change feed
+def _sse(event_id: int, event_type: str, data: dict[str, Any]) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def clip_events(
+    request: Request,
+    last_event_id: int | None = Query(None, ge=0),
+    last_event_id_header: Annotated[int | None, Header(alias="Last-Event-ID", ge=0)] = None,
+) -> StreamingResponse:
+    """Server-sent events for every committed write: clip_added, clips_added, clip_deleted,
+    all_clips_deleted, clip_tagged, clip_untagged, clip_favorited, clip_unfavorited.
+
+    Resumes after `Last-Event-ID` (sent by EventSource on reconnect) or `last_event_id`;
+    without either, only new events are sent. When the missed events are no longer
+    buffered, a `reset` event says to reload before the stream continues. Idle
+    connections get a keep-alive comment and cost no DB queries.
+    """
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    start = clipboard_service.get_last_event_id() if resume_from is None else resume_from
+
+    async def events() -> AsyncIterator[str]:
+        position = start
+        while not await request.is_disconnected():
+            batch = await clipboard_service.wait_for_events(position, EVENT_KEEPALIVE_SECONDS)
+            if batch is None:
+                position = clipboard_service.get_last_event_id()
+                yield _sse(position, "reset", {})
+            elif not batch:
+                yield ": keep-alive\n\n"
+            else:
+                for event in batch:
+                    yield _sse(event.id, event.type, event.data)
+                position = batch[-1].id
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/cache_stats")
+async def get_cache_stats() -> ResultCacheStats:
+    return clipboard_service.get_result_cache_stats()
@@ -0,0 +1,68 @@
+"""Conditional GET for the clipboard read endpoints, keyed on the DB data version.
+
+Every read answers with a weak ETag built from the data version (a counter the
+triggers move on each change to clips, tags or favorites; see
+tables/counters.sql) and the request's path and query. A request whose
+`If-None-Match` carries the current tag gets an empty 304 before its endpoint
+runs, so an unchanged poll costs one counter lookup instead of the query and
+the payload.
+
+The version is read before the endpoint runs. A write landing in between makes
+the body newer than its tag, so the next poll gets a full 200 again, never a
+stale 304.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Awaitable, Callable
+
+from fastapi import Request, Response
+
+from app.services.clipboard import clipboard_service
+
+# Reads whose answer is not a function of the stored data
+_UNVERSIONED_PATHS = frozenset({"/clipboard/cache_stats", "/clipboard/events"})
+
+
+def _is_versioned(request: Request) -> bool:
+    return (
+        request.method in ("GET", "HEAD")
+        and request.url.path.startswith("/clipboard/")
+        and request.url.path not in _UNVERSIONED_PATHS
+        # Time frames are relative to now, so the same data gives different answers over time
+        and not request.query_params.get("time_frame")
+    )
+
+
+def etag_for(request: Request, data_version: int) -> str:
+    """Weak ETag of a read at `data_version` (weak: gzip may re-encode the body)."""
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha256(repr((request.url.path, query)).encode("utf-8")).hexdigest()[:16]
+    return f'W/"{data_version:x}-{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match list (or `*`)."""
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+async def conditional_get(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """HTTP middleware: tag versioned reads and answer matching `If-None-Match` with 304."""
+    if not _is_versioned(request):
+        return await call_next(request)
+    try:
+        version = await clipboard_service.get_data_version_async()
+    except TimeoutError:
+        # Serve untagged; the endpoint reports a DB that is too slow itself
+        return await call_next(request)
+
+    etag = etag_for(request, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
@@ -1,6 +1,39 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from app.api.clipboard import clipboard_endpoints
+from app.api.conditional import conditional_get
+from app.core.constants import GZIP_MINIMUM_SIZE
+from app.services.clipboard import clipboard_service
+from app.services.clipboard.retention import RetentionPolicy
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Retention runs in the background when any CLIPBOARD_RETENTION_* limit is set
+    policy = RetentionPolicy.from_env()
+    retention = asyncio.create_task(clipboard_service.run_retention(policy)) if policy.enabled else None
+    yield
+    if retention is not None:
+        retention.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await retention
+
 
-app: FastAPI = FastAPI()
+app: FastAPI = FastAPI(lifespan=lifespan)
 
 app.include_router(clipboard_endpoints.router)
+
+# Middleware added last runs outermost: GZip compresses whatever the ETag check lets through
+app.middleware("http")(conditional_get)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+
+@app.exception_handler(TimeoutError)
+async def db_timeout_handler(request: Request, exc: TimeoutError) -> JSONResponse:
+    # Async DB calls give up after their per-call timeout (CLIPBOARD_DB_RUNNER_TIMEOUT)
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
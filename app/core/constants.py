@@ -9,14 +9,65 @@ TABLES_DIR: Path = SCHEMA_DIR / "tables"
 TRIGGERS_DIR: Path = SCHEMA_DIR / "triggers"
 VIEWS_DIR: Path = SCHEMA_DIR / "views"
 INDEXES_DIR: Path = SCHEMA_DIR / "indexes"
+MIGRATIONS_DIR: Path = SCHEMA_DIR / "migrations"
 
 # DB
 DB_PATH: Path = APP_DIR / "db" / "clipboard.db"
 
+# Content compression (see tables/clips.sql): clips of at least this many UTF-8 bytes are stored
+# zlib-compressed (mirrored in scripts/db_runner.mjs), keeping only their first CONTENT_HEAD_CHARS
+# characters as plain text (the substr in add_clip*.sql). Preview reads return that head too
+# (the *_preview.sql queries and the dynamic filter queries)
+COMPRESS_MIN_BYTES: int = 2048
+CONTENT_HEAD_CHARS: int = 256
+
+# Pagination (/clipboard/clips)
+DEFAULT_PAGE_SIZE: int = 50
+MAX_PAGE_SIZE: int = 200
+
+# Streaming: rows fetched per round-trip by iterate_query/iterate_dynamic_query
+STREAM_BATCH_SIZE: int = 500
+
+# Service result cache: filter/tag/app reads kept until the next write
+RESULT_CACHE_SIZE: int = 256
+
+# Bulk ingest (/clipboard/add_clips): most clips accepted per request, all in one transaction
+MAX_ADD_CLIPS: int = 100_000
+
+# Multi-get (/clipboard/clips/multi_get): most IDs looked up per request
+MAX_MULTI_GET_IDS: int = 1000
+
+# Responses: bodies smaller than this (bytes) are sent uncompressed
+GZIP_MINIMUM_SIZE: int = 1024
+
+# Change feed (/clipboard/events): events kept for resuming clients, and the idle keep-alive interval
+EVENT_BUFFER_SIZE: int = 1024
+EVENT_KEEPALIVE_SECONDS: float = 15.0
+
+# Retention (see app/services/clipboard/retention.py): clips evicted per transaction, and how
+# often the API's background task enforces the limits
+RETENTION_BATCH_SIZE: int = 200
+RETENTION_INTERVAL_SECONDS: float = 60.0
+
+# Clipboard poller (scripts/run_poller.py): poll interval (backing off to the idle interval),
+# how long a change must stay unchanged before it is recorded, batching, and the offline spool
+POLLER_INTERVAL_SECONDS: float = 0.5
+POLLER_IDLE_INTERVAL_SECONDS: float = 2.0
+POLLER_DEBOUNCE_SECONDS: float = 1.0
+POLLER_BATCH_SIZE: int = 50
+POLLER_FLUSH_SECONDS: float = 5.0
+POLLER_RETRY_SECONDS: float = 30.0
+POLLER_SPOOL_PATH: Path = APP_DIR / "db" / "poller_spool.jsonl"
+
 # Clips
 ADD_CLIP: Path = QUERIES_DIR / "add_clip.sql"
 GET_N_CLIPS: Path = QUERIES_DIR / "get_n_clips.sql"
 GET_ALL_CLIPS: Path = QUERIES_DIR / "get_all_clips.sql"
+GET_N_CLIPS_PREVIEW: Path = QUERIES_DIR / "get_n_clips_preview.sql"
+GET_ALL_CLIPS_PREVIEW: Path = QUERIES_DIR / "get_all_clips_preview.sql"
+GET_CLIP_CONTENT: Path = QUERIES_DIR / "get_clip_content.sql"
+GET_CLIP_BY_ID: Path = QUERIES_DIR / "get_clip_by_id.sql"
+GET_CLIPS_BY_IDS: Path = QUERIES_DIR / "get_clips_by_ids.sql"
 DELETE_CLIP: Path = QUERIES_DIR / "delete_clip.sql"
 DELETE_ALL_CLIPS: Path = QUERIES_DIR / "delete_all_clips.sql"
 ADD_CLIP_WITH_TIMESTAMP: Path = QUERIES_DIR / "add_clip_with_timestamp.sql"
@@ -26,6 +77,15 @@ GET_NUM_CLIPS: Path = QUERIES_DIR / "get_num_clips.sql"
 GET_ALL_FROM_APPS: Path = QUERIES_DIR / "get_all_from_apps.sql"
 GET_LAST_CLIP_ID: Path = QUERIES_DIR / "get_last_clip_id.sql"
 
+# Bulk ingest (JSON array parameters)
+ADD_CLIPS: Path = QUERIES_DIR / "add_clips.sql"
+GET_STORED_CONTENT_HASHES: Path = QUERIES_DIR / "get_stored_content_hashes.sql"
+GET_CLIP_IDS_FOR_HASHES: Path = QUERIES_DIR / "get_clip_ids_for_hashes.sql"
+ADD_TAGS_FOR_CLIPS: Path = QUERIES_DIR / "add_tags_for_clips.sql"
+ADD_CLIP_TAGS_FOR_CLIPS: Path = QUERIES_DIR / "add_clip_tags_for_clips.sql"
+ADD_FAVORITES_FOR_HASHES: Path = QUERIES_DIR / "add_favorites_for_hashes.sql"
+GET_CLIP_BY_CONTENT_HASH: Path = QUERIES_DIR / "get_clip_by_content_hash.sql"
+
 # Tags & Favorites
 ADD_CLIP_TAG: Path = QUERIES_DIR / "add_clip_tag.sql"
 ADD_TAG_IF_NOT_EXISTS: Path = QUERIES_DIR / "add_tag_if_not_exists.sql"
@@ -42,6 +102,23 @@ DELETE_FAVORITE_FOR_CLIP: Path = QUERIES_DIR / "delete_favorite_for_clip.sql"
 GET_TAG_IDS_FOR_CLIP: Path = QUERIES_DIR / "get_tag_ids_for_clip.sql"
 DELETE_CLIP_TAGS_FOR_CLIP: Path = QUERIES_DIR / "delete_clip_tags_for_clip.sql"
 DELETE_UNUSED_TAG: Path = QUERIES_DIR / "delete_unused_tag.sql"
+DELETE_UNUSED_TAGS_FOR_CLIP: Path = QUERIES_DIR / "delete_unused_tags_for_clip.sql"
 DELETE_ALL_CLIP_TAGS: Path = QUERIES_DIR / "delete_all_clip_tags.sql"
 DELETE_ALL_FAVORITES: Path = QUERIES_DIR / "delete_all_favorites.sql"
 DELETE_ALL_TAGS: Path = QUERIES_DIR / "delete_all_tags.sql"
+
+# Counters (maintained by triggers; see tables/counters.sql)
+CHECK_COUNTERS: Path = QUERIES_DIR / "check_counters.sql"
+REBUILD_COUNTERS: Path = QUERIES_DIR / "rebuild_counters.sql"
+DELETE_ALL_TAG_COUNTERS: Path = QUERIES_DIR / "delete_all_tag_counters.sql"
+REBUILD_TAG_COUNTERS: Path = QUERIES_DIR / "rebuild_tag_counters.sql"
+GET_DATA_VERSION: Path = QUERIES_DIR / "get_data_version.sql"
+
+# Retention (each deletes one batch of the oldest evictable clips)
+EVICT_CLIPS_OVER_COUNT: Path = QUERIES_DIR / "evict_clips_over_count.sql"
+EVICT_CLIPS_OVER_AGE: Path = QUERIES_DIR / "evict_clips_over_age.sql"
+EVICT_CLIPS_OVER_BYTES: Path = QUERIES_DIR / "evict_clips_over_bytes.sql"
+
+# Schema versioning (see init_db)
+GET_SCHEMA_VERSION: Path = QUERIES_DIR / "get_schema_version.sql"
+COUNT_TABLES_NAMED: Path = QUERIES_DIR / "count_tables_named.sql"
@@ -0,0 +1,437 @@
+"""Selectable execution backends behind `execute_query`/`execute_dynamic_query`.
+
+Every backend speaks the request protocol of `scripts/db_runner.mjs`: a payload
+dict with `op` ('query' | 'sql' | 'file' | 'exec' | 'batch'), `query`/`sql`/`file`,
+`params` (or `steps` for a batch), `dbPath` and `key`, answered with `{ok, rows}`,
+`{ok, results}` for a batch, or `{ok: False, error}`. `query` names a file in
+app/db/queries by its stem. `iterate` streams the rows of one statement in
+batches instead, and `run_async` answers a request without blocking the event
+loop.
+
+Backends (chosen with the CLIPBOARD_DB_BACKEND env var):
+
+- `node` (default): the Node runner with better-sqlite3-multiple-ciphers.
+- `sqlcipher`: in-process SQLCipher via the optional `sqlcipher3` package.
+- `sqlite`: in-process stdlib `sqlite3`, unencrypted. Meant for local
+  development and for benchmarking the backends against each other.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator
+
+from ..core.constants import BASE_DIR, QUERIES_DIR, SCHEMA_DIR
+from .functions import register_functions
+from .node_runner import NodeRunner
+from .pool import ConnectionPool
+
+try:
+    # Optional SQLCipher-enabled sqlite3 build for the in-process encrypted backend
+    from sqlcipher3 import dbapi2 as sqlcipher  # type: ignore[import-not-found]
+except ImportError:
+    sqlcipher = None
+
+# Path to the Node runner
+NODE_DB_RUNNER: Path = BASE_DIR / "scripts" / "db_runner.mjs"
+
+# Where the runner loads its registered queries from, and the schema it checks them against
+NODE_DB_RUNNER_ARGS: list[str] = ["--queries", str(QUERIES_DIR), "--schema", str(SCHEMA_DIR)]
+
+# Env var naming the backend to use: "node" (default), "sqlcipher" or "sqlite"
+BACKEND_ENV: str = "CLIPBOARD_DB_BACKEND"
+
+# Env var selecting how the Node runner is invoked: "persistent" (default) or "oneshot"
+RUNNER_MODE_ENV: str = "CLIPBOARD_DB_RUNNER_MODE"
+
+# Env var selecting the persistent runner's wire format: "binary" (default; see app/db/wire.py)
+# or "json" (newline-delimited JSON, the fallback). One-shot runners always speak JSON.
+RUNNER_PROTOCOL_ENV: str = "CLIPBOARD_DB_RUNNER_PROTOCOL"
+
+# Env var with the persistent runner's per-request timeout in seconds (default 60; 0 disables it).
+# Schema/migration scripts (op=exec) always run without a timeout. Also the default
+# per-call timeout of the async API on every backend.
+RUNNER_TIMEOUT_ENV: str = "CLIPBOARD_DB_RUNNER_TIMEOUT"
+
+# Env var bounding the async API's DB calls in flight per event loop (default 64)
+MAX_CONCURRENCY_ENV: str = "CLIPBOARD_DB_MAX_CONCURRENCY"
+
+# Env var bounding the number of open connections per database (in-process backends)
+POOL_SIZE_ENV: str = "CLIPBOARD_DB_POOL_SIZE"
+
+# Upper bound on distinct databases with an open pool (LRU evicted)
+MAX_OPEN_POOLS: int = 8
+
+# Upper bound on concurrently open streams (`iterate`); matches MAX_OPEN_CURSORS in the runner
+MAX_OPEN_STREAMS: int = 16
+
+
+class DBBackend(ABC):
+    """Executes runner-protocol requests against a database."""
+
+    name: str
+    requires_key: bool = True
+
+    @abstractmethod
+    def run(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Execute one request and return the runner-style response dict."""
+
+    async def run_async(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Like `run`, without blocking the event loop; safe to cancel.
+
+        In-process backends run the request on a worker thread. A cancelled
+        call stops waiting right away; the statement still finishes on its
+        thread.
+        """
+        return await asyncio.to_thread(self.run, payload)
+
+    def iterate(self, payload: dict[str, Any], batch_size: int) -> Iterator[list[Any]]:
+        """Yield the rows of one `query`/`sql`/`file` request in batches of up to `batch_size`.
+
+        Raises RuntimeError on DB errors, or when MAX_OPEN_STREAMS streams are
+        already open. This fallback reads every row at once; backends that can
+        hold a cursor open override it.
+        """
+        result = self.run(payload)
+        if not result.get("ok", False):
+            raise RuntimeError(f"DB runner error: {result.get('error')}")
+        rows = result.get("rows", [])
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    @property
+    def open_streams(self) -> int:
+        """Number of `iterate` streams currently holding a DB cursor."""
+        return 0
+
+    def close(self) -> None:
+        """Release processes/connections held by the backend."""
+
+
+class NodeBackend(DBBackend):
+    """Runs requests through `scripts/db_runner.mjs` (SQLCipher via Node)."""
+
+    name = "node"
+
+    def __init__(self) -> None:
+        self._runner: NodeRunner | None = None
+        self._lock = threading.Lock()
+        self._cursors: set[int] = set()
+
+    def run(self, payload: dict[str, Any]) -> dict[str, Any]:
+        if not NODE_DB_RUNNER.exists():
+            raise FileNotFoundError(
+                f"Node DB runner not found at {NODE_DB_RUNNER}. Create scripts/db_runner.mjs."
+            )
+        if os.getenv(RUNNER_MODE_ENV, "persistent") == "oneshot":
+            return self._run_oneshot(payload)
+        if payload.get("op") == "exec":
+            # init_db migrations (e.g. rebuilding a search index) can take minutes on a
+            # large history; timing out would kill the runner under every other caller
+            return self._get_runner().request(payload, timeout=None)
+        return self._get_runner().request(payload)
+
+    async def run_async(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Await the shared runner's answer (or a one-shot runner's) on async pipes.
+
+        Timeouts are up to the caller (see `execute_query_async`); cancelling
+        abandons the request without disturbing the runner.
+        """
+        if not NODE_DB_RUNNER.exists():
+            raise FileNotFoundError(
+                f"Node DB runner not found at {NODE_DB_RUNNER}. Create scripts/db_runner.mjs."
+            )
+        if os.getenv(RUNNER_MODE_ENV, "persistent") == "oneshot":
+            return await self._run_oneshot_async(payload)
+        return await self._get_runner().request_async(payload, timeout=None)
+
+    def iterate(self, payload: dict[str, Any], batch_size: int) -> Iterator[list[Any]]:
+        if os.getenv(RUNNER_MODE_ENV, "persistent") == "oneshot":
+            # A one-shot runner cannot keep a cursor open between requests
+            yield from super().iterate(payload, batch_size)
+            return
+
+        runner = self._get_runner()
+        opened = runner.request({**payload, "op": "iterate"})
+        if not opened.get("ok", False):
+            raise RuntimeError(f"DB runner error: {opened.get('error')}")
+        cursor = opened["cursor"]
+        with self._lock:
+            self._cursors.add(cursor)
+        done = False
+        try:
+            while not done:
+                result = runner.request({"op": "next", "cursor": cursor, "count": batch_size})
+                if not result.get("ok", False):
+                    raise RuntimeError(f"DB runner error: {result.get('error')}")
+                done = result.get("done", True)
+                if result.get("rows"):
+                    yield result["rows"]
+        finally:
+            if not done:
+                # Abandoned early (consumer stopped or failed): release the runner-side cursor
+                try:
+                    runner.request({"op": "close", "cursor": cursor})
+                except (RuntimeError, TimeoutError):
+                    pass
+            with self._lock:
+                self._cursors.discard(cursor)
+
+    @property
+    def open_streams(self) -> int:
+        with self._lock:
+            return len(self._cursors)
+
+    def close(self) -> None:
+        if self._runner is not None:
+            self._runner.close()
+
+    def _get_runner(self) -> NodeRunner:
+        with self._lock:
+            if self._runner is None:
+                timeout = float(os.getenv(RUNNER_TIMEOUT_ENV, "60"))
+                self._runner = NodeRunner(
+                    NODE_DB_RUNNER,
+                    timeout=timeout or None,
+                    args=NODE_DB_RUNNER_ARGS,
+                    protocol=os.getenv(RUNNER_PROTOCOL_ENV, "binary").lower(),  # type: ignore[arg-type]
+                )
+            return self._runner
+
+    def _run_oneshot(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Spawn a runner for a single request and return its parsed response."""
+        proc = subprocess.run(
+            ["node", str(NODE_DB_RUNNER), *NODE_DB_RUNNER_ARGS],
+            input=json.dumps(payload).encode("utf-8"),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+        return _oneshot_response(proc.returncode, proc.stdout, proc.stderr)
+
+    async def _run_oneshot_async(self, payload: dict[str, Any]) -> dict[str, Any]:
+        proc = await asyncio.create_subprocess_exec(
+            "node", str(NODE_DB_RUNNER), *NODE_DB_RUNNER_ARGS,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await proc.communicate(json.dumps(payload).encode("utf-8"))
+        except BaseException:
+            # Cancelled (e.g. timed out): don't leave the runner behind
+            if proc.returncode is None:
+                proc.kill()
+            raise
+        assert proc.returncode is not None
+        return _oneshot_response(proc.returncode, stdout, stderr)
+
+
+def _oneshot_response(returncode: int, stdout: bytes, stderr: bytes) -> dict[str, Any]:
+    """Parse the output of a one-shot runner, failing on a crash or garbled output."""
+    if returncode != 0:
+        raise RuntimeError(
+            f"DB runner failed (exit {returncode})\nSTDOUT:\n{stdout.decode('utf-8', errors='ignore')}"
+            f"\nSTDERR:\n{stderr.decode('utf-8', errors='replace')}"
+        )
+
+    try:
+        return json.loads(stdout.decode("utf-8"))
+    except json.JSONDecodeError as exc:
+        raise RuntimeError(
+            f"DB runner returned invalid JSON: {exc}. Output: {stdout!r}"
+        ) from exc
+
+
+class SQLiteBackend(DBBackend):
+    """In-process backend on the stdlib `sqlite3` module (no encryption)."""
+
+    name = "sqlite"
+    requires_key = False
+
+    def __init__(self, pool_size: int | None = None) -> None:
+        self.pool_size = pool_size or int(os.getenv(POOL_SIZE_ENV, "4"))
+        self._pools: OrderedDict[tuple[str, str | None], ConnectionPool] = OrderedDict()
+        self._lock = threading.Lock()
+        self._streams = 0
+
+    def run(self, payload: dict[str, Any]) -> dict[str, Any]:
+        module = self.module
+        pool = self.pool_for(payload["dbPath"], payload.get("key"))
+        try:
+            with pool.connection() as conn:
+                return self._execute(conn, payload)
+        except module.Error as exc:
+            return {"ok": False, "error": str(exc)}
+
+    def iterate(self, payload: dict[str, Any], batch_size: int) -> Iterator[list[Any]]:
+        """Stream rows through a dedicated connection, outside the pool.
+
+        A stream lives as long as its (possibly slow) consumer, so it must not
+        hold one of the pooled connections that every other query needs. Its
+        read snapshot also holds back WAL checkpoints until it is closed.
+        """
+        module = self.module
+        with self._lock:
+            if self._streams >= MAX_OPEN_STREAMS:
+                raise RuntimeError(
+                    f"DB runner error: Too many open streams ({MAX_OPEN_STREAMS}); retry when a stream finishes"
+                )
+            self._streams += 1
+        try:
+            conn = self.connect(payload["dbPath"], payload.get("key"))
+            try:
+                cursor = conn.execute(_statement_text(payload), payload.get("params") or ())
+                while rows := cursor.fetchmany(batch_size):
+                    yield rows
+            finally:
+                conn.close()
+        except module.Error as exc:
+            raise RuntimeError(f"DB runner error: {exc}") from exc
+        finally:
+            with self._lock:
+                self._streams -= 1
+
+    @property
+    def open_streams(self) -> int:
+        with self._lock:
+            return self._streams
+
+    def close(self) -> None:
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+    @property
+    def module(self) -> Any:
+        return sqlite3
+
+    def pool_for(self, db_path: str, key: str | None) -> ConnectionPool:
+        """Return the (LRU-cached) pool of open connections for one keyed database."""
+        pool_key = (db_path, key)
+        with self._lock:
+            pool = self._pools.get(pool_key)
+            if pool is not None:
+                self._pools.move_to_end(pool_key)
+                return pool
+            pool = ConnectionPool(lambda: self.connect(db_path, key), max_size=self.pool_size)
+            self._pools[pool_key] = pool
+            if len(self._pools) > MAX_OPEN_POOLS:
+                _, oldest = self._pools.popitem(last=False)
+                oldest.close()
+            return pool
+
+    def connect(self, db_path: str, key: str | None) -> Any:
+        # Autocommit, like better-sqlite3: each statement is its own transaction
+        conn = self.module.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._apply_key(conn, key)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        register_functions(conn)
+        return conn
+
+    def _apply_key(self, conn: Any, key: str | None) -> None:
+        """Plain sqlite3 ignores the key."""
+
+    def _execute(self, conn: Any, payload: dict[str, Any]) -> dict[str, Any]:
+        op = payload.get("op")
+        if op == "exec":
+            conn.executescript(payload["sql"])
+            return {"ok": True}
+        if op in ("query", "file", "sql"):
+            return {"ok": True, "rows": self._run_statement(conn, payload)}
+        if op == "batch":
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                results = [self._run_statement(conn, step) for step in payload.get("steps") or []]
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            return {"ok": True, "results": results}
+        return {"ok": False, "error": f"Unknown op: {op}"}
+
+    def _run_statement(self, conn: Any, step: dict[str, Any]) -> list[Any]:
+        cursor = conn.execute(_statement_text(step), step.get("params") or ())
+        return cursor.fetchall() if cursor.description is not None else []
+
+
+class SQLCipherBackend(SQLiteBackend):
+    """In-process encrypted backend using the optional `sqlcipher3` package."""
+
+    name = "sqlcipher"
+    requires_key = True
+
+    @property
+    def module(self) -> Any:
+        if sqlcipher is None:
+            raise RuntimeError(
+                "SQLCipher not available in-process. Install `sqlcipher3` or use CLIPBOARD_DB_BACKEND=node."
+            )
+        return sqlcipher
+
+    def _apply_key(self, conn: Any, key: str | None) -> None:
+        if not key:
+            raise ValueError("No encryption key supplied. Set CLIPBOARD_DB_KEY.")
+        safe_key = key.replace("'", "''")
+        conn.execute(f"PRAGMA key = '{safe_key}'")
+
+
+BACKENDS: dict[str, type[DBBackend]] = {
+    NodeBackend.name: NodeBackend,
+    SQLCipherBackend.name: SQLCipherBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+_instances: dict[str, DBBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name: str | None = None) -> DBBackend:
+    """Return the shared backend instance named by `name` or CLIPBOARD_DB_BACKEND."""
+    name = (name or os.getenv(BACKEND_ENV) or NodeBackend.name).lower()
+    with _instances_lock:
+        backend = _instances.get(name)
+        if backend is None:
+            backend_cls = BACKENDS.get(name)
+            if backend_cls is None:
+                raise ValueError(
+                    f"Unknown DB backend {name!r}. Expected one of: {', '.join(sorted(BACKENDS))}."
+                )
+            backend = backend_cls()
+            _instances[name] = backend
+        return backend
+
+
+def close_backends() -> None:
+    """Close every backend created so far (used at interpreter exit)."""
+    with _instances_lock:
+        for backend in _instances.values():
+            backend.close()
+        _instances.clear()
+
+
+@lru_cache(maxsize=None)
+def _read_sql_file(file: str) -> str:
+    return Path(file).read_text(encoding="utf-8")
+
+
+def _statement_text(step: dict[str, Any]) -> str:
+    # sqlite3 keeps an LRU of prepared statements per connection keyed by this text
+    if step.get("query"):
+        return _read_sql_file(str(QUERIES_DIR / f"{step['query']}.sql"))
+    if step.get("file"):
+        return _read_sql_file(step["file"])
+    if step.get("sql"):
+        return step["sql"]
+    raise ValueError("Statement needs either `query`, `file` or `sql`")
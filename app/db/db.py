@@ -1,18 +1,36 @@
-"""Database helpers that execute SQL via a Node.js runner using SQLCipher.
+"""Database helpers that execute SQL via a pluggable backend.
 
-This switches from Python's sqlite3 to an encrypted DB powered by
-better-sqlcipher3. Python invokes a small Node script to run queries.
+By default queries go to an encrypted DB powered by better-sqlcipher3 through
+a long-lived Node runner (see `node_runner.py`). CLIPBOARD_DB_BACKEND selects
+an in-process alternative instead (see `backends.py`); every backend receives
+the same runner-style request, so callers never see the difference.
+
+Each `execute_*` helper has an `_async` twin for event-loop callers. Those never
+park a thread on the Node runner, are bounded per event loop by
+CLIPBOARD_DB_MAX_CONCURRENCY and take a per-call `timeout`.
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
 import os
-import subprocess
+import threading
+import weakref
+from contextlib import AbstractContextManager
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterator, Sequence, TypeAlias
 
 from ..core.constants import *
+from .backends import (
+    MAX_CONCURRENCY_ENV,
+    RUNNER_TIMEOUT_ENV,
+    DBBackend,
+    SQLiteBackend,
+    close_backends,
+    get_backend,
+)
 try:
     # Load environment variables from .env if present
     from dotenv import load_dotenv
@@ -21,18 +39,24 @@ except Exception:
     # If python-dotenv isn't installed, continue; env vars may already be set
     pass
 
-# Path to the Node runner
-NODE_DB_RUNNER: Path = BASE_DIR / "scripts" / "db_runner.mjs"
-
 # Env var for the SQLCipher key
 DB_KEY_ENV: str = "CLIPBOARD_DB_KEY"
 
+atexit.register(close_backends)
 
-def _ensure_node_runner() -> None:
-    if not NODE_DB_RUNNER.exists():
-        raise FileNotFoundError(
-            f"Node DB runner not found at {NODE_DB_RUNNER}. Create scripts/db_runner.mjs."
-        )
+# A batch step: a query file (like execute_query) or a dynamic query builder
+# (like execute_dynamic_query), optionally paired with its parameters.
+BatchQuery: TypeAlias = Path | str | Callable[[], str | tuple[str, tuple | dict | list]]
+BatchStep: TypeAlias = BatchQuery | tuple[BatchQuery, tuple | dict | None]
+
+# Marks "use CLIPBOARD_DB_RUNNER_TIMEOUT" in the async API
+DEFAULT_TIMEOUT: Any = object()
+
+# One limit per event loop: an asyncio.Semaphore must not be shared between loops
+_async_limits: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+_async_limits_lock = threading.Lock()
 
 
 def _normalize_params(params: tuple | list | dict | None) -> list | dict:
@@ -56,80 +80,190 @@ def _get_db_key() -> str:
     return key
 
 
-def _run_node(payload: dict[str, Any]) -> dict[str, Any]:
-    """Run the Node DB runner with a JSON payload and return parsed result."""
-    _ensure_node_runner()
-
-    # Always include db path and key
-    payload = {
+def _with_db(payload: dict[str, Any], backend: DBBackend) -> dict[str, Any]:
+    """Add the db path and key every request carries."""
+    return {
         **payload,
         "dbPath": str(DB_PATH),
-        "key": _get_db_key(),
+        "key": _get_db_key() if backend.requires_key else os.getenv(DB_KEY_ENV),
     }
 
-    proc = subprocess.run(
-        ["node", str(NODE_DB_RUNNER)],
-        input=json.dumps(payload).encode("utf-8"),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=False,
-    )
-
-    if proc.returncode != 0:
-        stderr = proc.stderr.decode('utf-8', errors='replace')
-        stdout = proc.stdout.decode('utf-8', errors='ignore')
-        raise RuntimeError(
-            f"DB runner failed (exit {proc.returncode})\nSTDOUT:\n{stdout}\nSTDERR:\n{stderr}"
-        )
 
-    try:
-        result = json.loads(proc.stdout.decode("utf-8"))
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(
-            f"DB runner returned invalid JSON: {exc}. Output: {proc.stdout!r}"
-        ) from exc
+def _run(payload: dict[str, Any], backend: DBBackend | None = None) -> dict[str, Any]:
+    """Send a runner-style request to the active backend and return its result."""
+    backend = backend or get_backend()
+
+    result = backend.run(_with_db(payload, backend))
+    if not result.get("ok", False):
+        raise RuntimeError(f"DB runner error: {result.get('error')}")
+
+    return result
+
+
+def _async_limit() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _async_limits_lock:
+        limit = _async_limits.get(loop)
+        if limit is None:
+            limit = asyncio.Semaphore(int(os.getenv(MAX_CONCURRENCY_ENV, "64")))
+            _async_limits[loop] = limit
+        return limit
 
+
+async def _run_async(payload: dict[str, Any], timeout: float | None = DEFAULT_TIMEOUT) -> dict[str, Any]:
+    """Async `_run`: waits for a free slot, then for the backend, within `timeout` seconds overall."""
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = float(os.getenv(RUNNER_TIMEOUT_ENV, "60")) or None
+    backend = get_backend()
+    request = _with_db(payload, backend)
+
+    try:
+        async with asyncio.timeout(timeout):
+            async with _async_limit():
+                result = await backend.run_async(request)
+    except TimeoutError as exc:
+        raise TimeoutError(f"DB call did not finish within {timeout}s") from exc
     if not result.get("ok", False):
         raise RuntimeError(f"DB runner error: {result.get('error')}")
 
     return result
 
 
-def get_connection() -> None:  # kept for backward imports, not used
-    raise NotImplementedError(
-        "Direct sqlite3 connections are disabled. Use execute_query/execute_dynamic_query."
-    )
+def get_connection() -> AbstractContextManager[Any]:
+    """Borrow a pooled connection from an in-process backend.
+
+    Usage: `with get_connection() as conn: ...`. The Node backend keeps its
+    connections inside the runner process, so it has none to lend.
+    """
+    backend = get_backend()
+    if not isinstance(backend, SQLiteBackend):
+        raise NotImplementedError(
+            "Direct connections require an in-process backend. Use execute_query/execute_dynamic_query."
+        )
+    key = _get_db_key() if backend.requires_key else os.getenv(DB_KEY_ENV)
+    return backend.pool_for(str(DB_PATH), key).connection()
 
 
 def init_db() -> None:
-    """Initialize DB schema by applying SQL files via the Node runner."""
+    """Initialize DB schema by applying SQL files via the active backend.
+
+    Tables are created first; an existing database is then brought up to date
+    by `schema/migrations` before indexes, triggers and views are (re)applied.
+    """
     # Ensure the parent directory exists
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    for subdir in ["tables", "indexes", "triggers", "views"]:
-        dir_path: Path = SCHEMA_DIR / subdir
-        if not dir_path.exists():
-            continue
-        for sql_file in sorted(dir_path.glob("*.sql")):
-            sql = sql_file.read_text(encoding="utf-8")
-            _run_node({"op": "exec", "sql": sql})
-            print(f"Applied schema: {sql_file.relative_to(SCHEMA_DIR)}")
+    fresh = execute_query(COUNT_TABLES_NAMED, {"name": "Clips"}) == [(0,)]
+    _apply_schema_dir("tables")
+    _apply_migrations(fresh)
+    for subdir in ["indexes", "triggers", "views"]:
+        _apply_schema_dir(subdir)
     print(f"Database ready at {DB_PATH}")
 
 
-def execute_query(filename: Path | str, params: tuple | dict | None = None) -> list[tuple]:
-    """Load a SQL query from file and execute it with optional parameters via SQLCipher."""
+def _apply_schema_dir(subdir: str) -> None:
+    dir_path: Path = SCHEMA_DIR / subdir
+    if not dir_path.exists():
+        return
+    for sql_file in sorted(dir_path.glob("*.sql")):
+        sql = sql_file.read_text(encoding="utf-8")
+        _run({"op": "exec", "sql": sql})
+        print(f"Applied schema: {sql_file.relative_to(SCHEMA_DIR)}")
+
+
+def _migrations() -> list[tuple[int, Path]]:
+    """Migration files (`NNNN_description.sql`) ordered by version."""
+    if not MIGRATIONS_DIR.exists():
+        return []
+    return sorted((int(path.name.split("_", 1)[0]), path) for path in MIGRATIONS_DIR.glob("*.sql"))
+
+
+def _apply_migrations(fresh: bool) -> None:
+    """Apply migrations newer than PRAGMA user_version, each in its own transaction.
+
+    A fresh database was just created from the current table files, so it is
+    stamped with the latest version instead.
+    """
+    migrations = _migrations()
+    if not migrations:
+        return
+    if fresh:
+        _run({"op": "exec", "sql": f"PRAGMA user_version = {migrations[-1][0]};"})
+        return
+
+    current = execute_query(GET_SCHEMA_VERSION)[0][0]
+    for version, sql_file in migrations:
+        if version <= current:
+            continue
+        sql = sql_file.read_text(encoding="utf-8")
+        try:
+            _run({"op": "exec", "sql": f"BEGIN;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;"})
+        except RuntimeError:
+            # exec stops at the failing statement; don't leave its transaction open
+            try:
+                _run({"op": "exec", "sql": "ROLLBACK;"})
+            except RuntimeError:
+                pass
+            raise
+        print(f"Applied migration: {sql_file.relative_to(SCHEMA_DIR)}")
+
+
+@lru_cache(maxsize=1)
+def _registered_queries() -> frozenset[str]:
+    """Names (file stems) of the query files the runner loads at startup."""
+    return frozenset(path.stem for path in QUERIES_DIR.glob("*.sql"))
+
+
+def _query_name(filename: Path | str) -> str:
+    """Map a query file (QUERIES_DIR-relative or absolute) to its registered name."""
     query_path: Path = QUERIES_DIR / str(filename)
-    if not query_path.exists():
+    if query_path.parent != QUERIES_DIR or query_path.stem not in _registered_queries():
         raise FileNotFoundError(f"Query file not found: {query_path}")
+    return query_path.stem
+
+
+def _build_dynamic(
+    query: Callable[[], str | tuple[str, tuple | dict | list]],
+    params: tuple | dict | None,
+) -> tuple[str, list | dict]:
+    built = query()
+    if isinstance(built, tuple) and len(built) == 2:
+        sql, query_params = built
+        return sql, _normalize_params(query_params)
+    return built, _normalize_params(params)  # type: ignore[return-value]
+
+
+def _query_payload(filename: Path | str, params: tuple | dict | None) -> dict[str, Any]:
+    return {"op": "query", "query": _query_name(filename), "params": _normalize_params(params)}
+
+
+def _dynamic_payload(
+    query: Callable[[], str | tuple[str, tuple | dict | list]], params: tuple | dict | None
+) -> dict[str, Any]:
+    sql, exec_params = _build_dynamic(query, params)
+    return {"op": "sql", "sql": sql, "params": exec_params}
+
+
+def _batch_payload(steps: Sequence[BatchStep]) -> dict[str, Any]:
+    payload_steps: list[dict[str, Any]] = []
+    for step in steps:
+        query, params = step if isinstance(step, tuple) else (step, None)
+        if callable(query):
+            sql, exec_params = _build_dynamic(query, params)
+            payload_steps.append({"sql": sql, "params": exec_params})
+        else:
+            payload_steps.append(
+                {"query": _query_name(query), "params": _normalize_params(params)}
+            )
+    return {"op": "batch", "steps": payload_steps}
+
+
+def execute_query(filename: Path | str, params: tuple | dict | None = None) -> list[tuple]:
+    """Execute a query file from app/db/queries, by its registered name, with optional parameters.
 
-    result = _run_node(
-        {
-            "op": "file",
-            "file": str(query_path),
-            "params": _normalize_params(params),
-        }
-    )
+    The Node runner prepares each query once per connection and reuses it.
+    """
+    result = _run(_query_payload(filename, params))
     rows = result.get("rows", [])
     return [tuple(row) for row in rows]
 
@@ -138,15 +272,85 @@ def execute_dynamic_query(
     query: Callable[[], str | tuple[str, tuple | dict]],
     params: tuple | dict | None = None,
 ) -> list[tuple]:
-    """Execute a dynamically provided SQL query via SQLCipher."""
-    built = query()
-    if isinstance(built, tuple) and len(built) == 2:
-        sql, query_params = built
-        exec_params = _normalize_params(query_params)
-    else:
-        sql = built  # type: ignore[assignment]
-        exec_params = _normalize_params(params)
-
-    result = _run_node({"op": "sql", "sql": sql, "params": exec_params})
+    """Execute a dynamically provided SQL query."""
+    result = _run(_dynamic_payload(query, params))
     rows = result.get("rows", [])
     return [tuple(row) for row in rows]
+
+
+def execute_batch(steps: Sequence[BatchStep]) -> list[list[tuple]]:
+    """Run several queries atomically in one transaction and one round-trip.
+
+    Each step is a query file or a dynamic query builder, alone or as a
+    `(query, params)` pair. If any step fails, none of them is applied.
+    Returns one list of rows per step, in order.
+    """
+    result = _run(_batch_payload(steps))
+    return [[tuple(row) for row in rows] for rows in result.get("results", [])]
+
+
+async def execute_query_async(
+    filename: Path | str,
+    params: tuple | dict | None = None,
+    *,
+    timeout: float | None = DEFAULT_TIMEOUT,
+) -> list[tuple]:
+    """Async execute_query. Raises TimeoutError after `timeout` seconds (None waits indefinitely)."""
+    result = await _run_async(_query_payload(filename, params), timeout)
+    return [tuple(row) for row in result.get("rows", [])]
+
+
+async def execute_dynamic_query_async(
+    query: Callable[[], str | tuple[str, tuple | dict]],
+    params: tuple | dict | None = None,
+    *,
+    timeout: float | None = DEFAULT_TIMEOUT,
+) -> list[tuple]:
+    """Async execute_dynamic_query (see execute_query_async for `timeout`)."""
+    result = await _run_async(_dynamic_payload(query, params), timeout)
+    return [tuple(row) for row in result.get("rows", [])]
+
+
+async def execute_batch_async(
+    steps: Sequence[BatchStep],
+    *,
+    timeout: float | None = DEFAULT_TIMEOUT,
+) -> list[list[tuple]]:
+    """Async execute_batch (see execute_query_async for `timeout`).
+
+    A batch that times out may still commit: the caller only stops waiting.
+    """
+    result = await _run_async(_batch_payload(steps), timeout)
+    return [[tuple(row) for row in rows] for rows in result.get("results", [])]
+
+
+def _iterate(payload: dict[str, Any], batch_size: int) -> Iterator[tuple]:
+    backend = get_backend()
+    for rows in backend.iterate(_with_db(payload, backend), batch_size):
+        for row in rows:
+            yield tuple(row)
+
+
+def iterate_query(
+    filename: Path | str,
+    params: tuple | dict | None = None,
+    *,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[tuple]:
+    """Like execute_query, but yield rows as they are read instead of returning a list.
+
+    Rows are fetched `batch_size` at a time, so memory stays bounded however
+    many rows the query returns. Close the generator (or exhaust it) to release
+    the underlying cursor.
+    """
+    yield from _iterate(_query_payload(filename, params), batch_size)
+
+
+def iterate_dynamic_query(
+    query: Callable[[], str | tuple[str, tuple | dict]],
+    params: tuple | dict | None = None,
+    *,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[tuple]:
+    """Like execute_dynamic_query, but yield rows as they are read (see iterate_query)."""
+    yield from _iterate(_dynamic_payload(query, params), batch_size)
@@ -0,0 +1,55 @@
+"""SQL functions registered on every in-process connection.
+
+Mirrors `registerFunctions` in `scripts/db_runner.mjs`, so schema and query
+files behave the same whichever backend runs them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import zlib
+from typing import Any
+
+from ..core.constants import COMPRESS_MIN_BYTES
+
+
+def content_hash(text: str | None) -> str | None:
+    """Hex SHA-256 of a clip's content, used for duplicate detection."""
+    if text is None:
+        return None
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+def compress_content(text: str | None) -> bytes | None:
+    """zlib-compressed UTF-8 of a clip's content, or None if it is too small or compresses poorly."""
+    if text is None:
+        return None
+    raw = str(text).encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return None
+    packed = zlib.compress(raw, 6)
+    # Not worth a decompression on every read unless it saves at least a quarter
+    return packed if len(packed) * 4 <= len(raw) * 3 else None
+
+
+# The last (packed, text) pair: a search checks several keywords, on every joined row, against the same clip
+_last_decompressed: tuple[bytes, str] = (b"", "")
+
+
+def decompress_content(packed: bytes | None) -> str | None:
+    """Inverse of compress_content."""
+    global _last_decompressed
+    if packed is None:
+        return None
+    last = _last_decompressed
+    if packed == last[0]:
+        return last[1]
+    text = zlib.decompress(packed).decode("utf-8")
+    _last_decompressed = (packed, text)
+    return text
+
+
+def register_functions(conn: Any) -> None:
+    conn.create_function("content_hash", 1, content_hash, deterministic=True)
+    conn.create_function("compress_content", 1, compress_content, deterministic=True)
+    conn.create_function("decompress_content", 1, decompress_content, deterministic=True)
@@ -0,0 +1,250 @@
+"""Supervisor for a long-lived Node DB runner process.
+
+The runner (`scripts/db_runner.mjs --serve`) keeps its encrypted connections
+open and answers requests on stdin/stdout: newline-delimited JSON, or with
+`protocol="binary"` the length-prefixed frames of `app.db.wire`. Each request
+carries an `id` that the runner echoes back, so several threads and coroutines
+can share one process: a writer thread feeds queued requests to stdin and a
+reader thread hands each response to the caller waiting on that id. Sending
+never blocks the caller, so `request_async` can await the response on an event
+loop without parking a thread per request.
+
+If the process dies, every in-flight request fails and the next request
+transparently starts a fresh process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import queue
+import struct
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, IO, Iterator, Literal, Sequence
+
+from . import wire
+
+# Number of stderr lines kept around to explain a crash
+_STDERR_TAIL_LINES: int = 50
+
+# Marks "use the runner's default timeout" in request()
+_DEFAULT_TIMEOUT: Any = object()
+
+# How requests and responses are framed on the runner's pipes
+RunnerProtocol = Literal["json", "binary"]
+
+
+class NodeRunner:
+    """A supervised `node db_runner.mjs --serve` process shared by all callers."""
+
+    def __init__(
+        self,
+        script: Path,
+        *,
+        node: str = "node",
+        timeout: float | None = 60.0,
+        args: Sequence[str] = (),
+        protocol: RunnerProtocol = "json",
+    ) -> None:
+        if protocol not in ("json", "binary"):
+            raise ValueError(f"Unknown runner protocol {protocol!r}. Expected 'json' or 'binary'.")
+        self.script = script
+        self.node = node
+        self.timeout = timeout
+        self.args = list(args)
+        self.protocol = protocol
+        self.restarts: int = 0
+        self._spawned: bool = False
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._pending: dict[int, Future[dict[str, Any]]] = {}
+        self._outbox: queue.SimpleQueue[bytes | None] = queue.SimpleQueue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stderr_tail: deque[str] = deque(maxlen=_STDERR_TAIL_LINES)
+
+    def request(self, payload: dict[str, Any], *, timeout: float | None = _DEFAULT_TIMEOUT) -> dict[str, Any]:
+        """Send one request and block until its response arrives.
+
+        `timeout` overrides the runner default for this request; None waits
+        indefinitely. A timed-out runner is killed, failing every request in
+        flight on it, so long-running requests should not rely on the default.
+        """
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        proc, pending, request_id, future = self._submit(payload)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as exc:
+            # A runner that stops answering is treated like a crashed one
+            with self._lock:
+                pending.pop(request_id, None)
+                if self._proc is proc:
+                    self._discard(proc)
+            raise TimeoutError(f"DB runner did not answer within {timeout}s") from exc
+
+    async def request_async(
+        self, payload: dict[str, Any], *, timeout: float | None = _DEFAULT_TIMEOUT
+    ) -> dict[str, Any]:
+        """Send one request and await its response without blocking the event loop.
+
+        Unlike `request`, a timeout only abandons this caller's wait: the runner
+        answers one request at a time, so a short per-call timeout can expire
+        while the request is still queued behind others, and that must not kill
+        the process under every other caller. The late response is dropped.
+        """
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        _, pending, request_id, future = self._submit(payload)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except BaseException:
+            # Timed out or cancelled: nobody is waiting for the response any more
+            with self._lock:
+                pending.pop(request_id, None)
+            raise
+
+    def close(self) -> None:
+        """Stop the runner process; it is restarted on the next request."""
+        with self._lock:
+            proc = self._proc
+            self._proc = None
+            # The writer closes stdin once everything queued before this is sent
+            self._outbox.put(None)
+        if proc is None:
+            return
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    def _submit(
+        self, payload: dict[str, Any]
+    ) -> tuple[subprocess.Popen[bytes], dict[int, Future[dict[str, Any]]], int, Future[dict[str, Any]]]:
+        """Queue one request for the writer thread; the returned future resolves with its response."""
+        future: Future[dict[str, Any]] = Future()
+        with self._lock:
+            proc = self._ensure_started()
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            self._outbox.put(self._encode({**payload, "id": request_id}))
+            return proc, self._pending, request_id, future
+
+    def _ensure_started(self) -> subprocess.Popen[bytes]:
+        if self._proc is not None and self._proc.poll() is None:
+            return self._proc
+        if self._spawned:
+            self.restarts += 1
+        self._spawned = True
+        proc = subprocess.Popen(
+            [self.node, str(self.script), "--serve", "--protocol", self.protocol, *self.args],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # Each process owns its pending map and outbox so a crash only fails its own requests
+        self._proc = proc
+        self._pending = {}
+        self._outbox = queue.SimpleQueue()
+        threading.Thread(target=self._write_requests, args=(proc, self._outbox), daemon=True).start()
+        threading.Thread(
+            target=self._read_responses, args=(proc, self._pending, self._outbox), daemon=True
+        ).start()
+        threading.Thread(target=self._read_stderr, args=(proc.stderr,), daemon=True).start()
+        return proc
+
+    def _discard(self, proc: subprocess.Popen[bytes]) -> None:
+        """Kill a misbehaving process; caller must hold the lock."""
+        if self._proc is proc:
+            self._proc = None
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+    def _write_requests(self, proc: subprocess.Popen[bytes], outbox: queue.SimpleQueue[bytes | None]) -> None:
+        """Feed queued requests to the process until a None arrives (then close its stdin)."""
+        assert proc.stdin is not None
+        try:
+            while (line := outbox.get()) is not None:
+                proc.stdin.write(line)
+                if outbox.empty():
+                    # Requests queued while writing go out in one flush
+                    proc.stdin.flush()
+            proc.stdin.close()
+        except (BrokenPipeError, OSError, ValueError) as exc:
+            # The reader sees EOF next and fails everything still pending
+            self._stderr_tail.append(f"DB runner is not accepting requests: {exc}")
+            with self._lock:
+                self._discard(proc)
+
+    def _read_responses(
+        self,
+        proc: subprocess.Popen[bytes],
+        pending: dict[int, Future[dict[str, Any]]],
+        outbox: queue.SimpleQueue[bytes | None],
+    ) -> None:
+        assert proc.stdout is not None
+        for request_id, response in self._decode(proc.stdout):
+            with self._lock:
+                future = pending.pop(request_id, None)
+            if future is not None:
+                _resolve(future, response)
+
+        # EOF: the process exited, fail whatever was still waiting on it
+        returncode = proc.wait()
+        outbox.put(None)
+        with self._lock:
+            if self._proc is proc:
+                self._proc = None
+            orphaned = list(pending.values())
+            pending.clear()
+        if orphaned:
+            error = RuntimeError(
+                f"DB runner exited (code {returncode})\nSTDERR:\n" + "\n".join(self._stderr_tail)
+            )
+            for future in orphaned:
+                _resolve(future, error)
+
+    def _encode(self, payload: dict[str, Any]) -> bytes:
+        if self.protocol == "binary":
+            return wire.encode_request(payload)
+        return json.dumps(payload).encode("utf-8") + b"\n"
+
+    def _decode(self, stdout: IO[bytes]) -> Iterator[tuple[int | None, dict[str, Any]]]:
+        """Yield (request id, response) for each response until EOF."""
+        if self.protocol == "binary":
+            while (frame := wire.read_frame(stdout)) is not None:
+                try:
+                    yield wire.decode_response(frame)
+                except (ValueError, struct.error) as exc:
+                    self._stderr_tail.append(f"invalid runner output: {exc}")
+            return
+        for raw in stdout:
+            try:
+                response = json.loads(raw.decode("utf-8"))
+            except json.JSONDecodeError:
+                self._stderr_tail.append(f"invalid runner output: {raw!r}")
+                continue
+            yield response.pop("id", None), response
+
+    def _read_stderr(self, stream: IO[bytes] | None) -> None:
+        if stream is None:
+            return
+        for raw in stream:
+            self._stderr_tail.append(raw.decode("utf-8", errors="replace").rstrip())
+
+
+def _resolve(future: Future[dict[str, Any]], outcome: dict[str, Any] | BaseException) -> None:
+    """Complete a future unless its (async) waiter already gave up on it."""
+    try:
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+    except InvalidStateError:
+        pass
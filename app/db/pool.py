@@ -0,0 +1,57 @@
+"""Bounded pool of reusable DB-API connections for the in-process backends."""
+
+from __future__ import annotations
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class ConnectionPool:
+    """Hands out at most `max_size` open connections, reusing idle ones first.
+
+    Callers block (up to `timeout` seconds) while every connection is in use.
+    """
+
+    def __init__(self, connect: Callable[[], Any], max_size: int = 4, timeout: float = 30.0) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        # LIFO keeps the most recently used (warmest) connection in circulation
+        self._idle: queue.LifoQueue[Any] = queue.LifoQueue()
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self._timeout):
+            raise TimeoutError(f"No pooled DB connection available within {self._timeout}s")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                if getattr(conn, "in_transaction", False):
+                    conn.rollback()
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close idle connections; connections in use are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -1,2 +1,21 @@
-INSERT INTO Clips (Content, FromAppName)
-VALUES (:content, :from_app_name);
+-- Re-copying existing content moves that clip to the newest ID and refreshes its
+-- timestamp/app; move_clip_references_on_id_change carries its tags and favorite over.
+-- Large contents are stored compressed (see tables/clips.sql); Item is materialized so
+-- compress_content runs once. Returns the clip's ID (the new one for a re-copy).
+WITH Item AS MATERIALIZED (
+	SELECT :content AS Text, compress_content(:content) AS Packed
+)
+INSERT INTO Clips (Content, ContentZ, ContentLength, ContentHash, FromAppName)
+SELECT
+	CASE WHEN Packed IS NULL THEN Text ELSE substr(Text, 1, 256) END,
+	Packed,
+	CASE WHEN Packed IS NULL THEN NULL ELSE length(Text) END,
+	content_hash(Text),
+	:from_app_name
+FROM Item
+WHERE true
+ON CONFLICT (ContentHash) DO UPDATE SET
+	ID = (SELECT MAX(ID) + 1 FROM Clips),
+	FromAppName = excluded.FromAppName,
+	Timestamp = excluded.Timestamp
+RETURNING ID;
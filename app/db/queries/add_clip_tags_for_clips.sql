@@ -0,0 +1,7 @@
+-- Bulk add_clip_tag.sql: tags each clip in :clip_tags ([content hash, tag name] pairs).
+-- Assumes the tags exist (see add_tags_for_clips.sql).
+INSERT OR IGNORE INTO ClipTags (ClipID, TagID)
+SELECT Clips.ID, Tags.ID
+FROM json_each(:clip_tags) AS Pairs
+CROSS JOIN Clips ON Clips.ContentHash = json_extract(Pairs.value, '$[0]')
+CROSS JOIN Tags ON Tags.Name = json_extract(Pairs.value, '$[1]');
@@ -1,2 +1,19 @@
-INSERT INTO Clips (Content, FromAppName, Timestamp)
-VALUES (:content, :from_app_name, :timestamp);
+-- Upserts like add_clip.sql, keeping the caller-supplied timestamp. Returns the clip's ID.
+WITH Item AS MATERIALIZED (
+	SELECT :content AS Text, compress_content(:content) AS Packed
+)
+INSERT INTO Clips (Content, ContentZ, ContentLength, ContentHash, FromAppName, Timestamp)
+SELECT
+	CASE WHEN Packed IS NULL THEN Text ELSE substr(Text, 1, 256) END,
+	Packed,
+	CASE WHEN Packed IS NULL THEN NULL ELSE length(Text) END,
+	content_hash(Text),
+	:from_app_name,
+	:timestamp
+FROM Item
+WHERE true
+ON CONFLICT (ContentHash) DO UPDATE SET
+	ID = (SELECT MAX(ID) + 1 FROM Clips),
+	FromAppName = excluded.FromAppName,
+	Timestamp = excluded.Timestamp
+RETURNING ID;
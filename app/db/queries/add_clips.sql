@@ -0,0 +1,29 @@
+-- Bulk add_clip_with_timestamp.sql: upserts every item of the :clips JSON array, in order.
+-- Items are {"content", "from_app_name", "timestamp"}; `WHERE true` lets SQLite parse the
+-- upsert clause after a SELECT. The MAX(ID) subquery is correlated with the updated row so it
+-- is re-evaluated for every re-copied item, not computed once for the whole statement.
+-- Items is materialized so compress_content runs once per item (see tables/clips.sql).
+WITH Items AS MATERIALIZED (
+	SELECT
+		Items.key AS Position,
+		json_extract(Items.value, '$.content') AS Text,
+		compress_content(json_extract(Items.value, '$.content')) AS Packed,
+		json_extract(Items.value, '$.from_app_name') AS FromAppName,
+		json_extract(Items.value, '$.timestamp') AS Timestamp
+	FROM json_each(:clips) AS Items
+)
+INSERT INTO Clips (Content, ContentZ, ContentLength, ContentHash, FromAppName, Timestamp)
+SELECT
+	CASE WHEN Packed IS NULL THEN Text ELSE substr(Text, 1, 256) END,
+	Packed,
+	CASE WHEN Packed IS NULL THEN NULL ELSE length(Text) END,
+	content_hash(Text),
+	FromAppName,
+	Timestamp
+FROM Items
+WHERE true
+ORDER BY Position
+ON CONFLICT (ContentHash) DO UPDATE SET
+	ID = (SELECT MAX(Newest.ID) + 1 FROM Clips AS Newest WHERE Newest.ID >= Clips.ID),
+	FromAppName = excluded.FromAppName,
+	Timestamp = excluded.Timestamp;
@@ -0,0 +1,3 @@
+-- Bulk add_favorite.sql for the clips stored under :hashes (JSON array of content hashes).
+INSERT OR IGNORE INTO FavoriteClips (ClipID)
+SELECT ID FROM Clips WHERE ContentHash IN (SELECT value FROM json_each(:hashes));
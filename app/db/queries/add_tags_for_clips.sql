@@ -0,0 +1,3 @@
+-- Bulk add_tag_if_not_exists.sql for the tag names in :clip_tags ([content hash, tag name] pairs).
+INSERT OR IGNORE INTO Tags (Name)
+SELECT DISTINCT json_extract(Pairs.value, '$[1]') FROM json_each(:clip_tags) AS Pairs;
@@ -0,0 +1,26 @@
+-- Lists every counter that disagrees with the rows it counts: (Name, Stored, Actual).
+-- Per-tag counters are named 'tag:<TagID>'. Full scans; meant for maintenance, not hot paths.
+SELECT Name, Stored, Actual FROM (
+	SELECT 'clips' AS Name,
+		(SELECT Value FROM Counters WHERE Name = 'clips') AS Stored,
+		(SELECT COUNT(*) FROM Clips) AS Actual
+	UNION ALL
+	SELECT 'favorites',
+		(SELECT Value FROM Counters WHERE Name = 'favorites'),
+		(SELECT COUNT(*) FROM FavoriteClips)
+	UNION ALL
+	SELECT 'content_bytes',
+		(SELECT Value FROM Counters WHERE Name = 'content_bytes'),
+		(SELECT COALESCE(SUM(length(CAST(Content AS BLOB)) + coalesce(length(ContentZ), 0)), 0) FROM Clips)
+	UNION ALL
+	SELECT 'tag:' || TagCounters.TagID, TagCounters.NumClips, COALESCE(Actual.NumClips, 0)
+	FROM TagCounters
+	LEFT JOIN (SELECT TagID, COUNT(*) AS NumClips FROM ClipTags GROUP BY TagID) AS Actual
+		ON Actual.TagID = TagCounters.TagID
+	UNION ALL
+	SELECT 'tag:' || TagID, 0, COUNT(*)
+	FROM ClipTags
+	WHERE TagID NOT IN (SELECT TagID FROM TagCounters)
+	GROUP BY TagID
+)
+WHERE Stored IS NOT Actual;
@@ -0,0 +1,5 @@
+-- Deletes the tags of a clip that no other clip uses. Run before the clip's ClipTags rows are removed.
+-- Parameters: :clip_id
+DELETE FROM Tags
+WHERE ID IN (SELECT TagID FROM ClipTags WHERE ClipID = :clip_id)
+	AND NOT EXISTS (SELECT 1 FROM ClipTags WHERE TagID = Tags.ID AND ClipID <> :clip_id);
@@ -0,0 +1,14 @@
+-- Retention: deletes up to :batch_size of the clips older than the datetime() modifier :max_age
+-- (e.g. '-30 days'), oldest first through idx_clips_timestamp. Favorite and tagged clips are
+-- exempt, as in evict_clips_over_count.sql. Returns the deleted IDs.
+-- Parameters: :max_age, :batch_size
+DELETE FROM Clips
+WHERE ID IN (
+	SELECT ID FROM Clips
+	WHERE Timestamp < datetime('now', :max_age)
+		AND NOT EXISTS (SELECT 1 FROM FavoriteClips WHERE ClipID = Clips.ID)
+		AND NOT EXISTS (SELECT 1 FROM ClipTags WHERE ClipID = Clips.ID)
+	ORDER BY Timestamp
+	LIMIT :batch_size
+)
+RETURNING ID;
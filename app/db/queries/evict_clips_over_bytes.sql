@@ -0,0 +1,22 @@
+-- Retention: deletes the oldest clips, at most :batch_size, until the total stored content size
+-- ('content_bytes' counter; compressed clips count their compressed size) is at most :max_bytes.
+-- A running sum over the oldest candidates keeps just enough of them. Favorite and tagged
+-- clips are exempt, as in evict_clips_over_count.sql. Returns the deleted IDs.
+-- Parameters: :max_bytes, :batch_size
+WITH Candidates AS (
+	SELECT ID, length(CAST(Content AS BLOB)) + coalesce(length(ContentZ), 0) AS Bytes
+	FROM Clips
+	WHERE NOT EXISTS (SELECT 1 FROM FavoriteClips WHERE ClipID = Clips.ID)
+		AND NOT EXISTS (SELECT 1 FROM ClipTags WHERE ClipID = Clips.ID)
+	ORDER BY ID
+	LIMIT :batch_size
+),
+BytesBefore AS (
+	SELECT ID, SUM(Bytes) OVER (ORDER BY ID) - Bytes AS Freed FROM Candidates
+)
+DELETE FROM Clips
+WHERE ID IN (
+	SELECT ID FROM BytesBefore
+	WHERE Freed < (SELECT Value FROM Counters WHERE Name = 'content_bytes') - :max_bytes
+)
+RETURNING ID;
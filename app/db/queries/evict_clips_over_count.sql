@@ -0,0 +1,13 @@
+-- Retention: deletes up to :batch_size of the oldest clips while there are more than :max_clips.
+-- Favorite and tagged clips are exempt (and still count), so evicted clips have no FavoriteClips,
+-- ClipTags or Tags rows to clean up. Returns the deleted IDs; none once under the limit.
+-- Parameters: :max_clips, :batch_size
+DELETE FROM Clips
+WHERE ID IN (
+	SELECT ID FROM Clips
+	WHERE NOT EXISTS (SELECT 1 FROM FavoriteClips WHERE ClipID = Clips.ID)
+		AND NOT EXISTS (SELECT 1 FROM ClipTags WHERE ClipID = Clips.ID)
+	ORDER BY ID
+	LIMIT min(:batch_size, max(0, (SELECT Value FROM Counters WHERE Name = 'clips') - :max_clips))
+)
+RETURNING ID;
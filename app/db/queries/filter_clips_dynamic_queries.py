@@ -1,213 +1,305 @@
 import re
+from functools import lru_cache
+from typing import Literal, NamedTuple
+
+from app.core.constants import CONTENT_HEAD_CHARS
 from app.models.clipboard.filters import Filters
 
+# What a filter query returns and how it pages
+QueryMode = Literal["all", "n", "after_id", "before_id", "page", "count"]
+
+# Distinct filter shapes whose SQL text is kept (one prepared plan each in the runner)
+_MAX_CACHED_SHAPES = 256
+
+# Clips.Timestamp as returned to clients: stored "YYYY-MM-DD HH:MM:SS" (UTC) becomes
+# "YYYY-MM-DDTHH:MM:SSZ"; same expression as in the static clip queries
+UTC_TIMESTAMP_SQL = (
+    "CASE WHEN Clips.Timestamp GLOB '*Z' OR NOT Clips.Timestamp GLOB '*[ T]*' THEN Clips.Timestamp "
+    "ELSE replace(Clips.Timestamp, ' ', 'T') || 'Z' END"
+)
+
+# The full text of a clip: large contents are stored compressed, with only their head in
+# Clips.Content (see tables/clips.sql); same expression as in the static clip queries
+CONTENT_SQL = "CASE WHEN Clips.ContentZ IS NULL THEN Clips.Content ELSE decompress_content(Clips.ContentZ) END"
+
+# Preview reads: the head every clip keeps in Clips.Content (ContentZ is never read), and the full length
+PREVIEW_CONTENT_SQL = f"substr(Clips.Content, 1, {CONTENT_HEAD_CHARS})"
+CONTENT_LENGTH_SQL = "coalesce(Clips.ContentLength, length(Clips.Content))"
+
+# A search keyword found in the plain text or head needs no decompression; each takes its pattern twice
+CONTENT_LIKE_SQL = "(Clips.Content LIKE ? OR (Clips.ContentZ IS NOT NULL AND decompress_content(Clips.ContentZ) LIKE ?))"
+
+# SQLite datetime() modifiers for each time frame, bound as parameters
+TIME_FRAME_MODIFIERS: dict[str, str] = {
+    'past_24_hours': '-1 day',
+    'past_week': '-7 days',
+    'past_month': '-1 month',
+    'past_3_months': '-3 months',
+    'past_year': '-1 year',
+}
+
+_KEYWORD_DELIMITERS = re.compile('|'.join(re.escape(d) for d in [',', ';', '|', ' ', '\n', '\t']))
+
+# unicode61 keeps letters and digits as token characters; everything else,
+# underscore included, separates tokens.
+_TOKEN_CHARS = r"[^\W_]"
+_HAS_TOKEN_CHAR = re.compile(_TOKEN_CHARS)
+_SINGLE_TOKEN = re.compile(_TOKEN_CHARS + "+")
+
+
+class FilterShape(NamedTuple):
+    """Everything the SQL text of a filter query depends on. Values are always bound."""
+
+    mode: QueryMode
+    search_table: str | None  # "ClipsFts"/"ClipsTrigram" when an index narrows the search
+    num_like_keywords: int
+    num_tags: int
+    num_apps: int
+    favorites_only: bool
+    time_frame: bool
+    by_relevance: bool
+    before_id: bool  # page mode: whether the page starts below a cursor
+    preview: bool  # content head plus a ContentLength column instead of the full content
+
+
 # Queries
-def filter_all_clips_query(filters: Filters) -> tuple[str, list]:
+def filter_all_clips_query(filters: Filters, *, preview: bool = False) -> tuple[str, list]:
     """Construct a SQL query to filter all clips based on keywords and time frame."""
 
-    keyword_clauses, keyword_params = build_keywords_where_clause(filters.search)
-    tag_clauses, tag_params = build_tags_where_clause(filters.selected_tags)
-    app_clauses, app_params = build_apps_where_clause(filters.selected_apps)
-    join_favorites: str = construct_favorites_join_clause(filters.favorites_only)
-    time_condition: str = construct_time_condition(filters.time_frame)
+    return build_filter_query(filters, "all", preview=preview)
 
-    # Always LEFT JOIN FavoriteClips to compute IsFavorite; if favorites_only we already switched join_favorites to INNER JOIN
-    favorites_join = join_favorites or "LEFT JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID"
-    sql_query: str = f"""
-    SELECT
-        Clips.ID AS ClipID,
-        Clips.Content AS Content,
-        Clips.FromAppName AS FromAppName,
-        GROUP_CONCAT(Tags.Name, ',') AS Tags,
-        Clips.Timestamp AS Timestamp,
-        CASE WHEN FavoriteClips.ClipID IS NOT NULL THEN 1 ELSE 0 END AS IsFavorite
-    FROM Clips
-    {favorites_join}
-    LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID
-    LEFT JOIN Tags ON ClipTags.TagID = Tags.ID
-    WHERE ({keyword_clauses}) AND ({tag_clauses}) AND ({app_clauses}) AND ({time_condition})
-    GROUP BY Clips.ID, Clips.Content, Clips.FromAppName, Clips.Timestamp
-    ORDER BY Clips.ID DESC;
-    """
+def filter_n_clips_query(filters: Filters, *, n: int | None = None, preview: bool = False) -> tuple[str, list]:
+    """Construct a SQL query to filter a specific number of clips based on keywords and time frame."""
 
-    return sql_query, keyword_params + tag_params + app_params
+    return build_filter_query(filters, "n", n=n, preview=preview)
 
-def filter_n_clips_query(filters: Filters, *, n: int | None = None) -> tuple[str, list]:
-    """Construct a SQL query to filter a specific number of clips based on keywords and time frame."""
+def filter_all_clips_after_id_query(filters: Filters, *, after_id: int, preview: bool = False) -> tuple[str, list]:
+    """Construct a SQL query to filter clips based on keywords and time frame, starting after a specific ID."""
 
-    keyword_clauses, keyword_params = build_keywords_where_clause(filters.search)
-    tag_clauses, tag_params = build_tags_where_clause(filters.selected_tags)
-    app_clauses, app_params = build_apps_where_clause(filters.selected_apps)
-    join_favorites: str = construct_favorites_join_clause(filters.favorites_only)
-    time_condition: str = construct_time_condition(filters.time_frame)
+    return build_filter_query(filters, "after_id", after_id=after_id, preview=preview)
 
-    favorites_join = join_favorites or "LEFT JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID"
-    sql_query: str = f"""
-    SELECT
-        Clips.ID AS ClipID,
-        Clips.Content AS Content,
-        Clips.FromAppName AS FromAppName,
-        GROUP_CONCAT(Tags.Name, ',') AS Tags,
-        Clips.Timestamp AS Timestamp,
-        CASE WHEN FavoriteClips.ClipID IS NOT NULL THEN 1 ELSE 0 END AS IsFavorite
-    FROM Clips
-    {favorites_join}
-    LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID
-    LEFT JOIN Tags ON ClipTags.TagID = Tags.ID
-    WHERE ({keyword_clauses}) AND ({tag_clauses}) AND ({app_clauses}) AND ({time_condition})
-    GROUP BY Clips.ID, Clips.Content, Clips.FromAppName, Clips.Timestamp
-    ORDER BY Clips.ID DESC
-    LIMIT COALESCE({n}, 999999);
+def filter_n_clips_before_id_query(
+    filters: Filters, *, n: int | None = None, before_id: int, preview: bool = False
+) -> tuple[str, list]:
+    """Construct a SQL query to filter a specific number of clips based on keywords and time frame, starting before a specific ID."""
+
+    return build_filter_query(filters, "before_id", n=n, before_id=before_id, preview=preview)
+
+def filter_clips_page_query(
+    filters: Filters, *, before_id: int | None, limit: int, preview: bool = False
+) -> tuple[str, list]:
+    """Construct a SQL query for one keyset page: up to `limit` filtered clips with ID below `before_id`.
+
+    The page starts with a seek on the rowid, so its cost does not depend on how
+    many pages came before it.
     """
 
-    return sql_query, keyword_params + tag_params + app_params
+    return build_filter_query(filters, "page", before_id=before_id, limit=limit, preview=preview)
 
-def filter_all_clips_after_id_query(filters: Filters, *, after_id: int) -> tuple[str, list]:
-    """Construct a SQL query to filter clips based on keywords and time frame, starting after a specific ID."""
+def get_num_filtered_clips_query(filters: Filters) -> tuple[str, list]:
+    """Construct a SQL query to count the number of filtered clips based on keywords and time frame."""
 
-    keyword_clauses, keyword_params = build_keywords_where_clause(filters.search)
-    tag_clauses, tag_params = build_tags_where_clause(filters.selected_tags)
-    app_clauses, app_params = build_apps_where_clause(filters.selected_apps)
-    join_favorites: str = construct_favorites_join_clause(filters.favorites_only)
-    time_condition: str = construct_time_condition(filters.time_frame)
+    return build_filter_query(filters, "count")
+
+def build_filter_query(
+    filters: Filters,
+    mode: QueryMode,
+    *,
+    n: int | None = None,
+    after_id: int | None = None,
+    before_id: int | None = None,
+    limit: int | None = None,
+    preview: bool = False,
+) -> tuple[str, list]:
+    """Build any filter query: SQL text memoized on the filters' shape, plus its parameters.
+
+    Requests that differ only in their values (search words, tag names, page
+    bounds) produce the same SQL text, so the runner reuses one prepared
+    statement for them. A `preview` query returns each clip's first
+    CONTENT_HEAD_CHARS characters and, as a seventh column, its full length.
+    """
 
-    favorites_join = join_favorites or "LEFT JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID"
-    sql_query: str = f"""
-    SELECT
-        Clips.ID AS ClipID,
-        Clips.Content AS Content,
-        Clips.FromAppName AS FromAppName,
-        GROUP_CONCAT(Tags.Name, ',') AS Tags,
-        Clips.Timestamp AS Timestamp,
-        CASE WHEN FavoriteClips.ClipID IS NOT NULL THEN 1 ELSE 0 END AS IsFavorite
+    keywords = split_keywords(filters.search)
+    search_table, match_query = build_search_match(keywords, word=filters.word_search)
+    like_keywords = [kw for kw in keywords if not filters.word_search or not _is_single_token(kw)]
+    time_modifier = TIME_FRAME_MODIFIERS.get(filters.time_frame)
+
+    shape = FilterShape(
+        mode=mode,
+        search_table=search_table,
+        num_like_keywords=len(like_keywords),
+        num_tags=len(filters.selected_tags),
+        num_apps=len(filters.selected_apps),
+        favorites_only=filters.favorites_only,
+        time_frame=time_modifier is not None,
+        by_relevance=filters.sort_by_relevance and search_table is not None and mode in ("all", "n"),
+        before_id=mode == "before_id" or (mode == "page" and before_id is not None),
+        preview=preview and mode != "count",
+    )
+
+    # In the order their placeholders appear in filter_query_sql
+    params: list = [match_query] if search_table else []
+    params += [pattern for keyword in like_keywords for pattern in (f"%{keyword}%",) * 2]
+    params += [f"%{tag}%" for tag in filters.selected_tags]
+    params += filters.selected_apps
+    if time_modifier is not None:
+        params += [time_modifier, time_modifier]
+    if mode == "after_id":
+        params.append(after_id)
+    if shape.before_id:
+        params.append(before_id)
+    if mode in ("n", "before_id"):
+        params.append(n)
+    elif mode == "page":
+        params.append(limit)
+
+    return filter_query_sql(shape), params
+
+@lru_cache(maxsize=_MAX_CACHED_SHAPES)
+def filter_query_sql(shape: FilterShape) -> str:
+    """Render the SQL text for one filter shape (see build_filter_query for the parameters)."""
+
+    joins = []
+    if shape.search_table:
+        # `LIMIT -1` keeps SQLite from flattening the subquery into the outer GROUP BY,
+        # where bm25() cannot be evaluated
+        table = shape.search_table
+        joins.append(
+            f"INNER JOIN (SELECT rowid AS ClipID, bm25({table}) AS Rank FROM {table} WHERE {table} MATCH ? LIMIT -1) "
+            "AS Matches ON Matches.ClipID = Clips.ID"
+        )
+    if shape.favorites_only:
+        joins.append("INNER JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID")
+    elif shape.mode != "count":
+        # Always LEFT JOIN FavoriteClips to compute IsFavorite
+        joins.append("LEFT JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID")
+    if shape.mode != "count" or shape.num_tags:
+        joins.append("LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID")
+        joins.append("LEFT JOIN Tags ON ClipTags.TagID = Tags.ID")
+
+    conditions = [CONTENT_LIKE_SQL] * shape.num_like_keywords
+    if shape.num_tags:
+        conditions.append("(" + " OR ".join(["Name LIKE ?"] * shape.num_tags) + ")")
+    if shape.num_apps:
+        conditions.append("(" + " OR ".join(["FromAppName = ?"] * shape.num_apps) + ")")
+    if shape.time_frame:
+        conditions.append(construct_time_condition())
+    if shape.mode == "after_id":
+        conditions.append("Clips.ID > ?")
+    if shape.before_id:
+        conditions.append("Clips.ID < ?")
+
+    join_clause = "\n    ".join(joins)
+    where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+    if shape.mode == "count":
+        return f"""
+    SELECT COUNT(DISTINCT Clips.ID)
     FROM Clips
-    {favorites_join}
-    LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID
-    LEFT JOIN Tags ON ClipTags.TagID = Tags.ID
-    WHERE ({keyword_clauses}) AND ({tag_clauses}) AND ({app_clauses}) AND ({time_condition}) AND Clips.ID > ?
-    GROUP BY Clips.ID, Clips.Content, Clips.FromAppName, Clips.Timestamp
-    ORDER BY Clips.ID DESC;
+    {join_clause}
+    {where_clause}
     """
 
-    return sql_query, [*keyword_params, *tag_params, *app_params, after_id]
-
-def filter_n_clips_before_id_query(filters: Filters, *, n: int | None = None, before_id: int) -> tuple[str, list]:
-    """Construct a SQL query to filter a specific number of clips based on keywords and time frame, starting before a specific ID."""
-
-    keyword_clauses, keyword_params = build_keywords_where_clause(filters.search)
-    tag_clauses, tag_params = build_tags_where_clause(filters.selected_tags)
-    app_clauses, app_params = build_apps_where_clause(filters.selected_apps)
-    join_favorites: str = construct_favorites_join_clause(filters.favorites_only)
-    time_condition: str = construct_time_condition(filters.time_frame)
+    # Newest first, or best BM25 match first (lower is better) when relevance sorting is requested
+    order_by = "MIN(Matches.Rank), Clips.ID DESC" if shape.by_relevance else "Clips.ID DESC"
+    match shape.mode:
+        case "n" | "before_id":
+            limit_clause = "LIMIT COALESCE(?, 999999)"
+        case "page":
+            limit_clause = "LIMIT ?"
+        case _:
+            limit_clause = ""
 
-    favorites_join = join_favorites or "LEFT JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID"
-    sql_query: str = f"""
+    content = PREVIEW_CONTENT_SQL if shape.preview else CONTENT_SQL
+    content_length = f",\n        {CONTENT_LENGTH_SQL} AS ContentLength" if shape.preview else ""
+    return f"""
     SELECT
         Clips.ID AS ClipID,
-        Clips.Content AS Content,
+        {content} AS Content,
         Clips.FromAppName AS FromAppName,
         GROUP_CONCAT(Tags.Name, ',') AS Tags,
-        Clips.Timestamp AS Timestamp,
-        CASE WHEN FavoriteClips.ClipID IS NOT NULL THEN 1 ELSE 0 END AS IsFavorite
+        {UTC_TIMESTAMP_SQL} AS Timestamp,
+        CASE WHEN FavoriteClips.ClipID IS NOT NULL THEN 1 ELSE 0 END AS IsFavorite{content_length}
     FROM Clips
-    {favorites_join}
-    LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID
-    LEFT JOIN Tags ON ClipTags.TagID = Tags.ID
-    WHERE ({keyword_clauses}) AND ({tag_clauses}) AND ({app_clauses}) AND ({time_condition}) AND Clips.ID < ?
-    GROUP BY Clips.ID, Clips.Content, Clips.FromAppName, Clips.Timestamp
-    ORDER BY Clips.ID DESC
-    LIMIT COALESCE(?, 999999);
+    {join_clause}
+    {where_clause}
+    GROUP BY Clips.ID
+    ORDER BY {order_by}
+    {limit_clause};
     """
 
-    return sql_query, [*keyword_params, *tag_params, *app_params, before_id, n]
+# Query utilities
+def split_keywords(search: str) -> list[str]:
+    """Split the search string into individual keywords."""
 
-def get_num_filtered_clips_query(filters: Filters) -> tuple[str, list]:
-    """Construct a SQL query to count the number of filtered clips based on keywords and time frame."""
+    return [kw for kw in _KEYWORD_DELIMITERS.split(search.strip()) if kw]
 
-    keyword_clauses, keyword_params = build_keywords_where_clause(filters.search)
-    tag_clauses, tag_params = build_tags_where_clause(filters.selected_tags)
-    app_clauses, app_params = build_apps_where_clause(filters.selected_apps)
-    join_favorites: str = construct_favorites_join_clause(filters.favorites_only)
-    time_condition: str = construct_time_condition(filters.time_frame)
+def _is_indexable(keyword: str) -> bool:
+    """Keywords without any letter/digit produce no FTS token (e.g. '->', '__')."""
 
-    sql_query: str = f"""
-    SELECT COUNT(DISTINCT Clips.ID)
-    FROM Clips
-    {join_favorites}
-    LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID
-    LEFT JOIN Tags ON ClipTags.TagID = Tags.ID
-    WHERE ({keyword_clauses}) AND ({tag_clauses}) AND ({app_clauses}) AND ({time_condition})
-    """
+    return _HAS_TOKEN_CHAR.search(keyword) is not None
 
-    return sql_query, [*keyword_params, *tag_params, *app_params]
+def _is_single_token(keyword: str) -> bool:
+    """Keywords the FTS prefix phrase matches exactly: letters/digits only.
 
-# Query utilities
-def build_keywords_where_clause(search: str) -> tuple[str, list]:
-    """Build the WHERE clause for the keyword search using parameterized queries."""
-
-    # Split the search string into individual keywords
-    delimiters: list[str] = [',', ';', '|', ' ', '\n', '\t']
-    regex: str = '|'.join(re.escape(d) for d in delimiters)
-    split_keywords: list[str] = [kw for kw in re.split(regex, search.strip()) if kw]
-
-    # Construct the keyword clauses and parameters
-    keyword_clauses_list = []
-    params = []
-    for keyword in split_keywords:
-        keyword_clauses_list.append("Content LIKE ?")
-        params.append(f"%{keyword}%")
-
-    if keyword_clauses_list:
-        keyword_clauses = " AND ".join(keyword_clauses_list)
-    else:
-        keyword_clauses = "1=1"  # No search keywords, match all
+    Anything else ('c++', 'foo.bar', 'x-y') loses its separators in the index,
+    so the phrase only narrows the candidates and LIKE has the final word.
+    """
 
-    return keyword_clauses, params
+    return _SINGLE_TOKEN.fullmatch(keyword) is not None
 
-def build_tags_where_clause(selected_tags: list[str]) -> tuple[str, list]:
-    """Build the WHERE clause for the tag search using parameterized queries."""
+def build_fts_match_query(keywords: list[str]) -> str:
+    """Build the FTS5 MATCH expression: every keyword as a quoted prefix phrase.
 
-    # Construct the keyword clauses and parameters
-    tag_clauses_list = []
-    params = []
-    for tag in selected_tags:
-        tag_clauses_list.append("Name LIKE ?")
-        params.append(f"%{tag}%")
+    Phrases separated by spaces are implicitly ANDed, so all keywords must match.
+    """
 
-    if tag_clauses_list:
-        tag_clauses = " OR ".join(tag_clauses_list)
-    else:
-        tag_clauses = "1=1"  # No selected tags, match all
+    phrases = []
+    for keyword in keywords:
+        if _is_indexable(keyword):
+            phrases.append('"' + keyword.replace('"', '""') + '"*')
+    return " ".join(phrases)
 
-    return tag_clauses, params
+def build_trigram_match_query(keywords: list[str]) -> str:
+    """Build the ClipsTrigram MATCH expression: every keyword as a quoted substring.
 
+    Only keywords the trigram index can answer take part: at least three
+    characters and no LIKE wildcards. The result is a superset of the LIKE
+    matches (trigrams fold case for all of Unicode, LIKE only for ASCII).
+    """
 
-def build_apps_where_clause(selected_apps: list[str]) -> tuple[str, list]:
-    """Build the WHERE clause for filtering by source application (FromAppName)."""
-    if not selected_apps:
-        return "1=1", []
-    clauses = ["FromAppName = ?" for _ in selected_apps]
-    return " OR ".join(clauses), selected_apps
+    phrases = []
+    for keyword in keywords:
+        if len(keyword) >= 3 and not any(c in keyword for c in "%_"):
+            phrases.append('"' + keyword.replace('"', '""') + '"')
+    return " ".join(phrases)
 
+def build_search_match(keywords: list[str], *, word: bool = False) -> tuple[str | None, str]:
+    """Pick the index that narrows the search and its MATCH expression.
 
-def construct_favorites_join_clause(favoritesOnly: bool) -> str:
-    """Construct the JOIN clause for favorite clips."""
+    Substring search (the default) narrows candidates through ClipsTrigram and
+    leaves the exact check to `Content LIKE`; word search probes ClipsFts and
+    only needs LIKE for keywords that contain punctuation/symbols, which the
+    full-text index does not store. Returns (None, "") when no keyword can
+    use the index.
+    """
 
-    return "INNER JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID" if favoritesOnly else ""
+    if word:
+        table, match_query = "ClipsFts", build_fts_match_query(keywords)
+    else:
+        table, match_query = "ClipsTrigram", build_trigram_match_query(keywords)
+    return (table, match_query) if match_query else (None, "")
 
-def construct_time_condition(time_frame: str) -> str:
-    """Construct the time condition based on the selected time frame."""
+def construct_time_condition() -> str:
+    """Construct the time condition; both placeholders take the time frame's datetime() modifier.
 
-    match time_frame:
-        case 'past_24_hours':
-            return "Timestamp >= datetime('now', '-1 day')"
-        case 'past_week':
-            return "Timestamp >= datetime('now', '-7 days')"
-        case 'past_month':
-            return "Timestamp >= datetime('now', '-1 month')"
-        case 'past_3_months':
-            return "Timestamp >= datetime('now', '-3 months')"
-        case 'past_year':
-            return "Timestamp >= datetime('now', '-1 year')"
-        case _:
-            return "Timestamp >= '1970-01-01 00:00:00'"
+    Besides the Timestamp check, the oldest matching ID (found on idx_clips_timestamp)
+    bounds Clips.ID from below, so the newest-first queries seek by rowid instead of
+    walking the whole table when few clips fall inside the time frame. `+ID` stops
+    SQLite from answering MIN(ID) by walking the rowid order instead of that index.
+    """
+
+    return (
+        "Clips.ID >= (SELECT MIN(+ID) FROM Clips WHERE Timestamp >= datetime('now', ?)) "
+        "AND Clips.Timestamp >= datetime('now', ?)"
+    )
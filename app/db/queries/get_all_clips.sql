@@ -1,13 +1,16 @@
 SELECT
 	Clips.ID AS ClipID,
-	Clips.Content AS Content,
+	-- Large contents are stored compressed (see tables/clips.sql)
+	CASE WHEN Clips.ContentZ IS NULL THEN Clips.Content ELSE decompress_content(Clips.ContentZ) END AS Content,
 	Clips.FromAppName AS FromAppName,
 	GROUP_CONCAT(Tags.Name, ',') AS Tags,
-	Clips.Timestamp AS Timestamp,
+	-- Stored as "YYYY-MM-DD HH:MM:SS" (UTC); returned as "YYYY-MM-DDTHH:MM:SSZ"
+	CASE WHEN Clips.Timestamp GLOB '*Z' OR NOT Clips.Timestamp GLOB '*[ T]*' THEN Clips.Timestamp
+		ELSE replace(Clips.Timestamp, ' ', 'T') || 'Z' END AS Timestamp,
 	CASE WHEN FavoriteClips.ClipID IS NOT NULL THEN 1 ELSE 0 END AS IsFavorite
 FROM Clips
 LEFT JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID
 LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID
 LEFT JOIN Tags ON ClipTags.TagID = Tags.ID
-GROUP BY Clips.ID, Clips.Content, Clips.FromAppName, Clips.Timestamp
+GROUP BY Clips.ID
 ORDER BY Clips.ID DESC;
@@ -0,0 +1,8 @@
+-- The content of clip :clip_id from character :offset (0-based) on, and its full length in
+-- characters; no row if there is no such clip. Large contents are stored compressed (see
+-- tables/clips.sql).
+SELECT
+	substr(CASE WHEN ContentZ IS NULL THEN Content ELSE decompress_content(ContentZ) END, :offset + 1) AS Content,
+	coalesce(ContentLength, length(Content)) AS ContentLength
+FROM Clips
+WHERE ID = :clip_id;
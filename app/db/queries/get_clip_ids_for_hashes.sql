@@ -0,0 +1,2 @@
+-- The ID of the clip stored under each of the :hashes (JSON array of content hashes).
+SELECT ContentHash, ID FROM Clips WHERE ContentHash IN (SELECT value FROM json_each(:hashes));
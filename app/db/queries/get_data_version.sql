@@ -0,0 +1,2 @@
+-- Changes whenever clips, tags or favorites change (see tables/counters.sql).
+SELECT Value FROM Counters WHERE Name = 'data_version';
@@ -0,0 +1,20 @@
+-- get_n_clips.sql for list views: Content is only the first 256 characters (CONTENT_HEAD_CHARS in
+-- app/core/constants.py) and a seventh column has the full length. A compressed clip already keeps
+-- that head in Clips.Content, so ContentZ is never read (see tables/clips.sql).
+SELECT
+	Clips.ID AS ClipID,
+	substr(Clips.Content, 1, 256) AS Content,
+	Clips.FromAppName AS FromAppName,
+	GROUP_CONCAT(Tags.Name, ',') AS Tags,
+	-- Stored as "YYYY-MM-DD HH:MM:SS" (UTC); returned as "YYYY-MM-DDTHH:MM:SSZ"
+	CASE WHEN Clips.Timestamp GLOB '*Z' OR NOT Clips.Timestamp GLOB '*[ T]*' THEN Clips.Timestamp
+		ELSE replace(Clips.Timestamp, ' ', 'T') || 'Z' END AS Timestamp,
+	CASE WHEN FavoriteClips.ClipID IS NOT NULL THEN 1 ELSE 0 END AS IsFavorite,
+	coalesce(Clips.ContentLength, length(Clips.Content)) AS ContentLength
+FROM Clips
+LEFT JOIN FavoriteClips ON Clips.ID = FavoriteClips.ClipID
+LEFT JOIN ClipTags ON Clips.ID = ClipTags.ClipID
+LEFT JOIN Tags ON ClipTags.TagID = Tags.ID
+GROUP BY Clips.ID
+ORDER BY Clips.ID DESC
+LIMIT COALESCE(:n, 999999);
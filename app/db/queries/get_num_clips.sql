@@ -1 +1 @@
-SELECT COUNT(*) FROM Clips;
+SELECT Value FROM Counters WHERE Name = 'clips';
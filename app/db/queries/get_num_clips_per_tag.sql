@@ -1 +1 @@
-SELECT COUNT(*) FROM ClipTags WHERE TagID = :tag_id;
+SELECT COALESCE((SELECT NumClips FROM TagCounters WHERE TagID = :tag_id), 0);
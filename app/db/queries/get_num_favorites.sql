@@ -1 +1 @@
-SELECT COUNT(*) FROM FavoriteClips;
+SELECT Value FROM Counters WHERE Name = 'favorites';
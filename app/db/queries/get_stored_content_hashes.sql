@@ -0,0 +1,2 @@
+-- Which of the :hashes (JSON array of content hashes) already belong to a stored clip.
+SELECT ContentHash FROM Clips WHERE ContentHash IN (SELECT value FROM json_each(:hashes));
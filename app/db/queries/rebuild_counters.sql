@@ -0,0 +1,7 @@
+-- Recounts clips, favorites and content bytes (see check_counters.sql). The counts may change, so the data version moves too.
+INSERT OR REPLACE INTO Counters (Name, Value)
+VALUES
+	('clips', (SELECT COUNT(*) FROM Clips)),
+	('favorites', (SELECT COUNT(*) FROM FavoriteClips)),
+	('content_bytes', (SELECT COALESCE(SUM(length(CAST(Content AS BLOB)) + coalesce(length(ContentZ), 0)), 0) FROM Clips)),
+	('data_version', (SELECT Value + 1 FROM Counters WHERE Name = 'data_version'));
@@ -0,0 +1,3 @@
+-- Recounts clips per tag. Run after delete_all_tag_counters.sql.
+INSERT INTO TagCounters (TagID, NumClips)
+SELECT TagID, COUNT(*) FROM ClipTags GROUP BY TagID;
@@ -0,0 +1,4 @@
+-- Tag-side lookups on ClipTags (the primary key only covers ClipID-first access).
+-- Covers get_num_clips_per_tag and the NOT EXISTS probes in delete_unused_tag(s_for_clip)
+-- without touching the table.
+CREATE INDEX IF NOT EXISTS idx_clip_tags_tag_id ON ClipTags (TagID, ClipID);
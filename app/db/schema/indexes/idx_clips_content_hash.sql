@@ -0,0 +1,3 @@
+-- Duplicate detection: add_clip*.sql upsert ON CONFLICT (ContentHash), so re-copying
+-- a clip is one index probe instead of a scan comparing every stored Content.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_clips_content_hash ON Clips (ContentHash);
@@ -0,0 +1,3 @@
+-- Source-app lookups on Clips.
+-- Covers get_all_from_apps (DISTINCT FromAppName) and the selected_apps filter (FromAppName = ?).
+CREATE INDEX IF NOT EXISTS idx_clips_from_app_name ON Clips (FromAppName);
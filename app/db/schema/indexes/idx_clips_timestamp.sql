@@ -0,0 +1,3 @@
+-- Time-frame filters (Timestamp >= ?). The implicit rowid makes it covering for
+-- COUNT(DISTINCT Clips.ID) and for the MIN(ID) lower bound used by construct_time_condition.
+CREATE INDEX IF NOT EXISTS idx_clips_timestamp ON Clips (Timestamp);
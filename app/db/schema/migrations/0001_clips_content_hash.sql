@@ -0,0 +1,30 @@
+-- Replaces the full-scan delete_old_if_duplicate trigger with a hashed, uniquely
+-- indexed ContentHash column (index: indexes/idx_clips_content_hash.sql).
+DROP TRIGGER IF EXISTS delete_old_if_duplicate;
+ALTER TABLE Clips ADD COLUMN ContentHash TEXT;
+UPDATE Clips SET ContentHash = content_hash(Content);
+-- The old trigger kept content unique already; drop any stragglers so the index can be built.
+-- Their tags and favorite flag move to the surviving (newest) copy first; references that
+-- already exist on the survivor are left behind by OR IGNORE and removed with the straggler.
+UPDATE OR IGNORE ClipTags
+SET ClipID = (
+	SELECT MAX(Survivor.ID) FROM Clips AS Survivor
+	WHERE Survivor.ContentHash = (SELECT ContentHash FROM Clips WHERE ID = ClipTags.ClipID)
+)
+WHERE ClipID IN (SELECT ID FROM Clips)
+	AND ClipID NOT IN (SELECT MAX(ID) FROM Clips GROUP BY ContentHash);
+UPDATE OR IGNORE FavoriteClips
+SET ClipID = (
+	SELECT MAX(Survivor.ID) FROM Clips AS Survivor
+	WHERE Survivor.ContentHash = (SELECT ContentHash FROM Clips WHERE ID = FavoriteClips.ClipID)
+)
+WHERE ClipID IN (SELECT ID FROM Clips)
+	AND ClipID NOT IN (SELECT MAX(ID) FROM Clips GROUP BY ContentHash);
+DELETE FROM ClipTags
+WHERE ClipID IN (SELECT ID FROM Clips)
+	AND ClipID NOT IN (SELECT MAX(ID) FROM Clips GROUP BY ContentHash);
+DELETE FROM FavoriteClips
+WHERE ClipID IN (SELECT ID FROM Clips)
+	AND ClipID NOT IN (SELECT MAX(ID) FROM Clips GROUP BY ContentHash);
+DELETE FROM Clips
+WHERE ID NOT IN (SELECT MAX(ID) FROM Clips GROUP BY ContentHash);
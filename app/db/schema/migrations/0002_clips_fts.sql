@@ -0,0 +1,2 @@
+-- Backfills the ClipsFts full-text index (tables/clipsFts.sql) from existing clips.
+INSERT INTO ClipsFts (ClipsFts) VALUES ('rebuild');
@@ -0,0 +1,2 @@
+-- Backfills the ClipsTrigram substring index (tables/clipsTrigram.sql) from existing clips.
+INSERT INTO ClipsTrigram (ClipsTrigram) VALUES ('rebuild');
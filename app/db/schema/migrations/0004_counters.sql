@@ -0,0 +1,6 @@
+-- Backfills Counters and TagCounters (tables/counters.sql, tables/tagCounters.sql) from existing rows.
+INSERT OR REPLACE INTO Counters (Name, Value)
+VALUES ('clips', (SELECT COUNT(*) FROM Clips)), ('favorites', (SELECT COUNT(*) FROM FavoriteClips));
+DELETE FROM TagCounters;
+INSERT INTO TagCounters (TagID, NumClips)
+SELECT TagID, COUNT(*) FROM ClipTags GROUP BY TagID;
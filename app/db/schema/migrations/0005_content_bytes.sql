@@ -0,0 +1,3 @@
+-- Backfills the 'content_bytes' counter (tables/counters.sql) from existing clips.
+INSERT OR REPLACE INTO Counters (Name, Value)
+VALUES ('content_bytes', (SELECT COALESCE(SUM(length(CAST(Content AS BLOB))), 0) FROM Clips));
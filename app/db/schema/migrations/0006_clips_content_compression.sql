@@ -0,0 +1,22 @@
+-- Adds compressed storage for large clip contents (see tables/clips.sql) and compresses the
+-- existing ones. The index and counter triggers are dropped so init_db recreates them with
+-- bodies that read compressed contents; compressing a clip leaves its indexed text unchanged.
+DROP TRIGGER IF EXISTS clips_fts_after_insert;
+DROP TRIGGER IF EXISTS clips_fts_after_update;
+DROP TRIGGER IF EXISTS clips_fts_after_delete;
+DROP TRIGGER IF EXISTS clips_trigram_after_insert;
+DROP TRIGGER IF EXISTS clips_trigram_after_update;
+DROP TRIGGER IF EXISTS clips_trigram_after_delete;
+DROP TRIGGER IF EXISTS content_bytes_after_clip_insert;
+DROP TRIGGER IF EXISTS content_bytes_after_clip_update;
+DROP TRIGGER IF EXISTS content_bytes_after_clip_delete;
+ALTER TABLE Clips ADD COLUMN ContentZ BLOB;
+ALTER TABLE Clips ADD COLUMN ContentLength INTEGER;
+UPDATE Clips
+SET ContentZ = Packed.Data, ContentLength = length(Clips.Content), Content = substr(Clips.Content, 1, 256)
+FROM (SELECT ID, compress_content(Content) AS Data FROM Clips) AS Packed
+WHERE Packed.ID = Clips.ID AND Packed.Data IS NOT NULL;
+INSERT OR REPLACE INTO Counters (Name, Value)
+VALUES ('content_bytes', (
+	SELECT COALESCE(SUM(length(CAST(Content AS BLOB)) + coalesce(length(ContentZ), 0)), 0) FROM Clips
+));
@@ -1,6 +1,14 @@
+-- Contents of COMPRESS_MIN_BYTES (app/core/constants.py) or more are stored compressed when that
+-- saves space: ContentZ holds the zlib-compressed full text, Content only its first 256 characters
+-- and ContentLength the full length in characters. Otherwise ContentZ and ContentLength are NULL
+-- and Content is the full text. Read the full text as
+-- CASE WHEN ContentZ IS NULL THEN Content ELSE decompress_content(ContentZ) END.
 CREATE TABLE IF NOT EXISTS Clips (
 	ID INTEGER PRIMARY KEY AUTOINCREMENT,
 	Content TEXT NOT NULL,
 	FromAppName TEXT,
-	Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+	Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+	ContentHash TEXT,
+	ContentZ BLOB,
+	ContentLength INTEGER
 );
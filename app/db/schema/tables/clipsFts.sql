@@ -0,0 +1,7 @@
+-- Full-text index over Clips.Content for the `search` filter (external content:
+-- stores only the index, reads text from Clips). Kept in sync by triggers/clips_fts_*.sql.
+CREATE VIRTUAL TABLE IF NOT EXISTS ClipsFts USING fts5(
+	Content,
+	content = 'Clips',
+	content_rowid = 'ID'
+);
@@ -0,0 +1,9 @@
+-- Trigram index over Clips.Content for substring (infix) search: narrows the
+-- candidates that `Content LIKE '%kw%'` has to check. External content, kept in
+-- sync by triggers/clips_trigram_*.sql.
+CREATE VIRTUAL TABLE IF NOT EXISTS ClipsTrigram USING fts5(
+	Content,
+	content = 'Clips',
+	content_rowid = 'ID',
+	tokenize = 'trigram'
+);
@@ -0,0 +1,16 @@
+-- Running row counts kept current by the counters_* triggers, so counting
+-- clips or favorites is a primary-key lookup instead of a COUNT(*) scan.
+-- 'content_bytes', kept by the content_bytes_* triggers, is the total stored size of all clip
+-- contents in bytes (compressed ones count their compressed size), checked against the
+-- max-bytes retention limit.
+-- Repair drift with scripts/check_counters.py --rebuild.
+-- 'data_version' is moved by the data_version_* triggers on every change to the
+-- clips, tags or favorites; the API derives its ETags from it. It starts at a
+-- random value so a recreated database does not repeat the versions of the old one,
+-- kept far below 2^53 so it stays exact as a JavaScript number in the Node runner.
+CREATE TABLE IF NOT EXISTS Counters (
+	Name TEXT PRIMARY KEY,
+	Value INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO Counters (Name, Value)
+VALUES ('clips', 0), ('favorites', 0), ('content_bytes', 0), ('data_version', abs(random()) % 1099511627776);
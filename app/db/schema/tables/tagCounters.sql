@@ -0,0 +1,6 @@
+-- Number of clips per tag, kept current by the tag_counters_* triggers.
+-- Tags without clips have no row.
+CREATE TABLE IF NOT EXISTS TagCounters (
+	TagID INTEGER PRIMARY KEY,
+	NumClips INTEGER NOT NULL
+);
@@ -0,0 +1,6 @@
+-- Remove deleted clips from ClipsFts.
+CREATE TRIGGER IF NOT EXISTS clips_fts_after_delete
+AFTER DELETE ON Clips
+BEGIN
+	INSERT INTO ClipsFts (ClipsFts, rowid, Content) VALUES ('delete', OLD.ID, CASE WHEN OLD.ContentZ IS NULL THEN OLD.Content ELSE decompress_content(OLD.ContentZ) END);
+END;
@@ -0,0 +1,6 @@
+-- Index new clips in ClipsFts (their full text, also for compressed clips).
+CREATE TRIGGER IF NOT EXISTS clips_fts_after_insert
+AFTER INSERT ON Clips
+BEGIN
+	INSERT INTO ClipsFts (rowid, Content) VALUES (NEW.ID, CASE WHEN NEW.ContentZ IS NULL THEN NEW.Content ELSE decompress_content(NEW.ContentZ) END);
+END;
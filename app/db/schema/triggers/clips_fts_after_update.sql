@@ -0,0 +1,7 @@
+-- Re-index clips whose content or ID changes (re-copied clips move to a new ID).
+CREATE TRIGGER IF NOT EXISTS clips_fts_after_update
+AFTER UPDATE OF ID, Content, ContentZ ON Clips
+BEGIN
+	INSERT INTO ClipsFts (ClipsFts, rowid, Content) VALUES ('delete', OLD.ID, CASE WHEN OLD.ContentZ IS NULL THEN OLD.Content ELSE decompress_content(OLD.ContentZ) END);
+	INSERT INTO ClipsFts (rowid, Content) VALUES (NEW.ID, CASE WHEN NEW.ContentZ IS NULL THEN NEW.Content ELSE decompress_content(NEW.ContentZ) END);
+END;
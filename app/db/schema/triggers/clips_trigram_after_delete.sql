@@ -0,0 +1,6 @@
+-- Remove deleted clips from ClipsTrigram.
+CREATE TRIGGER IF NOT EXISTS clips_trigram_after_delete
+AFTER DELETE ON Clips
+BEGIN
+	INSERT INTO ClipsTrigram (ClipsTrigram, rowid, Content) VALUES ('delete', OLD.ID, CASE WHEN OLD.ContentZ IS NULL THEN OLD.Content ELSE decompress_content(OLD.ContentZ) END);
+END;
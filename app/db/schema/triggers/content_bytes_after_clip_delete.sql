@@ -0,0 +1,6 @@
+-- Subtract deleted clips' stored content size from the 'content_bytes' counter.
+CREATE TRIGGER IF NOT EXISTS content_bytes_after_clip_delete
+AFTER DELETE ON Clips
+BEGIN
+	UPDATE Counters SET Value = Value - (length(CAST(OLD.Content AS BLOB)) + coalesce(length(OLD.ContentZ), 0)) WHERE Name = 'content_bytes';
+END;
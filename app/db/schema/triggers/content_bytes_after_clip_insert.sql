@@ -0,0 +1,6 @@
+-- Add new clips' stored content size to the 'content_bytes' counter (see tables/counters.sql).
+CREATE TRIGGER IF NOT EXISTS content_bytes_after_clip_insert
+AFTER INSERT ON Clips
+BEGIN
+	UPDATE Counters SET Value = Value + length(CAST(NEW.Content AS BLOB)) + coalesce(length(NEW.ContentZ), 0) WHERE Name = 'content_bytes';
+END;
@@ -0,0 +1,8 @@
+-- Keep the 'content_bytes' counter current when a clip's content is rewritten.
+CREATE TRIGGER IF NOT EXISTS content_bytes_after_clip_update
+AFTER UPDATE OF Content, ContentZ ON Clips
+BEGIN
+	UPDATE Counters
+	SET Value = Value + length(CAST(NEW.Content AS BLOB)) + coalesce(length(NEW.ContentZ), 0) - (length(CAST(OLD.Content AS BLOB)) + coalesce(length(OLD.ContentZ), 0))
+	WHERE Name = 'content_bytes';
+END;
@@ -0,0 +1,6 @@
+-- Uncount deleted clips.
+CREATE TRIGGER IF NOT EXISTS counters_after_clip_delete
+AFTER DELETE ON Clips
+BEGIN
+	UPDATE Counters SET Value = Value - 1 WHERE Name = 'clips';
+END;
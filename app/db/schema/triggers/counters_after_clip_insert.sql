@@ -0,0 +1,6 @@
+-- Count new clips (a re-copied clip is an UPDATE, see add_clip.sql, and is not counted again).
+CREATE TRIGGER IF NOT EXISTS counters_after_clip_insert
+AFTER INSERT ON Clips
+BEGIN
+	UPDATE Counters SET Value = Value + 1 WHERE Name = 'clips';
+END;
@@ -0,0 +1,6 @@
+-- Uncount removed favorites.
+CREATE TRIGGER IF NOT EXISTS counters_after_favorite_delete
+AFTER DELETE ON FavoriteClips
+BEGIN
+	UPDATE Counters SET Value = Value - 1 WHERE Name = 'favorites';
+END;
@@ -0,0 +1,6 @@
+-- Count new favorites.
+CREATE TRIGGER IF NOT EXISTS counters_after_favorite_insert
+AFTER INSERT ON FavoriteClips
+BEGIN
+	UPDATE Counters SET Value = Value + 1 WHERE Name = 'favorites';
+END;
@@ -0,0 +1,6 @@
+-- Move the data version (see tables/counters.sql) past deleted clips.
+CREATE TRIGGER IF NOT EXISTS data_version_after_clip_delete
+AFTER DELETE ON Clips
+BEGIN
+	UPDATE Counters SET Value = Value + 1 WHERE Name = 'data_version';
+END;
@@ -0,0 +1,6 @@
+-- Move the data version (see tables/counters.sql) past new clips.
+CREATE TRIGGER IF NOT EXISTS data_version_after_clip_insert
+AFTER INSERT ON Clips
+BEGIN
+	UPDATE Counters SET Value = Value + 1 WHERE Name = 'data_version';
+END;
@@ -0,0 +1,6 @@
+-- Move the data version (see tables/counters.sql) past changed clips (including a re-copy moving a clip to a new ID).
+CREATE TRIGGER IF NOT EXISTS data_version_after_clip_update
+AFTER UPDATE ON Clips
+BEGIN
+	UPDATE Counters SET Value = Value + 1 WHERE Name = 'data_version';
+END;
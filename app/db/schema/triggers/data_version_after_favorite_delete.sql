@@ -0,0 +1,6 @@
+-- Move the data version (see tables/counters.sql) past removed favorites.
+CREATE TRIGGER IF NOT EXISTS data_version_after_favorite_delete
+AFTER DELETE ON FavoriteClips
+BEGIN
+	UPDATE Counters SET Value = Value + 1 WHERE Name = 'data_version';
+END;
@@ -0,0 +1,6 @@
+-- Move the data version (see tables/counters.sql) past deleted tags.
+CREATE TRIGGER IF NOT EXISTS data_version_after_tag_delete
+AFTER DELETE ON Tags
+BEGIN
+	UPDATE Counters SET Value = Value + 1 WHERE Name = 'data_version';
+END;
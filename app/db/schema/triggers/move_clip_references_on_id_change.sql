@@ -0,0 +1,8 @@
+-- Re-copying a clip moves it to a new ID (see add_clip.sql); keep its tags and favorite.
+CREATE TRIGGER IF NOT EXISTS move_clip_references_on_id_change
+AFTER UPDATE OF ID ON Clips
+WHEN NEW.ID <> OLD.ID
+BEGIN
+	UPDATE ClipTags SET ClipID = NEW.ID WHERE ClipID = OLD.ID;
+	UPDATE FavoriteClips SET ClipID = NEW.ID WHERE ClipID = OLD.ID;
+END;
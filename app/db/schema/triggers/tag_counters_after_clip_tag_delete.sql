@@ -0,0 +1,7 @@
+-- Uncount the clip under the removed tag; drop the row once the tag has no clips.
+CREATE TRIGGER IF NOT EXISTS tag_counters_after_clip_tag_delete
+AFTER DELETE ON ClipTags
+BEGIN
+	UPDATE TagCounters SET NumClips = NumClips - 1 WHERE TagID = OLD.TagID;
+	DELETE FROM TagCounters WHERE TagID = OLD.TagID AND NumClips <= 0;
+END;
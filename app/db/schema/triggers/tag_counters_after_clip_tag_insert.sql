@@ -0,0 +1,7 @@
+-- Count the clip under its new tag.
+CREATE TRIGGER IF NOT EXISTS tag_counters_after_clip_tag_insert
+AFTER INSERT ON ClipTags
+BEGIN
+	INSERT INTO TagCounters (TagID, NumClips) VALUES (NEW.TagID, 1)
+	ON CONFLICT (TagID) DO UPDATE SET NumClips = NumClips + 1;
+END;
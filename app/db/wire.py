@@ -0,0 +1,108 @@
+"""Binary framing for the persistent runner (`db_runner.mjs --serve --protocol binary`).
+
+Requests stay JSON, just length-prefixed. Responses carrying rows are sent
+column by column: integers and reals as packed f64, text as one NUL-joined
+UTF-8 block. That is much less to parse than a JSON array per row, and the
+rows come out as tuples directly. The full frame layout is documented at the
+top of `scripts/db_runner.mjs`. Decoded responses match the JSON protocol.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, IO
+
+# Frame kinds
+FRAME_JSON = 0
+FRAME_ROWS = 1
+FRAME_RESULTS = 2
+
+# Column tags
+COL_NULL = 0
+COL_INT = 1
+COL_REAL = 2
+COL_TEXT = 3
+COL_JSON = 4
+
+_U32 = struct.Struct("<I")
+_U32_PAIR = struct.Struct("<II")
+
+
+def encode_request(payload: dict[str, Any]) -> bytes:
+    """Frame one request: u32 length, then its UTF-8 JSON."""
+    body = json.dumps(payload).encode("utf-8")
+    return _U32.pack(len(body)) + body
+
+
+def read_frame(stream: IO[bytes]) -> bytes | None:
+    """Read one response frame (without its length prefix); None at EOF."""
+    head = stream.read(4)
+    if len(head) < 4:
+        return None
+    (size,) = _U32.unpack(head)
+    frame = stream.read(size)
+    return frame if len(frame) == size else None
+
+
+def decode_response(frame: bytes) -> tuple[int | None, dict[str, Any]]:
+    """Decode one response frame into (request id, response)."""
+    (request_id,) = _U32.unpack_from(frame, 0)
+    kind = frame[4]
+    if kind == FRAME_JSON:
+        response = json.loads(frame[5:].decode("utf-8"))
+        response.pop("id", None)
+    elif kind == FRAME_ROWS:
+        rows, _ = _read_rows(frame, 6)
+        response = {"ok": True, "rows": rows}
+        if frame[5] != 2:
+            response["done"] = bool(frame[5])
+    elif kind == FRAME_RESULTS:
+        (count,) = _U32.unpack_from(frame, 5)
+        pos = 9
+        results = []
+        for _ in range(count):
+            rows, pos = _read_rows(frame, pos)
+            results.append(rows)
+        response = {"ok": True, "results": results}
+    else:
+        raise ValueError(f"Unknown runner frame kind {kind}")
+    return request_id or None, response
+
+
+def _read_rows(frame: bytes, pos: int) -> tuple[list[tuple[Any, ...]], int]:
+    """Decode one columnar row set starting at `pos`; returns (rows, end position)."""
+    nrows, ncols = _U32_PAIR.unpack_from(frame, pos)
+    pos += 8
+    columns = []
+    for _ in range(ncols):
+        tag = frame[pos]
+        pos += 1
+        if tag == COL_NULL:
+            columns.append([None] * nrows)
+            continue
+        if tag == COL_JSON:
+            (size,) = _U32.unpack_from(frame, pos)
+            columns.append(json.loads(frame[pos + 4 : pos + 4 + size].decode("utf-8")))
+            pos += 4 + size
+            continue
+
+        (num_nulls,) = _U32.unpack_from(frame, pos)
+        nulls = struct.unpack_from(f"<{num_nulls}I", frame, pos + 4)
+        pos += 4 + 4 * num_nulls
+        if tag == COL_TEXT:
+            (size,) = _U32.unpack_from(frame, pos)
+            column = frame[pos + 4 : pos + 4 + size].decode("utf-8").split("\0") if nrows else []
+            pos += 4 + size
+        elif tag in (COL_INT, COL_REAL):
+            values = struct.unpack_from(f"<{nrows}d", frame, pos)
+            column = list(map(int, values)) if tag == COL_INT else list(values)
+            pos += 8 * nrows
+        else:
+            raise ValueError(f"Unknown runner column tag {tag}")
+        for row in nulls:
+            column[row] = None
+        columns.append(column)
+
+    rows = list(zip(*columns)) if ncols else [() for _ in range(nrows)]
+    return rows, pos
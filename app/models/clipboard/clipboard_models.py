@@ -1,14 +1,17 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 
 class Clip(BaseModel):
+    """A stored clip. In preview reads `content` is only the first CONTENT_HEAD_CHARS
+    characters; `content_length` is always the full length, in characters."""
     id: int
     content: str
     from_app_name: Optional[str] = None
     tags: List[str] = []
     timestamp: str
     is_favorite: bool = False
+    content_length: Optional[int] = None
 
 
 class ClipInput(BaseModel):
@@ -24,6 +27,36 @@ class Clips(BaseModel):
     clips: list[Clip]
 
 
+class AddedClip(BaseModel):
+    """Outcome of one `/add_clips` item.
+
+    `inserted`: new content. `existing`: the content was already stored; that
+    clip moved to `id` (the newest) with the item's timestamp/app. `repeated`:
+    an earlier item of the same request had the same content.
+    """
+    id: int
+    outcome: Literal["inserted", "existing", "repeated"]
+
+
+class AddedClips(BaseModel):
+    """One AddedClip per `/add_clips` item, in request order."""
+    clips: list[AddedClip]
+
+
+class ClipContent(BaseModel):
+    """The content of clip `id` from character `offset` on (`/clip_content`)."""
+    id: int
+    offset: int
+    content: str
+    content_length: int
+
+
+class ClipsPage(BaseModel):
+    """One page of clips; pass `next_cursor` back to get the next (older) page."""
+    clips: list[Clip]
+    next_cursor: Optional[str] = None
+
+
 class Tag(BaseModel):
     id: int
     name: str
@@ -35,3 +68,13 @@ class Tags(BaseModel):
 
 class FavoriteClipIDs(BaseModel):
     clip_ids: list[int]
+
+
+class ResultCacheStats(BaseModel):
+    """Counters of the service-layer read cache (see clipboard_service)."""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    max_entries: int
+    data_version: int
@@ -6,3 +6,5 @@ class Filters(BaseModel):
     selected_tags: list[str] = []
     favorites_only: bool = False
     time_frame: str = ''
+    sort_by_relevance: bool = False
+    word_search: bool = False
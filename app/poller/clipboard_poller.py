@@ -0,0 +1,280 @@
+"""Clipboard ingestion daemon: watch the system clipboard and send new clips to the API.
+
+Each poll reads the clipboard through a `ClipboardSource` and compares a digest
+of the text with the last one seen, so an unchanged clipboard costs one read and
+one hash. A change is recorded only once the clipboard has held it for the
+debounce period; a burst of edits yields just its final text. Recorded clips
+are queued and sent together through `POST /clipboard/add_clips` when the batch
+fills or its oldest clip has waited long enough.
+
+When the API is unreachable (connection errors, 5xx), the clips are appended
+to a JSON-lines spool file instead. They are replayed, oldest first and ahead of
+newer clips, once the API answers again (or on the next start). While nothing
+changes the poll interval backs off to the idle interval, so an idle daemon is
+mostly asleep.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Protocol
+
+import httpx
+
+from app.core.constants import (
+    MAX_ADD_CLIPS,
+    POLLER_BATCH_SIZE,
+    POLLER_DEBOUNCE_SECONDS,
+    POLLER_FLUSH_SECONDS,
+    POLLER_IDLE_INTERVAL_SECONDS,
+    POLLER_INTERVAL_SECONDS,
+    POLLER_RETRY_SECONDS,
+)
+
+ClipItem = dict[str, Any]  # one /add_clips item: content, timestamp, from_app_name
+
+
+class ClipboardSource(Protocol):
+    def read(self) -> str | None:
+        """Current clipboard text, or None if there is none (or it cannot be read)."""
+        ...
+
+
+class PyperclipSource:
+    """The system clipboard, through pyperclip."""
+
+    def __init__(self) -> None:
+        import pyperclip
+
+        self._pyperclip = pyperclip
+
+    def read(self) -> str | None:
+        try:
+            return self._pyperclip.paste() or None
+        except self._pyperclip.PyperclipException:
+            return None
+
+
+class FakeClipboardSource:
+    """In-memory clipboard for tests: `read` returns the text last passed to `copy`."""
+
+    def __init__(self, text: str | None = None) -> None:
+        self.text = text
+        self.reads = 0
+
+    def copy(self, text: str | None) -> None:
+        self.text = text
+
+    def read(self) -> str | None:
+        self.reads += 1
+        return self.text
+
+
+class ApiUnavailable(Exception):
+    """The API could not take a batch now (unreachable or failing); retry later."""
+
+
+class ApiClipSink:
+    """Sends batches to `POST /clipboard/add_clips`."""
+
+    def __init__(self, client: httpx.Client) -> None:
+        self._client = client
+
+    def send(self, clips: list[ClipItem]) -> None:
+        try:
+            response = self._client.post("/clipboard/add_clips", json=clips)
+        except httpx.TransportError as exc:
+            raise ApiUnavailable(str(exc)) from exc
+        if response.status_code >= 500:
+            raise ApiUnavailable(f"HTTP {response.status_code}")
+        response.raise_for_status()
+
+
+class ClipSpool:
+    """Append-only JSON-lines file of clips the API has not accepted yet."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def has_clips(self) -> bool:
+        try:
+            return self.path.stat().st_size > 0
+        except FileNotFoundError:
+            return False
+
+    def append(self, clips: list[ClipItem]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.writelines(json.dumps(clip) + "\n" for clip in clips)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self) -> list[ClipItem]:
+        if not self.has_clips():
+            return []
+        clips = []
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    clips.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass  # a line cut short by a crash mid-append
+        return clips
+
+    def replace(self, clips: list[ClipItem]) -> None:
+        """Atomically rewrite the spool to hold just `clips`."""
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.writelines(json.dumps(clip) + "\n" for clip in clips)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _utc_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class ClipboardPoller:
+    """Polls a source, debounces and batches changes, and delivers them to a sink or the spool.
+
+    `poll_once(now)` does one step at monotonic time `now` and returns the delay
+    until the next poll; `run()` loops over it. The clipboard's content when the
+    poller starts is taken as already stored.
+    """
+
+    def __init__(
+        self,
+        source: ClipboardSource,
+        sink: ApiClipSink,
+        spool: ClipSpool,
+        *,
+        from_app_name: str | None = None,
+        interval: float = POLLER_INTERVAL_SECONDS,
+        idle_interval: float = POLLER_IDLE_INTERVAL_SECONDS,
+        debounce: float = POLLER_DEBOUNCE_SECONDS,
+        batch_size: int = POLLER_BATCH_SIZE,
+        flush_after: float = POLLER_FLUSH_SECONDS,
+        retry_after: float = POLLER_RETRY_SECONDS,
+    ) -> None:
+        self.source = source
+        self.sink = sink
+        self.spool = spool
+        self.from_app_name = from_app_name
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.debounce = debounce
+        self.batch_size = batch_size
+        self.flush_after = flush_after
+        self.retry_after = retry_after
+
+        self._last_digest: bytes | None = None
+        self._primed = False
+        self._pending: ClipItem | None = None  # changed, waiting for the clipboard to settle
+        self._pending_since = 0.0
+        self._queue: list[ClipItem] = []
+        self._queued_since = 0.0
+        self._spooled = spool.has_clips()
+        self._retry_at = 0.0
+        self._delay = interval
+
+    def poll_once(self, now: float) -> float:
+        text = self.source.read()
+        digest = _digest(text) if text else None
+        changed = digest != self._last_digest
+        self._last_digest = digest
+        if not self._primed:
+            self._primed, changed = True, False
+        if changed:
+            # A newer change replaces one that has not settled yet
+            self._pending = None
+            if text:
+                self._pending = {"content": text, "timestamp": _utc_timestamp(), "from_app_name": self.from_app_name}
+            self._pending_since = now
+
+        if self._pending is not None and now - self._pending_since >= self.debounce:
+            self._enqueue(self._pending, now)
+            self._pending = None
+
+        full = len(self._queue) >= self.batch_size
+        due = bool(self._queue) and now - self._queued_since >= self.flush_after
+        if full or due or (self._spooled and now >= self._retry_at):
+            self.flush(now)
+
+        # Poll quickly while something is changing or settling, and back off while idle
+        if changed or self._pending is not None:
+            self._delay = self.interval
+        else:
+            self._delay = min(self._delay * 1.5, self.idle_interval)
+        return self._delay
+
+    def _enqueue(self, clip: ClipItem, now: float) -> None:
+        if not self._queue:
+            self._queued_since = now
+        self._queue.append(clip)
+
+    def flush(self, now: float) -> None:
+        """Send the queue, after any spooled clips; spool whatever the API does not take."""
+        batch, self._queue = self._queue, []
+        if now < self._retry_at:
+            if batch:
+                self.spool.append(batch)
+                self._spooled = True
+            return
+
+        clips = self.spool.read() + batch if self._spooled else batch
+        sent = 0
+        try:
+            for start in range(0, len(clips), MAX_ADD_CLIPS):
+                chunk = clips[start : start + MAX_ADD_CLIPS]
+                try:
+                    self.sink.send(chunk)
+                except httpx.HTTPStatusError as exc:
+                    # Retrying a rejected batch cannot help; drop it
+                    print(f"Dropped {len(chunk)} clips rejected by the API: {exc}", file=sys.stderr)
+                sent += len(chunk)
+        except ApiUnavailable as exc:
+            self._retry_at = now + self.retry_after
+            if sent:
+                self.spool.replace(clips[sent:])
+            elif batch:
+                self.spool.append(batch)  # the spooled clips are already ahead of it
+            self._spooled = True
+            print(f"API unavailable ({exc}); spooled {len(clips) - sent} clips", file=sys.stderr)
+            return
+
+        if self._spooled:
+            self.spool.clear()
+            self._spooled = False
+
+    def close(self, now: float) -> None:
+        """Record a change that is still settling and deliver (or spool) everything queued."""
+        if self._pending is not None:
+            self._enqueue(self._pending, now)
+            self._pending = None
+        if self._queue:
+            self._retry_at = 0.0
+            self.flush(now)
+
+    def run(self) -> None:
+        """Poll until interrupted, then deliver what is left."""
+        try:
+            while True:
+                time.sleep(self.poll_once(time.monotonic()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close(time.monotonic())
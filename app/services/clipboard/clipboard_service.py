@@ -1,25 +1,44 @@
-from collections.abc import Mapping
-from typing import Sequence, Any
+import asyncio
+import base64
+import binascii
+import functools
+import hashlib
+import inspect
+import json
+import sys
+from collections.abc import Awaitable, Callable, Hashable, Iterator
+from typing import Sequence, Any, TypeVar
 from datetime import datetime, timezone
 
 from app.models.clipboard.clipboard_models import (
+    AddedClip,
+    AddedClips,
     Clip,
+    ClipContent,
+    ClipInput,
     Clips,
+    ClipsPage,
     Tags,
     Tag,
     FavoriteClipIDs,
+    ResultCacheStats,
 )
 from app.models.clipboard.filters import Filters
 from app.core.constants import (
     GET_N_CLIPS,
     GET_ALL_CLIPS,
+    GET_N_CLIPS_PREVIEW,
+    GET_ALL_CLIPS_PREVIEW,
+    GET_CLIP_CONTENT,
+    GET_CLIP_BY_ID,
+    GET_CLIPS_BY_IDS,
     ADD_CLIP,
     DELETE_CLIP,
     DELETE_ALL_CLIPS,
     DELETE_FAVORITE_FOR_CLIP,
-    GET_TAG_IDS_FOR_CLIP,
     DELETE_CLIP_TAGS_FOR_CLIP,
     DELETE_UNUSED_TAG,
+    DELETE_UNUSED_TAGS_FOR_CLIP,
     DELETE_ALL_CLIP_TAGS,
     DELETE_ALL_FAVORITES,
     DELETE_ALL_TAGS,
@@ -37,88 +56,187 @@ from app.core.constants import (
     GET_NUM_FAVORITES,
     ADD_TAG_IF_NOT_EXISTS,
     GET_ALL_FROM_APPS,
+    ADD_CLIPS,
+    GET_STORED_CONTENT_HASHES,
+    GET_CLIP_IDS_FOR_HASHES,
+    ADD_TAGS_FOR_CLIPS,
+    ADD_CLIP_TAGS_FOR_CLIPS,
+    ADD_FAVORITES_FOR_HASHES,
+    GET_CLIP_BY_CONTENT_HASH,
+    CHECK_COUNTERS,
+    REBUILD_COUNTERS,
+    DELETE_ALL_TAG_COUNTERS,
+    REBUILD_TAG_COUNTERS,
+    GET_DATA_VERSION,
+    EVICT_CLIPS_OVER_COUNT,
+    EVICT_CLIPS_OVER_AGE,
+    EVICT_CLIPS_OVER_BYTES,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    RESULT_CACHE_SIZE,
+    EVENT_BUFFER_SIZE,
+    RETENTION_BATCH_SIZE,
+    RETENTION_INTERVAL_SECONDS,
 )
-from app.db.db import execute_query, execute_dynamic_query
+from app.db.db import (
+    BatchStep,
+    execute_query,
+    execute_dynamic_query,
+    execute_batch,
+    execute_query_async,
+    execute_dynamic_query_async,
+    execute_batch_async,
+    iterate_query,
+    iterate_dynamic_query,
+)
+from app.db.functions import content_hash
 from app.db.queries.filter_clips_dynamic_queries import (
     filter_all_clips_query,
     filter_n_clips_query,
     filter_all_clips_after_id_query,
     filter_n_clips_before_id_query,
+    filter_clips_page_query,
     get_num_filtered_clips_query,
 )
+from app.services.clipboard.event_feed import ClipEvent, EventFeed
+from app.services.clipboard.result_cache import ResultCache
+from app.services.clipboard.retention import RetentionPolicy
 
+T = TypeVar("T")
 
-def _row_to_clip(row: Mapping | Sequence[Any]) -> Clip:
-    """Map a DB row (tuple/sequence) or mapping to Clip.
+# Filter, tag and app reads are served from here until the next write
+_result_cache = ResultCache(RESULT_CACHE_SIZE)
 
-    Supports legacy 5-column shape and new 6-column shape with IsFavorite.
-    Tuple/list layout (new): (ClipID, Content, FromAppName, TagsCSV, Timestamp, IsFavorite)
-    """
-    if isinstance(row, (tuple, list)):
-        clip_id = int(row[0])
-        content = str(row[1])
-        from_app = row[2] if len(row) > 2 else None
-        tags_csv = row[3] if len(row) > 3 else None
-        timestamp = str(row[4]) if len(row) > 4 else str(row[-1])
-        is_favorite = bool(row[5]) if len(row) > 5 else False
-        tags_list = [t for t in str(tags_csv).split(",") if t] if tags_csv else []
-
-        # Ensure timestamp is in UTC format with Z suffix
-        timestamp_utc = _ensure_utc_format(timestamp)
-
-        return Clip(
-            id=clip_id,
-            content=content,
-            from_app_name=from_app,
-            tags=tags_list,
-            timestamp=timestamp_utc,
-            is_favorite=is_favorite,
-        )
+# Change events for /clipboard/events, published once a write has committed
+_event_feed = EventFeed(EVENT_BUFFER_SIZE)
+
+
+def _writes(func: Callable[..., T]) -> Callable[..., T]:
+    """Mark a service function (sync or async) as a write: bump the result cache's data version when it returns."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _result_cache.bump()
+        return async_wrapper  # type: ignore[return-value]
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # Also on failure: a write may have been applied before the error surfaced
+            _result_cache.bump()
+    return wrapper
 
-    keys = {str(k).lower(): k for k in row.keys()}
-    id_key = keys.get("clipid") or keys.get("id")
-    content_key = keys.get("content")
-    from_app_key = keys.get("fromappname")
-    tags_key = keys.get("tags")
-    ts_key = keys.get("timestamp")
-    fav_key = keys.get("isfavorite") or keys.get("favorite")
-    tags_val = row.get(tags_key) if tags_key else None  # type: ignore[index]
-    tags_list = [t for t in str(tags_val).split(",") if t] if tags_val else []
-    is_fav_val = bool(row.get(fav_key)) if fav_key and fav_key in row else False  # type: ignore[index]
-
-    # Ensure timestamp is in UTC format with Z suffix
-    timestamp_raw = str(row[ts_key])  # type: ignore[index]
-    timestamp_utc = _ensure_utc_format(timestamp_raw)
-
-    return Clip(
-        id=int(row[id_key]),  # type: ignore[index]
-        content=str(row[content_key]),  # type: ignore[index]
-        from_app_name=row.get(from_app_key) if from_app_key else None,  # type: ignore[index]
-        tags=tags_list,
-        timestamp=timestamp_utc,
-        is_favorite=is_fav_val,
-    )
 
+def _cached(key: Hashable, load: Callable[[], T]) -> T:
+    return _result_cache.get_or_load(key, load)
 
-def _ensure_utc_format(timestamp: str) -> str:
-    """Convert timestamp to UTC format with Z suffix.
 
-    Handles various input formats and ensures output is always UTC with Z suffix.
+async def _cached_async(key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+    return await _result_cache.get_or_load_async(key, load)
+
+
+def _filtered_cache_key(name: str, filters: Filters, params: tuple) -> Hashable | None:
+    """Cache key of a filtered read: its normalized filters and page parameters.
+
+    Time-frame filters are relative to now, so clips age out of them without
+    any write; those reads get no key and always go to the DB.
     """
-    if timestamp.endswith('Z'):
-        return timestamp
+    if filters.time_frame:
+        return None
+    normalized = filters.model_copy(update={
+        "selected_tags": sorted(set(filters.selected_tags)),
+        "selected_apps": sorted(set(filters.selected_apps)),
+    })
+    return (name, normalized.model_dump_json(), *params)
 
-    # Handle common formats from SQLite
-    if ' ' in timestamp:
-        # SQLite DATETIME format: "YYYY-MM-DD HH:MM:SS"
-        # Treat as UTC and add Z suffix
-        return f"{timestamp.replace(' ', 'T')}Z"
 
-    # Handle ISO format without Z
-    if 'T' in timestamp and not timestamp.endswith('Z'):
-        return f"{timestamp}Z"
+def _cached_filtered(name: str, filters: Filters, params: tuple, load: Callable[[], T]) -> T:
+    key = _filtered_cache_key(name, filters, params)
+    return load() if key is None else _cached(key, load)
 
-    return timestamp
+
+async def _cached_filtered_async(
+    name: str, filters: Filters, params: tuple, load: Callable[[], Awaitable[T]]
+) -> T:
+    key = _filtered_cache_key(name, filters, params)
+    return await load() if key is None else await _cached_async(key, load)
+
+
+def _publish(type: str, **data: Any) -> None:
+    _event_feed.publish(type, data)
+
+
+def get_last_event_id() -> int:
+    """ID of the newest change event (0 before the first write of this process)."""
+    return _event_feed.last_id
+
+
+def get_events_since(last_id: int) -> list[ClipEvent] | None:
+    """Change events after `last_id`; None if some are gone and the client must reload."""
+    return _event_feed.since(last_id)
+
+
+async def wait_for_events(last_id: int, timeout: float) -> list[ClipEvent] | None:
+    """Await the change events after `last_id` (up to `timeout` seconds; [] if none came)."""
+    return await _event_feed.wait(last_id, timeout)
+
+
+def get_result_cache_stats() -> ResultCacheStats:
+    return ResultCacheStats(**_result_cache.stats())
+
+
+def clear_result_cache() -> None:
+    """Drop every cached read and reset the statistics (e.g. after writing to the DB directly)."""
+    _result_cache.clear()
+
+
+# Every Clip field is set by _clip_from_row
+_CLIP_FIELDS = frozenset(Clip.model_fields)
+
+# Looked up once: _clip_from_row runs for every row of every clip read
+_object_new = object.__new__
+_object_setattr = object.__setattr__
+
+
+def _clip_from_row(row: Sequence[Any]) -> Clip:
+    """Build a Clip from a clip query row without validating it.
+
+    Row layout: (ClipID, Content, FromAppName, TagsCSV, Timestamp, IsFavorite),
+    plus ContentLength in preview rows, whose Content is only a head; otherwise
+    Content is complete and its length is taken from it. The clip queries
+    return every value in its final type, with the timestamp already in UTC ISO
+    format (normalized in SQL), so the row is trusted and the model is filled in
+    directly, as `Clip.model_construct` would, minus its per-field default
+    handling.
+    """
+    if len(row) == 7:
+        clip_id, content, from_app_name, tags_csv, timestamp, is_favorite, content_length = row
+    else:
+        clip_id, content, from_app_name, tags_csv, timestamp, is_favorite = row
+        content_length = len(content)
+    clip = _object_new(Clip)
+    _object_setattr(clip, "__dict__", {
+        "id": clip_id,
+        "content": content,
+        "from_app_name": from_app_name,
+        "tags": tags_csv.split(",") if tags_csv else [],
+        "timestamp": timestamp,
+        "is_favorite": bool(is_favorite),
+        "content_length": content_length,
+    })
+    _object_setattr(clip, "__pydantic_fields_set__", set(_CLIP_FIELDS))
+    _object_setattr(clip, "__pydantic_extra__", None)
+    _object_setattr(clip, "__pydantic_private__", None)
+    return clip
+
+
+def _clips_from_rows(rows: Sequence[Sequence[Any]]) -> Clips:
+    return Clips.model_construct(clips=[_clip_from_row(row) for row in rows])
 
 
 def _generate_utc_timestamp() -> str:
@@ -143,78 +261,278 @@ def _parse_timestamp_for_db(timestamp: str | None) -> str:
 
     return timestamp
 
-def get_recent_clips(n: int | None) -> Clips:
-    result = execute_query(GET_N_CLIPS, {"n": n})
-    clips = Clips(clips=[_row_to_clip(r) for r in result])
+def get_recent_clips(n: int | None, preview: bool = False) -> Clips:
+    result = execute_query(GET_N_CLIPS_PREVIEW if preview else GET_N_CLIPS, {"n": n})
+    clips = _clips_from_rows(result)
     return clips
 
-def get_all_clips() -> Clips:
-    result = execute_query(GET_ALL_CLIPS)
-    clips = Clips(clips=[_row_to_clip(r) for r in result])
+async def get_recent_clips_async(n: int | None, preview: bool = False) -> Clips:
+    result = await execute_query_async(GET_N_CLIPS_PREVIEW if preview else GET_N_CLIPS, {"n": n})
+    return _clips_from_rows(result)
+
+def get_all_clips(preview: bool = False) -> Clips:
+    result = execute_query(GET_ALL_CLIPS_PREVIEW if preview else GET_ALL_CLIPS)
+    clips = _clips_from_rows(result)
     return clips
 
+async def get_all_clips_async(preview: bool = False) -> Clips:
+    result = await execute_query_async(GET_ALL_CLIPS_PREVIEW if preview else GET_ALL_CLIPS)
+    return _clips_from_rows(result)
+
+def get_clip(clip_id: int) -> Clip | None:
+    """The clip with this ID, with its tags and favorite flag; None if there is none."""
+    rows = execute_query(GET_CLIP_BY_ID, {"clip_id": clip_id})
+    return _clip_from_row(rows[0]) if rows else None
+
+async def get_clip_async(clip_id: int) -> Clip | None:
+    rows = await execute_query_async(GET_CLIP_BY_ID, {"clip_id": clip_id})
+    return _clip_from_row(rows[0]) if rows else None
+
+def get_clips_by_ids(clip_ids: Sequence[int]) -> Clips:
+    """The clips with these IDs, newest first, one primary-key lookup each; unknown IDs are skipped."""
+    rows = execute_query(GET_CLIPS_BY_IDS, {"clip_ids": json.dumps(list(clip_ids))})
+    return _clips_from_rows(rows)
+
+async def get_clips_by_ids_async(clip_ids: Sequence[int]) -> Clips:
+    rows = await execute_query_async(GET_CLIPS_BY_IDS, {"clip_ids": json.dumps(list(clip_ids))})
+    return _clips_from_rows(rows)
+
+def get_clip_content(clip_id: int, offset: int = 0) -> ClipContent | None:
+    """The content of a clip from character `offset` on (all of it by default); None if there is no such clip.
+
+    The complement of a preview read: a list view asks for the rest of one clip
+    when it is opened, from `offset=len(preview.content)`.
+    """
+    rows = execute_query(GET_CLIP_CONTENT, {"clip_id": clip_id, "offset": offset})
+    return _clip_content_from_rows(rows, clip_id, offset)
+
+async def get_clip_content_async(clip_id: int, offset: int = 0) -> ClipContent | None:
+    rows = await execute_query_async(GET_CLIP_CONTENT, {"clip_id": clip_id, "offset": offset})
+    return _clip_content_from_rows(rows, clip_id, offset)
+
+def _clip_content_from_rows(rows: list[tuple], clip_id: int, offset: int) -> ClipContent | None:
+    if not rows:
+        return None
+    content, content_length = rows[0]
+    return ClipContent(id=clip_id, offset=offset, content=content, content_length=content_length)
+
+def stream_all_clips() -> Iterator[Clip]:
+    """Yield every clip, newest first, as rows arrive from the DB (constant memory)."""
+    for row in iterate_query(GET_ALL_CLIPS):
+        yield _clip_from_row(row)
+
+@_writes
 def add_clip(content: str, from_app_name: str | None = None) -> None:
-    execute_query(ADD_CLIP, {"content": content, "from_app_name": from_app_name})
+    rows = execute_query(ADD_CLIP, {"content": content, "from_app_name": from_app_name})
+    _publish("clip_added", id=int(rows[0][0]))
+
+@_writes
+async def add_clip_async(content: str, from_app_name: str | None = None) -> None:
+    rows = await execute_query_async(ADD_CLIP, {"content": content, "from_app_name": from_app_name})
+    _publish("clip_added", id=int(rows[0][0]))
 
 
+@_writes
 def add_clip_with_timestamp_support(
     content: str,
     timestamp: str | None = None,
-    from_app_name: str | None = None
-) -> None:
-    """Add clip with optional timestamp support.
+    from_app_name: str | None = None,
+    tags: Sequence[str] = (),
+    is_favorite: bool = False,
+) -> Clip:
+    """Add clip with optional timestamp support, tags and favorite status; return the stored clip.
 
     If timestamp is provided, uses it (converting to proper format for storage).
-    If not provided, uses current UTC timestamp.
+    If not provided, uses current UTC timestamp. The clip, its tags and its
+    favorite flag are written in one transaction. A re-copied clip keeps the
+    tags it already had.
     """
-    if timestamp:
-        # Use provided timestamp, converting to DB format
-        db_timestamp = _parse_timestamp_for_db(timestamp)
-        execute_query(ADD_CLIP_WITH_TIMESTAMP, {
-            "content": content,
-            "timestamp": db_timestamp,
-            "from_app_name": from_app_name
-        })
-    else:
-        # Generate UTC timestamp and use it
-        utc_timestamp = _generate_utc_timestamp()
-        db_timestamp = _parse_timestamp_for_db(utc_timestamp)
-        execute_query(ADD_CLIP_WITH_TIMESTAMP, {
-            "content": content,
-            "timestamp": db_timestamp,
-            "from_app_name": from_app_name
-        })
+    results = execute_batch(_add_clip_steps(content, timestamp, from_app_name, tags, is_favorite))
+    return _publish_added_clip(_clip_from_row(results[-1][0]))
 
+@_writes
+async def add_clip_with_timestamp_support_async(
+    content: str,
+    timestamp: str | None = None,
+    from_app_name: str | None = None,
+    tags: Sequence[str] = (),
+    is_favorite: bool = False,
+) -> Clip:
+    results = await execute_batch_async(_add_clip_steps(content, timestamp, from_app_name, tags, is_favorite))
+    return _publish_added_clip(_clip_from_row(results[-1][0]))
+
+def _publish_added_clip(clip: Clip) -> Clip:
+    # A re-copied clip is announced under its new ID; the same content under an older ID is gone
+    _publish("clip_added", id=clip.id, clip=clip.model_dump())
+    return clip
+
+def _add_clip_steps(
+    content: str,
+    timestamp: str | None,
+    from_app_name: str | None,
+    tags: Sequence[str],
+    is_favorite: bool,
+) -> list[BatchStep]:
+    """Upsert one clip, tag it, maybe favorite it, and read it back.
+
+    The upsert returns the clip's ID, but the later steps of the same batch
+    cannot see that result, so they find the clip by its content hash.
+    """
+    digest = content_hash(content)
+    steps: list[BatchStep] = [(ADD_CLIP_WITH_TIMESTAMP, _add_clip_params(content, timestamp, from_app_name))]
+    clip_tags = json.dumps([[digest, tag] for tag in dict.fromkeys(tags)])
+    if tags:
+        steps.append((ADD_TAGS_FOR_CLIPS, {"clip_tags": clip_tags}))
+        steps.append((ADD_CLIP_TAGS_FOR_CLIPS, {"clip_tags": clip_tags}))
+    if is_favorite:
+        steps.append((ADD_FAVORITES_FOR_HASHES, {"hashes": json.dumps([digest])}))
+    steps.append((GET_CLIP_BY_CONTENT_HASH, {"content_hash": digest}))
+    return steps
+
+def _add_clip_params(content: str, timestamp: str | None, from_app_name: str | None) -> dict[str, Any]:
+    # Use the provided timestamp, or the current UTC time, in DB format
+    db_timestamp = _parse_timestamp_for_db(timestamp or _generate_utc_timestamp())
+    return {"content": content, "timestamp": db_timestamp, "from_app_name": from_app_name}
+
+@_writes
+def add_clips(clips: Sequence[ClipInput], from_app_name: str | None = None) -> AddedClips:
+    """Add many clips, with their tags and favorite flags, in one transaction.
+
+    Items are applied in order, exactly as if each went through
+    add_clip_with_timestamp_support, add_clip_tag and add_favorite; either all
+    of them are stored or none is. `from_app_name` fills in items without one.
+    """
+    if not clips:
+        return AddedClips(clips=[])
+    hashes, steps = _add_clips_steps(clips, from_app_name)
+    results = execute_batch(steps)
+    return _publish_added_clips(_added_clips(hashes, results[0], results[-1]))
+
+@_writes
+async def add_clips_async(clips: Sequence[ClipInput], from_app_name: str | None = None) -> AddedClips:
+    if not clips:
+        return AddedClips(clips=[])
+    hashes, steps = _add_clips_steps(clips, from_app_name)
+    results = await execute_batch_async(steps)
+    return _publish_added_clips(_added_clips(hashes, results[0], results[-1]))
+
+def _add_clips_steps(clips: Sequence[ClipInput], from_app_name: str | None) -> tuple[list[str], list[BatchStep]]:
+    """Content hash of every item, and the batch that ingests them.
+
+    Every step is one set-based statement over a JSON array, so the batch has
+    the same handful of steps however many clips it carries. Only the insert
+    gets the contents; the other steps find the clips by content hash.
+    """
+    items = []
+    hashes = []
+    clip_tags = []
+    favorites = []
+    for clip in clips:
+        digest = content_hash(clip.content)
+        hashes.append(digest)
+        items.append(_add_clip_params(clip.content, clip.timestamp, clip.from_app_name or from_app_name))
+        clip_tags.extend([digest, tag] for tag in dict.fromkeys(clip.tags))
+        if clip.is_favorite:
+            favorites.append(digest)
+
+    unique_hashes = json.dumps(list(dict.fromkeys(hashes)))
+    steps: list[BatchStep] = [
+        # Stored before this batch: tells "existing" from "inserted"
+        (GET_STORED_CONTENT_HASHES, {"hashes": unique_hashes}),
+        (ADD_CLIPS, {"clips": json.dumps(items)}),
+    ]
+    if clip_tags:
+        steps.append((ADD_TAGS_FOR_CLIPS, {"clip_tags": json.dumps(clip_tags)}))
+        steps.append((ADD_CLIP_TAGS_FOR_CLIPS, {"clip_tags": json.dumps(clip_tags)}))
+    if favorites:
+        steps.append((ADD_FAVORITES_FOR_HASHES, {"hashes": json.dumps(favorites)}))
+    # Last: the IDs every clip ended up with
+    steps.append((GET_CLIP_IDS_FOR_HASHES, {"hashes": unique_hashes}))
+    return hashes, steps
+
+def _added_clips(hashes: list[str], stored_rows: list[tuple], id_rows: list[tuple]) -> AddedClips:
+    stored = {row[0] for row in stored_rows}
+    ids = {row[0]: int(row[1]) for row in id_rows}
+    seen: set[str] = set()
+    added = []
+    for digest in hashes:
+        if digest in seen:
+            outcome = "repeated"
+        elif digest in stored:
+            outcome = "existing"
+        else:
+            outcome = "inserted"
+        seen.add(digest)
+        added.append(AddedClip(id=ids[digest], outcome=outcome))
+    return AddedClips(clips=added)
+
+def _publish_added_clips(added: AddedClips) -> AddedClips:
+    # One event per batch; repeats of an earlier item add nothing
+    _publish("clips_added", clips=[clip.model_dump() for clip in added.clips if clip.outcome != "repeated"])
+    return added
+
+@_writes
 def delete_clip(id: int) -> None:
-    # Remove favorite if present
-    execute_query(DELETE_FAVORITE_FOR_CLIP, {"clip_id": id})
-    # Gather tag ids
-    tag_rows = execute_query(GET_TAG_IDS_FOR_CLIP, {"clip_id": id})
-    # Remove clip tag mappings
-    execute_query(DELETE_CLIP_TAGS_FOR_CLIP, {"clip_id": id})
-    # Remove unused tags
-    for (tag_id,) in tag_rows:
-        execute_query(DELETE_UNUSED_TAG, {"tag_id": tag_id})
-    # Finally delete clip
-    execute_query(DELETE_CLIP, {"clip_id": id})
+    execute_batch(_delete_clip_steps(id))
+    _publish("clip_deleted", id=id)
+
+@_writes
+async def delete_clip_async(id: int) -> None:
+    await execute_batch_async(_delete_clip_steps(id))
+    _publish("clip_deleted", id=id)
+
+def _delete_clip_steps(id: int) -> list[BatchStep]:
+    # One transaction: either the clip and all its references go, or nothing does
+    params = {"clip_id": id}
+    return [
+        # Remove favorite if present
+        (DELETE_FAVORITE_FOR_CLIP, params),
+        # Remove tags only this clip uses (must run while its mappings still exist)
+        (DELETE_UNUSED_TAGS_FOR_CLIP, params),
+        # Remove clip tag mappings
+        (DELETE_CLIP_TAGS_FOR_CLIP, params),
+        # Finally delete clip
+        (DELETE_CLIP, params),
+    ]
+
+# Ordered to avoid FK-like leftover references
+_DELETE_ALL_CLIPS_STEPS: list[BatchStep] = [
+    DELETE_ALL_CLIP_TAGS,
+    DELETE_ALL_FAVORITES,
+    DELETE_ALL_CLIPS,
+    DELETE_ALL_TAGS,
+]
 
+@_writes
 def delete_all_clips() -> None:
-    # Ordered to avoid FK-like leftover references
-    execute_query(DELETE_ALL_CLIP_TAGS)
-    execute_query(DELETE_ALL_FAVORITES)
-    execute_query(DELETE_ALL_CLIPS)
-    execute_query(DELETE_ALL_TAGS)
+    execute_batch(_DELETE_ALL_CLIPS_STEPS)
+    _publish("all_clips_deleted")
+
+@_writes
+async def delete_all_clips_async() -> None:
+    await execute_batch_async(_DELETE_ALL_CLIPS_STEPS)
+    _publish("all_clips_deleted")
 
 
 # New static queries
 def get_all_clips_after_id(before_id: int) -> Clips:
     rows = execute_query(GET_ALL_CLIPS_AFTER_ID, {"before_id": before_id})
-    return Clips(clips=[_row_to_clip(r) for r in rows])
+    return _clips_from_rows(rows)
+
+
+async def get_all_clips_after_id_async(before_id: int) -> Clips:
+    rows = await execute_query_async(GET_ALL_CLIPS_AFTER_ID, {"before_id": before_id})
+    return _clips_from_rows(rows)
 
 
 def get_n_clips_before_id(n: int | None, before_id: int) -> Clips:
     rows = execute_query(GET_N_CLIPS_BEFORE_ID, {"n": n, "before_id": before_id})
-    return Clips(clips=[_row_to_clip(r) for r in rows])
+    return _clips_from_rows(rows)
+
+
+async def get_n_clips_before_id_async(n: int | None, before_id: int) -> Clips:
+    rows = await execute_query_async(GET_N_CLIPS_BEFORE_ID, {"n": n, "before_id": before_id})
+    return _clips_from_rows(rows)
 
 
 def get_num_clips() -> int:
@@ -222,13 +540,29 @@ def get_num_clips() -> int:
     return int(rows[0][0]) if rows else 0
 
 
+async def get_num_clips_async() -> int:
+    rows = await execute_query_async(GET_NUM_CLIPS)
+    return int(rows[0][0]) if rows else 0
+
+
+@_writes
 def add_clip_with_timestamp(content: str, timestamp: str, from_app_name: str | None = None) -> None:
     # Convert timestamp to proper DB format
     db_timestamp = _parse_timestamp_for_db(timestamp)
-    execute_query(
+    rows = execute_query(
         ADD_CLIP_WITH_TIMESTAMP,
         {"content": content, "timestamp": db_timestamp, "from_app_name": from_app_name},
     )
+    _publish("clip_added", id=int(rows[0][0]))
+
+
+@_writes
+async def add_clip_with_timestamp_async(content: str, timestamp: str, from_app_name: str | None = None) -> None:
+    rows = await execute_query_async(
+        ADD_CLIP_WITH_TIMESTAMP,
+        {"content": content, "timestamp": _parse_timestamp_for_db(timestamp), "from_app_name": from_app_name},
+    )
+    _publish("clip_added", id=int(rows[0][0]))
 
 
 # Dynamic filter queries
@@ -238,6 +572,8 @@ def _ensure_filters(
     selected_tags: list[str] | None = None,
     selected_apps: list[str] | None = None,
     favorites_only: bool = False,
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
 ) -> Filters:
     return Filters(
         search=search,
@@ -245,6 +581,8 @@ def _ensure_filters(
         selected_tags=selected_tags or [],
         favorites_only=favorites_only,
         selected_apps=selected_apps or [],
+        sort_by_relevance=sort_by_relevance,
+        word_search=word_search,
     )
 
 
@@ -254,16 +592,65 @@ def filter_all_clips(
     selected_tags: list[str] | None = None,
     selected_apps: list[str] | None = None,
     favorites_only: bool = False,
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
+) -> Clips:
+    filters = _ensure_filters(
+        search=search,
+        time_frame=time_frame,
+        selected_tags=selected_tags,
+        selected_apps=selected_apps,
+        favorites_only=favorites_only,
+        sort_by_relevance=sort_by_relevance,
+        word_search=word_search,
+    )
+    def load() -> Clips:
+        rows = execute_dynamic_query(lambda: filter_all_clips_query(filters, preview=preview))
+        return _clips_from_rows(rows)
+    return _cached_filtered("filter_all_clips", filters, (preview,), load)
+
+
+async def filter_all_clips_async(
+    search: str = "",
+    time_frame: str = "",
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
 ) -> Clips:
+    filters = _ensure_filters(
+        search, time_frame, selected_tags, selected_apps, favorites_only, sort_by_relevance, word_search
+    )
+    async def load() -> Clips:
+        rows = await execute_dynamic_query_async(lambda: filter_all_clips_query(filters, preview=preview))
+        return _clips_from_rows(rows)
+    return await _cached_filtered_async("filter_all_clips", filters, (preview,), load)
+
+
+def stream_filter_all_clips(
+    search: str = "",
+    time_frame: str = "",
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+) -> Iterator[Clip]:
+    """Streaming twin of filter_all_clips: yields clips as rows arrive from the DB."""
     filters = _ensure_filters(
         search=search,
         time_frame=time_frame,
         selected_tags=selected_tags,
         selected_apps=selected_apps,
         favorites_only=favorites_only,
+        sort_by_relevance=sort_by_relevance,
+        word_search=word_search,
     )
-    rows = execute_dynamic_query(lambda: filter_all_clips_query(filters))
-    return Clips(clips=[_row_to_clip(r) for r in rows])
+    for row in iterate_dynamic_query(lambda: filter_all_clips_query(filters)):
+        yield _clip_from_row(row)
 
 
 def filter_n_clips(
@@ -273,6 +660,9 @@ def filter_n_clips(
     selected_tags: list[str] | None = None,
     selected_apps: list[str] | None = None,
     favorites_only: bool = False,
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
 ) -> Clips:
     filters = Filters(
         search=search,
@@ -280,9 +670,33 @@ def filter_n_clips(
         selected_tags=selected_tags or [],
     favorites_only=favorites_only,
     selected_apps=selected_apps or [],
+    sort_by_relevance=sort_by_relevance,
+    word_search=word_search,
+    )
+    def load() -> Clips:
+        rows = execute_dynamic_query(lambda: filter_n_clips_query(filters, n=n, preview=preview))
+        return _clips_from_rows(rows)
+    return _cached_filtered("filter_n_clips", filters, (n, preview), load)
+
+
+async def filter_n_clips_async(
+    search: str = "",
+    time_frame: str = "",
+    n: int | None = None,
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    sort_by_relevance: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
+) -> Clips:
+    filters = _ensure_filters(
+        search, time_frame, selected_tags, selected_apps, favorites_only, sort_by_relevance, word_search
     )
-    rows = execute_dynamic_query(lambda: filter_n_clips_query(filters, n=n))
-    return Clips(clips=[_row_to_clip(r) for r in rows])
+    async def load() -> Clips:
+        rows = await execute_dynamic_query_async(lambda: filter_n_clips_query(filters, n=n, preview=preview))
+        return _clips_from_rows(rows)
+    return await _cached_filtered_async("filter_n_clips", filters, (n, preview), load)
 
 
 def filter_all_clips_after_id(
@@ -292,6 +706,8 @@ def filter_all_clips_after_id(
     selected_tags: list[str] | None = None,
     selected_apps: list[str] | None = None,
     favorites_only: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
 ) -> Clips:
     filters = Filters(
         search=search,
@@ -299,9 +715,31 @@ def filter_all_clips_after_id(
         selected_tags=selected_tags or [],
     favorites_only=favorites_only,
     selected_apps=selected_apps or [],
+    word_search=word_search,
+    )
+    def load() -> Clips:
+        rows = execute_dynamic_query(lambda: filter_all_clips_after_id_query(filters, after_id=after_id, preview=preview))
+        return _clips_from_rows(rows)
+    return _cached_filtered("filter_all_clips_after_id", filters, (after_id, preview), load)
+
+
+async def filter_all_clips_after_id_async(
+    search: str = "",
+    time_frame: str = "",
+    after_id: int = 0,
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
+) -> Clips:
+    filters = _ensure_filters(
+        search, time_frame, selected_tags, selected_apps, favorites_only, word_search=word_search
     )
-    rows = execute_dynamic_query(lambda: filter_all_clips_after_id_query(filters, after_id=after_id))
-    return Clips(clips=[_row_to_clip(r) for r in rows])
+    async def load() -> Clips:
+        rows = await execute_dynamic_query_async(lambda: filter_all_clips_after_id_query(filters, after_id=after_id, preview=preview))
+        return _clips_from_rows(rows)
+    return await _cached_filtered_async("filter_all_clips_after_id", filters, (after_id, preview), load)
 
 
 def filter_n_clips_before_id(
@@ -312,6 +750,8 @@ def filter_n_clips_before_id(
     selected_tags: list[str] | None = None,
     selected_apps: list[str] | None = None,
     favorites_only: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
 ) -> Clips:
     filters = Filters(
         search=search,
@@ -319,13 +759,38 @@ def filter_n_clips_before_id(
         selected_tags=selected_tags or [],
     favorites_only=favorites_only,
     selected_apps=selected_apps or [],
+    word_search=word_search,
     )
-    rows = execute_dynamic_query(
-        lambda: filter_n_clips_before_id_query(
-            filters, n=n, before_id=before_id
+    def load() -> Clips:
+        rows = execute_dynamic_query(
+            lambda: filter_n_clips_before_id_query(
+                filters, n=n, before_id=before_id, preview=preview
+            )
         )
+        return _clips_from_rows(rows)
+    return _cached_filtered("filter_n_clips_before_id", filters, (n, before_id, preview), load)
+
+
+async def filter_n_clips_before_id_async(
+    search: str = "",
+    time_frame: str = "",
+    n: int | None = None,
+    before_id: int = 0,
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    word_search: bool = False,
+    preview: bool = False,
+) -> Clips:
+    filters = _ensure_filters(
+        search, time_frame, selected_tags, selected_apps, favorites_only, word_search=word_search
     )
-    return Clips(clips=[_row_to_clip(r) for r in rows])
+    async def load() -> Clips:
+        rows = await execute_dynamic_query_async(
+            lambda: filter_n_clips_before_id_query(filters, n=n, before_id=before_id, preview=preview)
+        )
+        return _clips_from_rows(rows)
+    return await _cached_filtered_async("filter_n_clips_before_id", filters, (n, before_id, preview), load)
 
 
 def get_num_filtered_clips(
@@ -334,6 +799,7 @@ def get_num_filtered_clips(
     selected_tags: list[str] | None = None,
     selected_apps: list[str] | None = None,
     favorites_only: bool = False,
+    word_search: bool = False,
 ) -> int:
     filters = Filters(
         search=search,
@@ -341,40 +807,226 @@ def get_num_filtered_clips(
         selected_tags=selected_tags or [],
     favorites_only=favorites_only,
     selected_apps=selected_apps or [],
+    word_search=word_search,
     )
-    rows = execute_dynamic_query(lambda: get_num_filtered_clips_query(filters))
-    return int(rows[0][0]) if rows else 0
+    def load() -> int:
+        rows = execute_dynamic_query(lambda: get_num_filtered_clips_query(filters))
+        return int(rows[0][0]) if rows else 0
+    return _cached_filtered("get_num_filtered_clips", filters, (), load)
+
+
+async def get_num_filtered_clips_async(
+    search: str = "",
+    time_frame: str = "",
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    word_search: bool = False,
+) -> int:
+    filters = _ensure_filters(
+        search, time_frame, selected_tags, selected_apps, favorites_only, word_search=word_search
+    )
+    async def load() -> int:
+        rows = await execute_dynamic_query_async(lambda: get_num_filtered_clips_query(filters))
+        return int(rows[0][0]) if rows else 0
+    return await _cached_filtered_async("get_num_filtered_clips", filters, (), load)
+
+
+# Cursor pagination
+def _filters_fingerprint(filters: Filters) -> str:
+    """Short stable hash of the filters a cursor was issued for."""
+    data = filters.model_dump(exclude={"sort_by_relevance"})
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def _encode_cursor(before_id: int, filters: Filters) -> str:
+    payload = json.dumps({"before_id": before_id, "filters": _filters_fingerprint(filters)})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, filters: Filters) -> int:
+    """Return the cursor's position, rejecting malformed cursors and cursors issued for other filters."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        before_id = payload["before_id"]
+        fingerprint = payload["filters"]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(before_id, int) or fingerprint != _filters_fingerprint(filters):
+        raise ValueError("Cursor does not match these filters; restart from the first page")
+    return before_id
+
+
+def get_clips_page(
+    search: str = "",
+    time_frame: str = "",
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    word_search: bool = False,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    preview: bool = False,
+) -> ClipsPage:
+    """Return one page of filtered clips, newest first, plus the cursor for the next page.
+
+    `limit` is clamped to MAX_PAGE_SIZE. Raises ValueError for an invalid cursor.
+    """
+    filters, before_id, limit = _page_request(
+        search, time_frame, selected_tags, selected_apps, favorites_only, word_search, cursor, limit
+    )
+
+    def load() -> ClipsPage:
+        # Fetch one extra row to learn whether another page follows
+        rows = execute_dynamic_query(
+            lambda: filter_clips_page_query(filters, before_id=before_id, limit=limit + 1, preview=preview)
+        )
+        return _page_from_rows(rows, filters, limit)
+    return _cached_filtered("get_clips_page", filters, (before_id, limit, preview), load)
+
+
+async def get_clips_page_async(
+    search: str = "",
+    time_frame: str = "",
+    selected_tags: list[str] | None = None,
+    selected_apps: list[str] | None = None,
+    favorites_only: bool = False,
+    word_search: bool = False,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    preview: bool = False,
+) -> ClipsPage:
+    filters, before_id, limit = _page_request(
+        search, time_frame, selected_tags, selected_apps, favorites_only, word_search, cursor, limit
+    )
+
+    async def load() -> ClipsPage:
+        rows = await execute_dynamic_query_async(
+            lambda: filter_clips_page_query(filters, before_id=before_id, limit=limit + 1, preview=preview)
+        )
+        return _page_from_rows(rows, filters, limit)
+    return await _cached_filtered_async("get_clips_page", filters, (before_id, limit, preview), load)
+
+
+def _page_request(
+    search: str,
+    time_frame: str,
+    selected_tags: list[str] | None,
+    selected_apps: list[str] | None,
+    favorites_only: bool,
+    word_search: bool,
+    cursor: str | None,
+    limit: int,
+) -> tuple[Filters, int | None, int]:
+    """Validate a page request: its filters, the position its cursor points at, and the clamped limit."""
+    filters = _ensure_filters(
+        search=search,
+        time_frame=time_frame,
+        selected_tags=selected_tags,
+        selected_apps=selected_apps,
+        favorites_only=favorites_only,
+        word_search=word_search,
+    )
+    before_id = _decode_cursor(cursor, filters) if cursor else None
+    return filters, before_id, max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _page_from_rows(rows: list[tuple], filters: Filters, limit: int) -> ClipsPage:
+    """Turn up to `limit + 1` rows into a page; the extra row only signals that another page follows."""
+    clips = [_clip_from_row(r) for r in rows[:limit]]
+    next_cursor = _encode_cursor(clips[-1].id, filters) if len(rows) > limit else None
+    return ClipsPage.model_construct(clips=clips, next_cursor=next_cursor)
 
 
 # Tag methods
+@_writes
 def add_clip_tag(clip_id: int, tag_name: str) -> None:
+    execute_batch(_add_clip_tag_steps(clip_id, tag_name))
+    _publish("clip_tagged", clip_id=clip_id, tag_name=tag_name)
+
+
+@_writes
+async def add_clip_tag_async(clip_id: int, tag_name: str) -> None:
+    await execute_batch_async(_add_clip_tag_steps(clip_id, tag_name))
+    _publish("clip_tagged", clip_id=clip_id, tag_name=tag_name)
+
+
+def _add_clip_tag_steps(clip_id: int, tag_name: str) -> list[BatchStep]:
     # Ensure tag row exists first, then map
-    execute_query(ADD_TAG_IF_NOT_EXISTS, {"tag_name": tag_name})
-    execute_query(ADD_CLIP_TAG, {"clip_id": clip_id, "tag_name": tag_name})
+    return [
+        (ADD_TAG_IF_NOT_EXISTS, {"tag_name": tag_name}),
+        (ADD_CLIP_TAG, {"clip_id": clip_id, "tag_name": tag_name}),
+    ]
 
 
+@_writes
 def remove_clip_tag(clip_id: int, tag_id: int) -> None:
-    execute_query(REMOVE_CLIP_TAG, {"clip_id": clip_id, "tag_id": tag_id})
-    execute_query(DELETE_UNUSED_TAG, {"tag_id": tag_id})
+    execute_batch(_remove_clip_tag_steps(clip_id, tag_id))
+    _publish("clip_untagged", clip_id=clip_id, tag_id=tag_id)
 
 
-def get_all_tags() -> Tags:
-    rows = execute_query(GET_ALL_TAGS)
+@_writes
+async def remove_clip_tag_async(clip_id: int, tag_id: int) -> None:
+    await execute_batch_async(_remove_clip_tag_steps(clip_id, tag_id))
+    _publish("clip_untagged", clip_id=clip_id, tag_id=tag_id)
+
+
+def _remove_clip_tag_steps(clip_id: int, tag_id: int) -> list[BatchStep]:
+    return [
+        (REMOVE_CLIP_TAG, {"clip_id": clip_id, "tag_id": tag_id}),
+        (DELETE_UNUSED_TAG, {"tag_id": tag_id}),
+    ]
+
+
+def _tags_from_rows(rows: list[tuple]) -> Tags:
     return Tags(tags=[Tag(id=int(r[0]), name=str(r[1])) for r in rows])
 
 
+def get_all_tags() -> Tags:
+    return _cached(("get_all_tags",), lambda: _tags_from_rows(execute_query(GET_ALL_TAGS)))
+
+
+async def get_all_tags_async() -> Tags:
+    async def load() -> Tags:
+        return _tags_from_rows(await execute_query_async(GET_ALL_TAGS))
+    return await _cached_async(("get_all_tags",), load)
+
+
 def get_num_clips_per_tag(tag_id: int) -> int:
     rows = execute_query(GET_NUM_CLIPS_PER_TAG, {"tag_id": tag_id})
     return int(rows[0][0]) if rows else 0
 
 
+async def get_num_clips_per_tag_async(tag_id: int) -> int:
+    rows = await execute_query_async(GET_NUM_CLIPS_PER_TAG, {"tag_id": tag_id})
+    return int(rows[0][0]) if rows else 0
+
+
 # Favorites methods
+@_writes
 def add_favorite(clip_id: int) -> None:
     execute_query(ADD_FAVORITE, {"clip_id": clip_id})
+    _publish("clip_favorited", clip_id=clip_id)
+
+
+@_writes
+async def add_favorite_async(clip_id: int) -> None:
+    await execute_query_async(ADD_FAVORITE, {"clip_id": clip_id})
+    _publish("clip_favorited", clip_id=clip_id)
 
 
+@_writes
 def remove_favorite(clip_id: int) -> None:
     execute_query(REMOVE_FAVORITE, {"clip_id": clip_id})
+    _publish("clip_unfavorited", clip_id=clip_id)
+
+
+@_writes
+async def remove_favorite_async(clip_id: int) -> None:
+    await execute_query_async(REMOVE_FAVORITE, {"clip_id": clip_id})
+    _publish("clip_unfavorited", clip_id=clip_id)
 
 
 def get_all_favorites() -> FavoriteClipIDs:
@@ -382,14 +1034,124 @@ def get_all_favorites() -> FavoriteClipIDs:
     return FavoriteClipIDs(clip_ids=[int(r[0]) for r in rows])
 
 
+async def get_all_favorites_async() -> FavoriteClipIDs:
+    rows = await execute_query_async(GET_ALL_FAVORITES)
+    return FavoriteClipIDs(clip_ids=[int(r[0]) for r in rows])
+
+
 def get_num_favorites() -> int:
     rows = execute_query(GET_NUM_FAVORITES)
     return int(rows[0][0]) if rows else 0
 
 
+async def get_num_favorites_async() -> int:
+    rows = await execute_query_async(GET_NUM_FAVORITES)
+    return int(rows[0][0]) if rows else 0
+
+
+# Retention
+def _retention_steps(policy: RetentionPolicy, batch_size: int) -> list[BatchStep]:
+    steps: list[BatchStep] = []
+    if policy.max_clips is not None:
+        steps.append((EVICT_CLIPS_OVER_COUNT, {"max_clips": policy.max_clips, "batch_size": batch_size}))
+    if policy.max_age_days is not None:
+        steps.append((EVICT_CLIPS_OVER_AGE, {"max_age": f"-{policy.max_age_days} days", "batch_size": batch_size}))
+    if policy.max_bytes is not None:
+        steps.append((EVICT_CLIPS_OVER_BYTES, {"max_bytes": policy.max_bytes, "batch_size": batch_size}))
+    return steps
+
+
+def _evicted_ids(results: list[list[tuple]]) -> list[int]:
+    ids = [row[0] for rows in results for row in rows]
+    if ids:
+        # Not @_writes: a pass that evicts nothing should leave the cache alone
+        _result_cache.bump()
+        _publish("clips_evicted", ids=ids)
+    return ids
+
+
+def enforce_retention(policy: RetentionPolicy | None = None, batch_size: int = RETENTION_BATCH_SIZE) -> int:
+    """Evict the oldest clips beyond the retention limits; returns how many were removed.
+
+    Each batch of at most `batch_size` clips per limit is its own short
+    transaction, so other reads and writes run between batches. The policy
+    defaults to the CLIPBOARD_RETENTION_* env vars.
+    """
+    steps = _retention_steps(policy or RetentionPolicy.from_env(), batch_size)
+    removed = 0
+    while steps:
+        ids = _evicted_ids(execute_batch(steps))
+        if not ids:
+            break
+        removed += len(ids)
+    return removed
+
+
+async def enforce_retention_async(policy: RetentionPolicy | None = None, batch_size: int = RETENTION_BATCH_SIZE) -> int:
+    steps = _retention_steps(policy or RetentionPolicy.from_env(), batch_size)
+    removed = 0
+    while steps:
+        ids = _evicted_ids(await execute_batch_async(steps))
+        if not ids:
+            break
+        removed += len(ids)
+    return removed
+
+
+async def run_retention(policy: RetentionPolicy, interval: float = RETENTION_INTERVAL_SECONDS) -> None:
+    """Background task: enforce `policy` every `interval` seconds until cancelled."""
+    while True:
+        try:
+            await enforce_retention_async(policy)
+        except (RuntimeError, TimeoutError) as exc:
+            # Try again next round; the limits are only exceeded for a little longer
+            print(f"Retention pass failed: {exc}", file=sys.stderr)
+        await asyncio.sleep(interval)
+
+
+# Counters
+def check_counters() -> list[tuple[str, int, int]]:
+    """Return (name, stored, actual) for every counter that has drifted from its table.
+
+    get_num_clips, get_num_favorites and get_num_clips_per_tag read these
+    counters instead of counting rows; per-tag counters are named "tag:<id>".
+    """
+    return [(name, int(stored or 0), int(actual)) for name, stored, actual in execute_query(CHECK_COUNTERS)]
+
+
+def rebuild_counters() -> None:
+    """Recount every counter from scratch, in one transaction."""
+    execute_batch([
+        REBUILD_COUNTERS,
+        DELETE_ALL_TAG_COUNTERS,
+        REBUILD_TAG_COUNTERS,
+    ])
+
+
+def get_data_version() -> int:
+    """Return the DB data version, which moves on every change to clips, tags or favorites.
+
+    Kept by triggers, so it also sees writes made by other processes (unlike
+    the result cache's version).
+    """
+    return int(execute_query(GET_DATA_VERSION)[0][0])
+
+
+async def get_data_version_async() -> int:
+    return int((await execute_query_async(GET_DATA_VERSION))[0][0])
+
+
 # From apps
-def get_all_from_apps() -> list[str]:
-    rows = execute_query(GET_ALL_FROM_APPS)
+def _apps_from_rows(rows: list[tuple]) -> tuple[str, ...]:
     # Rows may contain None (clips without app); include as None or filter out? We'll keep non-null only for cleanliness.
-    apps = [r[0] for r in rows if r[0] is not None]
-    return apps
+    return tuple(r[0] for r in rows if r[0] is not None)
+
+
+def get_all_from_apps() -> list[str]:
+    return list(_cached(("get_all_from_apps",), lambda: _apps_from_rows(execute_query(GET_ALL_FROM_APPS))))
+
+
+async def get_all_from_apps_async() -> list[str]:
+    async def load() -> tuple[str, ...]:
+        return _apps_from_rows(await execute_query_async(GET_ALL_FROM_APPS))
+    return list(await _cached_async(("get_all_from_apps",), load))
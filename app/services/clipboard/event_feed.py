@@ -0,0 +1,85 @@
+"""In-process feed of clip change events, read by the /clipboard/events stream.
+
+Service writes publish an event once their transaction has committed. Events
+get increasing IDs and the most recent ones are kept in a ring buffer, so a
+client that reconnects with the last ID it saw receives everything it missed.
+Waiting subscribers sleep on an asyncio.Event that `publish` sets, so an idle
+client costs neither DB queries nor polling.
+
+Like the result cache, only writes through this process's service layer are
+seen. IDs restart with the process: resuming from an ID the buffer cannot
+serve (too old, or from before a restart) yields None, and the client has to
+reload instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class ClipEvent:
+    id: int
+    type: str
+    data: dict[str, Any]
+
+
+class EventFeed:
+    def __init__(self, max_events: int) -> None:
+        self._events: deque[ClipEvent] = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def last_id(self) -> int:
+        with self._lock:
+            return self._last_id
+
+    def publish(self, type: str, data: dict[str, Any]) -> ClipEvent:
+        """Append an event and wake every waiting subscriber (callable from any thread)."""
+        with self._lock:
+            self._last_id += 1
+            event = ClipEvent(self._last_id, type, data)
+            self._events.append(event)
+            waiters = list(self._waiters)
+        for loop, woken in waiters:
+            try:
+                loop.call_soon_threadsafe(woken.set)
+            except RuntimeError:
+                pass  # that subscriber's loop is closed
+        return event
+
+    def since(self, last_id: int) -> list[ClipEvent] | None:
+        """Events after `last_id`, oldest first; None if some of them are no longer buffered."""
+        with self._lock:
+            if last_id > self._last_id:
+                return None
+            oldest = self._events[0].id if self._events else self._last_id + 1
+            if last_id < oldest - 1:
+                return None
+            return list(itertools.islice(self._events, max(last_id - oldest + 1, 0), None))
+
+    async def wait(self, last_id: int, timeout: float) -> list[ClipEvent] | None:
+        """Like `since`, but wait up to `timeout` seconds for an event; [] if none came."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        # Registered before looking, so an event published in between still wakes us
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            events = self.since(last_id)
+            if events == []:
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+                except TimeoutError:
+                    return []
+                events = self.since(last_id)
+            return events
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
@@ -0,0 +1,93 @@
+"""Bounded LRU cache for read results, invalidated by a data version that writes bump.
+
+Every service write calls `bump()`, which moves the cache to a new data version
+and drops all entries. A read that was already running when the version moved
+still returns its result to its caller but does not store it, so a cache entry
+never predates the last write it could have missed.
+
+Writes that bypass the service layer (another process on the same DB, or
+`execute_query` called directly) are not seen; call `bump()` after them.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class ResultCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_load(self, key: Hashable, load: Callable[[], T]) -> T:
+        """Return the cached value for `key`, or call `load()` and cache its result.
+
+        Cached values are shared between callers and must not be mutated.
+        """
+        hit, value, version = self._lookup(key)
+        if hit:
+            return value
+        value = load()
+        self._store(key, value, version)
+        return value
+
+    async def get_or_load_async(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        """Async get_or_load: awaits `load()` on a miss."""
+        hit, value, version = self._lookup(key)
+        if hit:
+            return value
+        value = await load()
+        self._store(key, value, version)
+        return value
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any, int]:
+        """Return (hit, value, data version the miss is loaded under)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True, self._entries[key], self._version
+            self._misses += 1
+            return False, None, self._version
+
+    def _store(self, key: Hashable, value: Any, version: int) -> None:
+        with self._lock:
+            if self._version == version and self.max_entries > 0:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+
+    def bump(self) -> None:
+        """Start a new data version: forget every cached result."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def clear(self) -> None:
+        """Forget every cached result and reset the statistics."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "data_version": self._version,
+            }
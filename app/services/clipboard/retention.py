@@ -0,0 +1,40 @@
+"""Retention limits that keep the clip history bounded.
+
+`clipboard_service.enforce_retention` evicts the oldest clips beyond these
+limits, a small batch per transaction. Favorite and tagged clips are never
+evicted, but they still count toward the limits. Each limit is off unless its
+env var is set (to a positive number).
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+# Env vars with the limits: most clips kept, oldest clip age in days, and most total content size in UTF-8 bytes
+MAX_CLIPS_ENV: str = "CLIPBOARD_RETENTION_MAX_CLIPS"
+MAX_AGE_DAYS_ENV: str = "CLIPBOARD_RETENTION_MAX_AGE_DAYS"
+MAX_BYTES_ENV: str = "CLIPBOARD_RETENTION_MAX_BYTES"
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    max_clips: int | None = None
+    max_age_days: float | None = None
+    max_bytes: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return any(limit is not None for limit in (self.max_clips, self.max_age_days, self.max_bytes))
+
+    @classmethod
+    def from_env(cls) -> RetentionPolicy:
+        def limit(env: str, parse: type[int] | type[float]) -> int | float | None:
+            value = parse(os.getenv(env) or 0)
+            return value if value > 0 else None
+
+        return cls(
+            max_clips=limit(MAX_CLIPS_ENV, int),  # type: ignore[arg-type]
+            max_age_days=limit(MAX_AGE_DAYS_ENV, float),
+            max_bytes=limit(MAX_BYTES_ENV, int),  # type: ignore[arg-type]
+        )
@@ -0,0 +1,116 @@
+"""
+Measure what compressing large clip contents saves, and what it costs on reads.
+
+Seeds two throwaway databases with the same clips (mostly short snippets, some
+log-file sized), one with compression as configured and one with it disabled
+(COMPRESS_MIN_BYTES raised past every clip). Reports the database file size and
+the latency of the list, filter and search queries on each.
+
+Uses the in-process sqlite backend, so the threshold can be switched per run.
+
+Run directly:
+    python scripts/bench_compression.py [--clips 20000] [--large-every 10] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure we can import the app package when running as a script
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+import app.db.db as dbmod
+import app.db.functions as functions
+from app.db.backends import BACKEND_ENV, close_backends
+from app.core.constants import ADD_CLIPS, GET_ALL_CLIPS, GET_N_CLIPS
+from app.db.queries.filter_clips_dynamic_queries import filter_n_clips_query
+from app.models.clipboard.filters import Filters
+
+
+def _time_calls(fn, repeat: int) -> tuple[float, float]:
+    """Return (median, max) latency in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def make_clips(clips: int, large_every: int) -> list[dict]:
+    rng = random.Random(42)
+    words = "request handler timeout retry cache worker queue batch commit session token user".split()
+    items = []
+    for i in range(clips):
+        if i % large_every == 0:
+            # A pasted log file: 10-60 KiB of similar lines
+            lines = [
+                f"2024-05-{rng.randint(1, 28):02d} 12:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} "
+                f"{rng.choice(['INFO', 'WARN', 'DEBUG'])} {' '.join(rng.choices(words, k=8))} id={rng.randint(0, 10**6)}"
+                for _ in range(rng.randint(120, 700))
+            ]
+            content = "\n".join(lines)
+        else:
+            content = " ".join(rng.choices(words, k=rng.randint(3, 30)))
+        items.append({"content": f"#{i} {content}", "from_app_name": None, "timestamp": "2024-01-01 00:00:00"})
+    return items
+
+
+def bench_one(label: str, items: list[dict], repeat: int, tmp: str) -> None:
+    dbmod.DB_PATH = Path(tmp) / f"{label}.db"
+    with contextlib.redirect_stdout(io.StringIO()):  # silence schema logging
+        dbmod.init_db()
+    dbmod.execute_query(ADD_CLIPS, {"clips": json.dumps(items)})
+    close_backends()  # checkpoints the WAL into the main file
+    size = dbmod.DB_PATH.stat().st_size / 2**20
+
+    search = Filters(search="timeout retry")
+    calls = {
+        "get_n_clips(50)": lambda: dbmod.execute_query(GET_N_CLIPS, {"n": 50}),
+        "get_all_clips": lambda: dbmod.execute_query(GET_ALL_CLIPS),
+        "search, 50 newest": lambda: dbmod.execute_dynamic_query(lambda: filter_n_clips_query(search), (50,)),
+    }
+    print(f"{label:<11} db file {size:8.1f} MiB")
+    for name, call in calls.items():
+        call()  # warm the page cache and statement cache
+        median, worst = _time_calls(call, repeat)
+        print(f"{'':<11} {name:<18} p50 {median:9.1f} ms  max {worst:9.1f} ms")
+    close_backends()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=20_000)
+    parser.add_argument("--large-every", type=int, default=10, help="every Nth clip is log-file sized")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ[BACKEND_ENV] = "sqlite"
+    items = make_clips(args.clips, args.large_every)
+    total = sum(len(item["content"].encode("utf-8")) for item in items) / 2**20
+    print(f"{args.clips} clips, {total:.1f} MiB of content")
+
+    threshold = functions.COMPRESS_MIN_BYTES
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_one("compressed", items, args.repeat, tmp)
+        functions.COMPRESS_MIN_BYTES = sys.maxsize
+        try:
+            bench_one("plain", items, args.repeat, tmp)
+        finally:
+            functions.COMPRESS_MIN_BYTES = threshold
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare query latency across the DB backends on a throwaway database.
+
+Each backend gets its own temp DB seeded with the same clips, then runs a few
+representative queries repeatedly. Backends that are not usable here (e.g. no
+Node driver, no sqlcipher3) are reported and skipped.
+
+Run directly:
+    python scripts/bench_db_backends.py [--clips 1000] [--repeat 200] [node sqlcipher sqlite]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+# Ensure we can import the app package when running as a script
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+import app.db.db as dbmod
+from app.db.backends import BACKEND_ENV, BACKENDS
+from app.core.constants import ADD_CLIP, GET_N_CLIPS, GET_NUM_CLIPS
+
+
+def _time_calls(fn, repeat: int) -> tuple[float, float]:
+    """Return (median, p95) latency in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def bench(backend: str, clips: int, repeat: int) -> None:
+    os.environ[BACKEND_ENV] = backend
+    with tempfile.TemporaryDirectory() as tmp:
+        dbmod.DB_PATH = Path(tmp) / "bench.db"
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # silence schema logging
+                dbmod.init_db()
+        except Exception as exc:  # report unusable backends and move on
+            print(f"{backend:<10} skipped: {str(exc).splitlines()[0]}")
+            return
+
+        insert_start = time.perf_counter()
+        for i in range(clips):
+            dbmod.execute_query(ADD_CLIP, {"content": f"bench clip {i}", "from_app_name": "Bench"})
+        insert_ms = (time.perf_counter() - insert_start) * 1000 / clips
+
+        recent = _time_calls(lambda: dbmod.execute_query(GET_N_CLIPS, {"n": 50}), repeat)
+        count = _time_calls(lambda: dbmod.execute_query(GET_NUM_CLIPS), repeat)
+        print(
+            f"{backend:<10} insert {insert_ms:8.3f} ms/clip | "
+            f"get_n_clips(50) p50 {recent[0]:7.3f} p95 {recent[1]:7.3f} ms | "
+            f"get_num_clips p50 {count[0]:7.3f} p95 {count[1]:7.3f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("backends", nargs="*", default=list(BACKENDS))
+    parser.add_argument("--clips", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        bench(backend, args.clips, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compare the persistent Node runner's wire protocols on large results.
+
+Seeds a throwaway database with clips, then reads 10k and 100k rows
+(get_n_clips) through the Node backend with CLIPBOARD_DB_RUNNER_PROTOCOL set to
+each protocol in turn. Reports the latency of the whole call (runner encoding,
+pipe transfer and Python decoding) and the Python-side peak memory of one call.
+
+Run directly:
+    python scripts/bench_wire_protocol.py [--rows 10000 100000] [--repeat 5] [binary json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+# Ensure we can import the app package when running as a script
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+import app.db.db as dbmod
+from app.db.backends import BACKEND_ENV, RUNNER_PROTOCOL_ENV, close_backends
+from app.core.constants import ADD_CLIPS, GET_N_CLIPS
+
+
+def _time_calls(fn, repeat: int) -> tuple[float, float]:
+    """Return (median, max) latency in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def _peak_mib(fn) -> float:
+    """Python-side peak memory allocated while running `fn` once, in MiB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def seed(clips: int) -> None:
+    items = [
+        {
+            "content": f"bench clip {i} " + "lorem ipsum dolor sit amet " * (i % 8),
+            "from_app_name": "Bench" if i % 3 else None,
+            "timestamp": "2024-01-01 00:00:00",
+        }
+        for i in range(clips)
+    ]
+    dbmod.execute_query(ADD_CLIPS, {"clips": json.dumps(items)})
+
+
+def bench(protocols: list[str], rows: list[int], repeat: int) -> None:
+    os.environ[BACKEND_ENV] = "node"
+    os.environ.setdefault(dbmod.DB_KEY_ENV, "bench-key")  # throwaway DB
+    with tempfile.TemporaryDirectory() as tmp:
+        dbmod.DB_PATH = Path(tmp) / "bench.db"
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # silence schema logging
+                dbmod.init_db()
+            seed(max(rows))
+        except Exception as exc:  # e.g. no Node driver here
+            print(f"skipped: {str(exc).splitlines()[0]}")
+            return
+
+        for protocol in protocols:
+            # A fresh backend (and runner) picks up the protocol
+            close_backends()
+            os.environ[RUNNER_PROTOCOL_ENV] = protocol
+            for n in rows:
+                call = lambda: dbmod.execute_query(GET_N_CLIPS, {"n": n})
+                assert len(call()) == n  # also warms the runner's statement cache
+                median, worst = _time_calls(call, repeat)
+                peak = _peak_mib(call)
+                print(
+                    f"{protocol:<7} {n:>7} rows | p50 {median:9.1f} ms  max {worst:9.1f} ms | "
+                    f"python peak {peak:7.1f} MiB"
+                )
+        close_backends()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("protocols", nargs="*", default=["binary", "json"])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bench(args.protocols, args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
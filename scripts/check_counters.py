@@ -0,0 +1,49 @@
+"""
+Check the trigger-maintained row counters (Counters, TagCounters) against the
+tables they count, and optionally rebuild them.
+
+Exits with status 1 if drift was found and not repaired.
+
+Run directly:
+    python scripts/check_counters.py [--rebuild]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+# Ensure we can import the app package when running as a script
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from app.services.clipboard.clipboard_service import check_counters, rebuild_counters
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="recount every counter if any has drifted")
+    args = parser.parse_args()
+
+    drift = check_counters()
+    if not drift:
+        print("Counters are consistent")
+        return 0
+
+    for name, stored, actual in drift:
+        print(f"{name}: stored {stored}, actual {actual}")
+    if not args.rebuild:
+        print("Run with --rebuild to repair")
+        return 1
+
+    rebuild_counters()
+    remaining = check_counters()
+    print("Counters rebuilt" if not remaining else f"{len(remaining)} counters still differ")
+    return 1 if remaining else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,151 @@
 #!/usr/bin/env node
 /**
- * JSON-over-stdin DB runner using better-sqlcipher3 for SQLCipher encryption.
+ * JSON DB runner using better-sqlcipher3 for SQLCipher encryption.
  *
- * Input JSON schema (stdin):
+ * Two modes are supported:
+ *
+ * - One-shot (default): read a single JSON request from stdin, execute it,
+ *   write a single JSON response to stdout and exit.
+ * - Persistent (`--serve`): read newline-delimited JSON requests from stdin
+ *   and answer each with one JSON line on stdout carrying the same `id`.
+ *   Opened (keyed) connections are kept for the lifetime of the process.
+ *
+ * Registered queries: every `*.sql` file in the `--queries` directory (default
+ * app/db/queries) is loaded at startup and addressed by its file stem. The
+ * persistent runner also prepares each one against an in-memory copy of the
+ * `--schema` tables/indexes/triggers/views and exits with an error if any fails
+ * to prepare. Each connection keeps its prepared statements: registered queries
+ * by name, dynamic SQL in an LRU keyed by the SQL text.
+ *
+ * Input JSON schema:
  * {
- *   op: 'sql' | 'file' | 'exec',
+ *   id?: number,         // correlation id (persistent mode)
+ *   op: 'query' | 'sql' | 'file' | 'exec' | 'batch',
+ *   query?: string,      // for op=query: name of a registered query (file stem in --queries)
  *   sql?: string,        // for op=sql/exec
  *   file?: string,       // for op=file
  *   params?: any[]|object,
+ *   steps?: { query?: string, sql?: string, file?: string, params?: any[]|object }[],  // for op=batch
  *   dbPath: string,      // absolute path to DB
  *   key: string          // SQLCipher key
  * }
  *
- * Output JSON schema (stdout):
- * { ok: true, rows?: any[] } | { ok: false, error: string }
+ * Output JSON schema:
+ * { id?: number, ok: true, rows?: any[] } | { id?: number, ok: false, error: string }
+ *
+ * op=batch runs every step inside one transaction (all or nothing) and answers
+ * { ok: true, results: any[][] } with one rows array per step.
+ *
+ * Persistent mode also streams large reads through server-side cursors:
+ * - { op: 'iterate', query|sql|file, params, dbPath, key } -> { ok: true, cursor: number }
+ * - { op: 'next', cursor, count } -> { ok: true, rows: any[], done: boolean }
+ * - { op: 'close', cursor } -> { ok: true }
+ * Each cursor reads through its own connection (an iterating connection cannot
+ * run other statements). Finished cursors hand their connection back to a small
+ * per-database idle list, so a new stream usually skips the SQLCipher key
+ * derivation. At most MAX_OPEN_CURSORS streams are open at once; further
+ * `iterate` requests are rejected (never by closing a live stream), and the
+ * caller may retry once a stream finishes.
+ *
+ * `--serve --protocol binary` swaps the JSON lines for length-prefixed frames
+ * (all integers little-endian); app/db/wire.py is the Python side:
+ * - request: u32 length, UTF-8 JSON request
+ * - response: u32 length, u32 id (0 = none), u8 kind, body
+ *   - kind 0 (JSON): UTF-8 JSON of the response without its id
+ *   - kind 1 (ROWS): u8 done (0/1, 2 = not a cursor read), one row set
+ *   - kind 2 (RESULTS): u32 count, that many row sets (op=batch)
+ * A row set is columnar: u32 rows, u32 columns, then per column a u8 tag:
+ * - 0 NULL: every value is null, no payload
+ * - 1 INT / 2 REAL: u32 null count, u32 null row indices, f64 per row
+ * - 3 TEXT: u32 null count, u32 null row indices, u32 byte length, the values
+ *   UTF-8 encoded and joined with NUL (nulls as empty strings)
+ * - 4 JSON: u32 byte length, UTF-8 JSON array of the column (anything else:
+ *   mixed types, blobs, text containing NUL)
+ * Results decode to exactly what the JSON protocol yields.
  */
 
+import crypto from 'node:crypto';
 import fs from 'node:fs';
+import path from 'node:path';
+import readline from 'node:readline';
+import zlib from 'node:zlib';
 import { EOL } from 'node:os';
 import { createRequire } from 'node:module';
+import { fileURLToPath } from 'node:url';
 const require = createRequire(import.meta.url);
 
+// Defaults for --queries / --schema, relative to this script
+const SCRIPT_DIR = path.dirname(fileURLToPath(import.meta.url));
+const DEFAULT_QUERIES_DIR = path.join(SCRIPT_DIR, '..', 'app', 'db', 'queries');
+const DEFAULT_SCHEMA_DIR = path.join(SCRIPT_DIR, '..', 'app', 'db', 'schema');
+
+// Upper bound on connections kept open by a persistent runner (LRU evicted)
+const MAX_OPEN_CONNECTIONS = 8;
+
+// Upper bound on concurrently open streaming cursors (new ones rejected beyond it)
+const MAX_OPEN_CURSORS = 16;
+
+// Idle read connections kept per database for reuse by later cursors
+const MAX_IDLE_READERS = 2;
+
+// Prepared dynamic-SQL statements kept per connection (LRU evicted)
+const MAX_CACHED_STATEMENTS = 128;
+
+// Schema subdirectories applied (in order) to the in-memory DB that checks the queries
+const SCHEMA_SUBDIRS = ['tables', 'indexes', 'triggers', 'views'];
+
+function argValue(flag, fallback) {
+  const i = process.argv.indexOf(flag);
+  return i >= 0 && i + 1 < process.argv.length ? process.argv[i + 1] : fallback;
+}
+
+function sqlFiles(dir) {
+  return fs.readdirSync(dir).filter(f => f.endsWith('.sql')).sort();
+}
+
+// Registered queries: file stem -> SQL text, read once
+function loadQueries(dir) {
+  const queries = new Map();
+  for (const file of sqlFiles(dir)) {
+    queries.set(path.basename(file, '.sql'), fs.readFileSync(path.join(dir, file), 'utf8'));
+  }
+  return queries;
+}
+
+// One-shot mode serves a single request, so it only reads the query it needs
+function lazyQueries(dir) {
+  return {
+    get(name) {
+      if (!/^[\w-]+$/.test(name)) return undefined;
+      const file = path.join(dir, `${name}.sql`);
+      return fs.existsSync(file) ? fs.readFileSync(file, 'utf8') : undefined;
+    },
+  };
+}
+
+// Prepare every registered query against an empty in-memory DB with the current
+// schema, so a broken query file stops the runner instead of failing its first caller
+function checkQueries(Database, queries, schemaDir) {
+  const db = new Database(':memory:');
+  try {
+    registerFunctions(db);
+    for (const sub of SCHEMA_SUBDIRS) {
+      const dir = path.join(schemaDir, sub);
+      if (!fs.existsSync(dir)) continue;
+      for (const file of sqlFiles(dir)) db.exec(fs.readFileSync(path.join(dir, file), 'utf8'));
+    }
+    for (const [name, text] of queries) {
+      try {
+        db.prepare(text);
+      } catch (err) {
+        throw new Error(`Query ${name} failed to prepare: ${err.message}`);
+      }
+    }
+  } finally {
+    db.close();
+  }
+}
+
 async function readStdin() {
   return new Promise((resolve, reject) => {
     let data = '';
@@ -75,63 +200,222 @@ function openDb(Database, dbPath, key, driver) {
       throw new Error('SQLCipher not available. Ensure better-sqlite3 is built against SQLCipher.');
     }
   }
+  registerFunctions(db);
   return db;
 }
 
-function run() {
+// Clips of at least this many UTF-8 bytes are stored compressed (COMPRESS_MIN_BYTES in app/core/constants.py)
+const COMPRESS_MIN_BYTES = 2048;
+
+// SQL functions the schema/queries rely on; mirrored in app/db/functions.py
+function registerFunctions(db) {
+  db.function('content_hash', { deterministic: true }, text =>
+    text === null ? null : crypto.createHash('sha256').update(String(text), 'utf8').digest('hex'));
+  db.function('compress_content', { deterministic: true }, text => {
+    if (text === null) return null;
+    const raw = Buffer.from(String(text), 'utf8');
+    if (raw.length < COMPRESS_MIN_BYTES) return null;
+    const packed = zlib.deflateSync(raw, { level: 6 });
+    return packed.length * 4 <= raw.length * 3 ? packed : null;
+  });
+  // Keeps the last result: a search checks several keywords, on every joined row, against the same clip
+  let last = { packed: null, text: null };
+  db.function('decompress_content', { deterministic: true }, packed => {
+    if (packed === null) return null;
+    if (last.packed === null || !packed.equals(last.packed)) {
+      last = { packed: Buffer.from(packed), text: zlib.inflateSync(packed).toString('utf8') };
+    }
+    return last.text;
+  });
+}
+
+// Per-connection statement caches: { named: Map<name, stmt>, dynamic: Map<sql, stmt> }
+const statementCaches = new WeakMap();
+
+function prepareStep(db, step, queries) {
+  let cache = statementCaches.get(db);
+  if (!cache) {
+    cache = { named: new Map(), dynamic: new Map() };
+    statementCaches.set(db, cache);
+  }
+  if (step.query) {
+    let stmt = cache.named.get(step.query);
+    if (!stmt) {
+      const text = queries.get(step.query);
+      if (text === undefined) throw new Error(`Unknown query: ${step.query}`);
+      stmt = db.prepare(text);
+      cache.named.set(step.query, stmt);
+    }
+    return stmt;
+  }
+  let text;
+  if (step.file) text = fs.readFileSync(step.file, 'utf8');
+  else if (step.sql) text = step.sql;
+  else throw new Error('Statement needs either `query`, `file` or `sql`');
+  // Insertion-ordered map doubles as an LRU: re-inserted on every use
+  let stmt = cache.dynamic.get(text);
+  if (stmt) {
+    cache.dynamic.delete(text);
+  } else {
+    stmt = db.prepare(text);
+    if (cache.dynamic.size >= MAX_CACHED_STATEMENTS) {
+      cache.dynamic.delete(cache.dynamic.keys().next().value);
+    }
+  }
+  cache.dynamic.set(text, stmt);
+  return stmt;
+}
+
+function runStatement(stmt, params) {
+  const hasParams = Array.isArray(params) || typeof params === 'object';
+  // `reader` is true for anything that returns rows (SELECT, EXPLAIN, PRAGMA, RETURNING)
+  if (stmt.reader) {
+    const s = stmt.raw(true);
+    const rows = hasParams ? s.all(params) : s.all();
+    return { ok: true, rows };
+  }
+  if (hasParams) {
+    stmt.run(params);
+  } else {
+    stmt.run();
+  }
+  return { ok: true, rows: [] };
+}
+
+function execute(db, input, queries) {
+  const { op, sql, params, steps } = input;
+  if (op === 'query' || op === 'file' || op === 'sql') {
+    return runStatement(prepareStep(db, input, queries), params);
+  }
+  if (op === 'exec') {
+    db.exec(sql);
+    return { ok: true };
+  }
+  if (op === 'batch') {
+    // Any failing step throws out of the transaction, rolling back earlier steps
+    const runAll = db.transaction(() =>
+      (steps || []).map(step => runStatement(prepareStep(db, step, queries), step.params).rows));
+    return { ok: true, results: runAll() };
+  }
+  return { ok: false, error: `Unknown op: ${op}` };
+}
+
+// Binary protocol (see the header comment)
+const FRAME_JSON = 0;
+const FRAME_ROWS = 1;
+const FRAME_RESULTS = 2;
+const COL_NULL = 0;
+const COL_INT = 1;
+const COL_REAL = 2;
+const COL_TEXT = 3;
+const COL_JSON = 4;
+
+function valueTag(v) {
+  if (typeof v === 'number') return Number.isInteger(v) ? COL_INT : COL_REAL;
+  if (typeof v === 'string') return v.includes('\0') ? COL_JSON : COL_TEXT;
+  return COL_JSON;
+}
+
+function u32(n) {
+  const b = Buffer.allocUnsafe(4);
+  b.writeUInt32LE(n, 0);
+  return b;
+}
+
+function encodeColumn(rows, c, out) {
+  let tag = COL_NULL;
+  const nulls = [];
+  for (let r = 0; r < rows.length; r++) {
+    const v = rows[r][c];
+    if (v === null || v === undefined) {
+      nulls.push(r);
+      continue;
+    }
+    const t = valueTag(v);
+    if (tag === COL_NULL) tag = t;
+    else if (t !== tag) tag = COL_JSON;
+    if (tag === COL_JSON) break;
+  }
+  out.push(Buffer.of(tag));
+  if (tag === COL_NULL) return;
+  if (tag === COL_JSON) {
+    const body = Buffer.from(JSON.stringify(rows.map(row => row[c] ?? null)), 'utf8');
+    out.push(u32(body.length), body);
+    return;
+  }
+  const nullIndex = Buffer.allocUnsafe(4 + 4 * nulls.length);
+  nullIndex.writeUInt32LE(nulls.length, 0);
+  nulls.forEach((r, i) => nullIndex.writeUInt32LE(r, 4 + 4 * i));
+  out.push(nullIndex);
+  if (tag === COL_TEXT) {
+    const body = Buffer.from(rows.map(row => row[c] ?? '').join('\0'), 'utf8');
+    out.push(u32(body.length), body);
+    return;
+  }
+  const values = Buffer.allocUnsafe(8 * rows.length);
+  for (let r = 0; r < rows.length; r++) values.writeDoubleLE(rows[r][c] ?? 0, 8 * r);
+  out.push(values);
+}
+
+function encodeRowSet(rows, out) {
+  const ncols = rows.length > 0 ? rows[0].length : 0;
+  const head = Buffer.allocUnsafe(8);
+  head.writeUInt32LE(rows.length, 0);
+  head.writeUInt32LE(ncols, 4);
+  out.push(head);
+  for (let c = 0; c < ncols; c++) encodeColumn(rows, c, out);
+}
+
+function encodeFrame(id, res) {
+  const out = [];
+  const { ok, rows, results, done, ...rest } = res;
+  const plain = Object.keys(rest).length === 0 && ok === true;
+  if (plain && Array.isArray(rows) && results === undefined) {
+    out.push(Buffer.of(FRAME_ROWS, done === undefined ? 2 : done ? 1 : 0));
+    encodeRowSet(rows, out);
+  } else if (plain && Array.isArray(results) && rows === undefined && done === undefined) {
+    out.push(Buffer.of(FRAME_RESULTS), u32(results.length));
+    for (const rowSet of results) encodeRowSet(rowSet, out);
+  } else {
+    out.push(Buffer.of(FRAME_JSON), Buffer.from(JSON.stringify(res), 'utf8'));
+  }
+  const body = Buffer.concat(out);
+  const head = Buffer.allocUnsafe(8);
+  head.writeUInt32LE(body.length + 4, 0);
+  head.writeUInt32LE(id ?? 0, 4);
+  return Buffer.concat([head, body]);
+}
+
+// Calls onRequest with each complete length-prefixed request frame read from `stream`
+function readFrames(stream, onRequest, onEnd) {
+  let pending = Buffer.alloc(0);
+  stream.on('data', chunk => {
+    pending = pending.length > 0 ? Buffer.concat([pending, chunk]) : chunk;
+    let start = 0;
+    while (pending.length - start >= 4) {
+      const size = pending.readUInt32LE(start);
+      if (pending.length - start - 4 < size) break;
+      onRequest(pending.toString('utf8', start + 4, start + 4 + size));
+      start += 4 + size;
+    }
+    pending = pending.subarray(start);
+  });
+  stream.on('end', onEnd);
+}
+
+function errorResult(err) {
+  return { ok: false, error: String(err && err.message || err) };
+}
+
+function runOnce() {
   readStdin()
     .then(raw => {
       const input = JSON.parse(raw || '{}');
-  const { op, sql, file, params, dbPath, key } = input;
-  const { Database, driver } = loadDriver();
-  const db = openDb(Database, dbPath, key, driver);
-
+      const { dbPath, key } = input;
+      const { Database, driver } = loadDriver();
+      const db = openDb(Database, dbPath, key, driver);
       try {
-        const isSelectLike = (text) => {
-          if (!text) return false;
-          const t = String(text).trim().toLowerCase();
-          return t.startsWith('select') || t.startsWith('with');
-        };
-        if (op === 'file') {
-          const text = fs.readFileSync(file, 'utf8');
-          const stmt = db.prepare(text);
-          if (isSelectLike(text)) {
-            const s = stmt.raw(true);
-            const rows = Array.isArray(params) || typeof params === 'object'
-              ? s.all(params)
-              : s.all();
-            return { ok: true, rows };
-          } else {
-            if (Array.isArray(params) || typeof params === 'object') {
-              stmt.run(params);
-            } else {
-              stmt.run();
-            }
-            return { ok: true, rows: [] };
-          }
-        }
-        if (op === 'sql') {
-          const stmt = db.prepare(sql);
-          if (isSelectLike(sql)) {
-            const s = stmt.raw(true);
-            const rows = Array.isArray(params) || typeof params === 'object'
-              ? s.all(params)
-              : s.all();
-            return { ok: true, rows };
-          } else {
-            if (Array.isArray(params) || typeof params === 'object') {
-              stmt.run(params);
-            } else {
-              stmt.run();
-            }
-            return { ok: true, rows: [] };
-          }
-        }
-        if (op === 'exec') {
-          db.exec(sql);
-          return { ok: true };
-        }
-        return { ok: false, error: `Unknown op: ${op}` };
+        return execute(db, input, lazyQueries(argValue('--queries', DEFAULT_QUERIES_DIR)));
       } finally {
         db.close();
       }
@@ -140,9 +424,174 @@ function run() {
       process.stdout.write(JSON.stringify(res) + EOL);
     })
     .catch(err => {
-      process.stdout.write(JSON.stringify({ ok: false, error: String(err && err.message || err) }) + EOL);
+      process.stdout.write(JSON.stringify(errorResult(err)) + EOL);
       process.exitCode = 1;
     });
 }
 
-run();
+function serve() {
+  const queries = loadQueries(argValue('--queries', DEFAULT_QUERIES_DIR));
+  let loaded = null;
+  try {
+    loaded = loadDriver();
+  } catch (_) {
+    // Reported per request instead (see acquire); nothing to check the queries with
+  }
+  if (loaded) checkQueries(loaded.Database, queries, argValue('--schema', DEFAULT_SCHEMA_DIR));
+  // Insertion-ordered map doubles as an LRU: re-inserted on every use
+  const connections = new Map();
+
+  const acquire = (dbPath, key) => {
+    const cacheKey = `${dbPath}\u0000${key}`;
+    let db = connections.get(cacheKey);
+    if (db) {
+      connections.delete(cacheKey);
+    } else {
+      // Load lazily so a missing driver is reported per request, not as a crash
+      loaded = loaded || loadDriver();
+      db = openDb(loaded.Database, dbPath, key, loaded.driver);
+      if (connections.size >= MAX_OPEN_CONNECTIONS) {
+        const [oldestKey, oldest] = connections.entries().next().value;
+        connections.delete(oldestKey);
+        oldest.close();
+      }
+    }
+    connections.set(cacheKey, db);
+    return db;
+  };
+
+  // Streaming cursors: id -> { db, cacheKey, rows } where rows is a statement iterator
+  const cursors = new Map();
+  // Idle keyed read connections by cacheKey, reused instead of re-opening (and re-keying)
+  const idleReaders = new Map();
+  let lastCursorId = 0;
+
+  const acquireReader = (dbPath, key) => {
+    const cacheKey = `${dbPath}\u0000${key}`;
+    const idle = idleReaders.get(cacheKey);
+    if (idle && idle.length > 0) return { cacheKey, db: idle.pop() };
+    loaded = loaded || loadDriver();
+    return { cacheKey, db: openDb(loaded.Database, dbPath, key, loaded.driver) };
+  };
+
+  const releaseReader = (cacheKey, db) => {
+    const idle = idleReaders.get(cacheKey) || [];
+    if (idle.length < MAX_IDLE_READERS) {
+      idle.push(db);
+      idleReaders.set(cacheKey, idle);
+    } else {
+      try { db.close(); } catch (_) {}
+    }
+  };
+
+  const closeCursor = cursorId => {
+    const cur = cursors.get(cursorId);
+    if (!cur) return;
+    cursors.delete(cursorId);
+    try { cur.rows.return(); } catch (_) {}
+    releaseReader(cur.cacheKey, cur.db);
+  };
+
+  const openCursor = input => {
+    if (cursors.size >= MAX_OPEN_CURSORS) {
+      throw new Error(`Too many open cursors (${MAX_OPEN_CURSORS}); retry when a stream finishes`);
+    }
+    const { cacheKey, db } = acquireReader(input.dbPath, input.key);
+    try {
+      const stmt = prepareStep(db, input, queries);
+      if (!stmt.reader) throw new Error('iterate needs a statement that returns rows');
+      const s = stmt.raw(true);
+      const hasParams = Array.isArray(input.params) || typeof input.params === 'object';
+      const rows = hasParams ? s.iterate(input.params) : s.iterate();
+      lastCursorId += 1;
+      cursors.set(lastCursorId, { db, cacheKey, rows });
+      return { ok: true, cursor: lastCursorId };
+    } catch (err) {
+      releaseReader(cacheKey, db);
+      throw err;
+    }
+  };
+
+  const nextRows = ({ cursor, count }) => {
+    const cur = cursors.get(cursor);
+    if (!cur) throw new Error(`Unknown or closed cursor: ${cursor}`);
+    const rows = [];
+    while (rows.length < (count || 1)) {
+      const step = cur.rows.next();
+      if (step.done) {
+        closeCursor(cursor);
+        return { ok: true, rows, done: true };
+      }
+      rows.push(step.value);
+    }
+    return { ok: true, rows, done: false };
+  };
+
+  const handle = input => {
+    if (input.op === 'iterate') return openCursor(input);
+    if (input.op === 'next') return nextRows(input);
+    if (input.op === 'close') {
+      closeCursor(input.cursor);
+      return { ok: true };
+    }
+    return execute(acquire(input.dbPath, input.key), input, queries);
+  };
+
+  const closeAll = () => {
+    for (const cursorId of [...cursors.keys()]) closeCursor(cursorId);
+    for (const idle of idleReaders.values()) {
+      for (const db of idle) {
+        try { db.close(); } catch (_) {}
+      }
+    }
+    idleReaders.clear();
+    for (const db of connections.values()) {
+      try { db.close(); } catch (_) {}
+    }
+    connections.clear();
+  };
+
+  const answer = raw => {
+    let id = null;
+    let res;
+    try {
+      const input = JSON.parse(raw);
+      id = input.id ?? null;
+      res = handle(input);
+    } catch (err) {
+      res = errorResult(err);
+    }
+    return { id, res };
+  };
+
+  if (argValue('--protocol', 'json') === 'binary') {
+    readFrames(process.stdin, raw => {
+      const { id, res } = answer(raw);
+      process.stdout.write(encodeFrame(id, res));
+    }, closeAll);
+  } else {
+    const rl = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+    rl.on('line', line => {
+      if (!line.trim()) return;
+      const { id, res } = answer(line);
+      process.stdout.write(JSON.stringify({ id, ...res }) + EOL);
+    });
+    rl.on('close', closeAll);
+  }
+  process.on('SIGTERM', () => {
+    closeAll();
+    process.exit(0);
+  });
+}
+
+if (process.argv.includes('--serve')) {
+  try {
+    serve();
+  } catch (err) {
+    // e.g. a registered query that does not prepare: refuse to serve at all
+    process.stderr.write(`DB runner failed to start: ${err && err.message || err}${EOL}`);
+    process.exit(1);
+  }
+} else {
+  runOnce();
+}
@@ -0,0 +1,50 @@
+"""
+Watch the system clipboard and send new clips to a running API.
+
+Changes are debounced, sent in batches through POST /clipboard/add_clips, and
+spooled to a local file while the API is unreachable (see
+app/poller/clipboard_poller.py). Stop with Ctrl-C or SIGTERM; clips still
+queued are sent or spooled first.
+
+Run directly:
+    python scripts/run_poller.py [--api http://127.0.0.1:8000] [--app-name NAME] [--spool PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import signal
+
+# Ensure we can import the app package when running as a script
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+import httpx
+
+from app.core.constants import POLLER_SPOOL_PATH
+from app.poller.clipboard_poller import ApiClipSink, ClipboardPoller, ClipSpool, PyperclipSource
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default="http://127.0.0.1:8000", help="base URL of the clipboard API")
+    parser.add_argument("--app-name", default=None, help="from_app_name recorded on every clip")
+    parser.add_argument("--spool", type=Path, default=POLLER_SPOOL_PATH, help="file for clips the API did not take")
+    args = parser.parse_args()
+
+    # Stop on SIGTERM like on Ctrl-C, so queued clips are not lost
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with httpx.Client(base_url=args.api, timeout=10.0) as client:
+        poller = ClipboardPoller(
+            PyperclipSource(), ApiClipSink(client), ClipSpool(args.spool), from_app_name=args.app_name
+        )
+        print(f"Watching the clipboard; sending clips to {args.api}")
+        poller.run()
+
+
+if __name__ == "__main__":
+    main()
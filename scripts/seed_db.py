@@ -29,7 +29,6 @@ from app.core.constants import (
     ADD_TAG_IF_NOT_EXISTS,
     ADD_CLIP_TAG,
     ADD_FAVORITE,
-    GET_LAST_CLIP_ID,
 )
 
 ADD_WITH_TS = QUERIES_DIR / "add_clip_with_timestamp.sql"
@@ -74,7 +73,7 @@ def seed(n: int = 100) -> None:
     app_names = ["Safari", "Chrome", "VSCode", "Terminal", "Notes", "Mail", None]
     tag_pool = ["work", "personal", "todo", "idea", "code", "quote", "ref"]
 
-    # Insert n clips (collect assigned IDs after each insert using MAX(ID))
+    # Insert n clips (each insert returns its assigned ID)
     # Fetch current max ID beforehand for display purposes
     starting_rows = execute_query("get_all_clips.sql")
     start_count = len(starting_rows)
@@ -86,12 +85,11 @@ def seed(n: int = 100) -> None:
             f" — token:{base_token}"
         )
         from_app = random.choice(app_names)
-        execute_query(ADD_WITH_TS, {"content": content, "timestamp": ts, "from_app_name": from_app})
-        # Fetch the most recent clip id via file-based query (connection-safe)
-        last_id_row = execute_query(GET_LAST_CLIP_ID)
-        if not last_id_row:
+        # The upsert returns the clip's ID (RETURNING), even for a re-copied clip
+        id_row = execute_query(ADD_WITH_TS, {"content": content, "timestamp": ts, "from_app_name": from_app})
+        if not id_row:
             raise RuntimeError("No clip ID returned after insert; database may be misconfigured.")
-        clip_id = int(last_id_row[0][0])
+        clip_id = int(id_row[0][0])
         _maybe_add_tags_and_favorite(clip_id, tag_pool)
 
     # Report final count
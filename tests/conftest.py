@@ -54,19 +54,31 @@ os.environ.setdefault("CLIPBOARD_DB_KEY", "test-secret-key")
 # Enforce encrypted mode during tests; no plaintext bypass.
 
 
+@pytest.fixture(autouse=True)
+def empty_result_cache() -> None:
+    """Start every test with an empty service result cache, so no read is served from a previous test."""
+    from app.services.clipboard.clipboard_service import clear_result_cache
+
+    clear_result_cache()
+
+
 @pytest.fixture(scope="session", autouse=True)
-def require_sqlcipher_available() -> None:
-    """Skip the entire test session if SQLCipher is not available in better-sqlite3.
+def require_sqlcipher_available(tmp_path_factory: pytest.TempPathFactory) -> None:
+    """Skip the entire test session if SQLCipher is not available in the DB backend.
 
     This maintains the encryption-only guarantee without forcing developers/CI
     to rebuild better-sqlite3 during collection. When SQLCipher is present,
-    the tests will run normally and exercise encrypted DB operations.
+    the tests will run normally and exercise encrypted DB operations. The probe
+    runs against a throwaway DB so the real `DB_PATH` is never created.
     """
+    # defer import until after sys.path bootstrap
+    import app.db.db as dbmod
+
+    real_db_path = dbmod.DB_PATH
+    dbmod.DB_PATH = tmp_path_factory.mktemp("probe") / "probe.db"
     try:
-        # defer import until after sys.path bootstrap
-        from app.db.db import _run_node  # type: ignore
-        # Try a no-op exec which will fail early in the Node runner if SQLCipher is missing
-        _run_node({"op": "exec", "sql": "PRAGMA user_version = 0;"})
+        # Try a no-op exec which will fail early in the backend if SQLCipher is missing
+        dbmod._run({"op": "exec", "sql": "SELECT 1;"})
     except Exception as exc:  # broad: surface clear skip reasons
         msg = str(exc)
         if "SQLCipher not available" in msg or "Missing database key" in msg:
@@ -76,3 +88,5 @@ def require_sqlcipher_available() -> None:
                 allow_module_level=True,
             )
         # For other unexpected errors, let tests fail normally
+    finally:
+        dbmod.DB_PATH = real_db_path
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from app.core.constants import (
+    ADD_CLIP,
+    ADD_CLIP_WITH_TIMESTAMP,
+    ADD_CLIPS,
+    CONTENT_HEAD_CHARS,
+    DELETE_CLIP,
+    GET_ALL_CLIPS,
+    GET_CLIP_BY_CONTENT_HASH,
+    GET_SCHEMA_VERSION,
+)
+from app.db.db import _run, execute_dynamic_query, execute_query, init_db
+from app.db.functions import compress_content, content_hash, decompress_content
+from app.db.queries.filter_clips_dynamic_queries import filter_all_clips_query, get_num_filtered_clips_query
+from app.models.clipboard.filters import Filters
+from app.services.clipboard.clipboard_service import check_counters
+
+
+def log_file(marker: str) -> str:
+    """A few KiB of repetitive text ending in `marker`, well past the stored head."""
+    lines = [f"2025-01-01 00:00:{i % 60:02d} INFO worker-{i % 4} processed batch {i}" for i in range(200)]
+    return "\n".join(lines) + f"\nERROR {marker} failed"
+
+
+def stored(clip_id: int) -> tuple:
+    return execute_dynamic_query(
+        lambda: ("SELECT Content, ContentZ IS NOT NULL, ContentLength FROM Clips WHERE ID = ?;", (clip_id,))
+    )[0]
+
+
+def search(text: str, **filters) -> list[int]:
+    return [row[0] for row in execute_dynamic_query(lambda: filter_all_clips_query(Filters(search=text, **filters)))]
+
+
+def test_functions_round_trip_and_skip_small_content() -> None:
+    text = log_file("disk") + " ünïcode"
+    packed = compress_content(text)
+    assert packed is not None and len(packed) < len(text) // 4
+    assert decompress_content(packed) == text
+    assert compress_content("short") is None
+    assert compress_content(None) is None and decompress_content(None) is None
+
+
+def test_large_clips_are_stored_compressed_and_read_back_whole(temp_db: None) -> None:
+    big, small = log_file("alpha"), "a small clip"
+    execute_query(ADD_CLIP, {"content": big, "from_app_name": None})
+    execute_query(ADD_CLIP_WITH_TIMESTAMP, {"content": small, "timestamp": "2025-01-01 00:00:00", "from_app_name": None})
+    execute_query(ADD_CLIPS, {"clips": json.dumps([{"content": log_file("beta"), "from_app_name": None, "timestamp": None}])})
+
+    head, compressed, length = stored(1)
+    assert compressed and head == big[:CONTENT_HEAD_CHARS] and length == len(big)
+    assert stored(2) == (small, 0, None)
+    assert stored(3)[1]
+
+    assert [(row[0], row[1]) for row in execute_query(GET_ALL_CLIPS)] == [(3, log_file("beta")), (2, small), (1, big)]
+    assert execute_query(GET_CLIP_BY_CONTENT_HASH, {"content_hash": content_hash(big)})[0][1] == big
+    assert check_counters() == []
+
+
+def test_compressed_clips_stay_searchable_past_their_head(temp_db: None) -> None:
+    execute_query(ADD_CLIP, {"content": log_file("needle"), "from_app_name": None})
+    execute_query(ADD_CLIP, {"content": "needle in plain text", "from_app_name": None})
+
+    assert search("needle") == [2, 1]  # trigram index, then LIKE on the full text
+    assert search("needle", word_search=True) == [2, 1]
+    assert search("ERROR") == [1]
+    assert search("e f") == [1]  # too short for trigrams: LIKE over every clip
+    assert execute_dynamic_query(lambda: get_num_filtered_clips_query(Filters(search="needle"))) == [(2,)]
+
+    # Re-copies move the clip, deletes drop it from the indexes
+    execute_query(ADD_CLIP, {"content": log_file("needle"), "from_app_name": None})
+    assert search("needle") == [3, 2]
+    execute_query(DELETE_CLIP, {"clip_id": 3})
+    assert search("needle") == [2]
+    assert search("ERROR", word_search=True) == []
+    assert check_counters() == []
+
+
+def test_migration_compresses_existing_clips(temp_db_path: Path) -> None:
+    big = log_file("legacy")
+    _run({"op": "exec", "sql": """
+        CREATE TABLE Clips (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Content TEXT NOT NULL,
+            FromAppName TEXT,
+            Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    """})
+    execute_dynamic_query(lambda: ("INSERT INTO Clips (Content) VALUES (?), ('small') RETURNING ID;", (big,)))
+
+    init_db()
+
+    assert execute_query(GET_SCHEMA_VERSION) == [(6,)]
+    assert stored(1)[1:] == (1, len(big))
+    assert [row[1] for row in execute_query(GET_ALL_CLIPS)] == ["small", big]
+    assert search("legacy") == [1]
+    assert check_counters() == []
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.db.db import execute_dynamic_query
+from app.core.constants import (
+    QUERIES_DIR,
+    GET_NUM_CLIPS,
+    GET_NUM_CLIPS_PER_TAG,
+    GET_NUM_FAVORITES,
+    DELETE_UNUSED_TAG,
+    DELETE_UNUSED_TAGS_FOR_CLIP,
+    GET_ALL_FROM_APPS,
+    GET_N_CLIPS,
+    GET_N_CLIPS_BEFORE_ID,
+)
+from app.db.queries.filter_clips_dynamic_queries import (
+    filter_clips_page_query,
+    filter_n_clips_query,
+    get_num_filtered_clips_query,
+)
+from app.models.clipboard.filters import Filters
+
+
+def _plan(sql: str, params: list | dict) -> list[str]:
+    rows = execute_dynamic_query(lambda: (f"EXPLAIN QUERY PLAN {sql}", params))
+    return [str(r[3]) for r in rows]
+
+
+def _file_plan(path: Path, params: dict) -> list[str]:
+    return _plan((QUERIES_DIR / path).read_text(encoding="utf-8"), params)
+
+
+def _assert_no_full_scan(plan: list[str]) -> None:
+    assert "SCAN Clips" not in plan, plan
+
+
+@pytest.mark.parametrize("query", [GET_NUM_CLIPS, GET_NUM_FAVORITES, GET_NUM_CLIPS_PER_TAG])
+def test_counts_read_a_counter_row(temp_db: None, query: Path) -> None:
+    plan = _file_plan(query, {"tag_id": 1})
+    assert any(line.startswith("SEARCH") and "Counters" in line for line in plan), plan
+    assert not any(line.startswith("SCAN") and "CONSTANT ROW" not in line for line in plan), plan
+
+
+@pytest.mark.parametrize("query", [DELETE_UNUSED_TAG, DELETE_UNUSED_TAGS_FOR_CLIP])
+def test_unused_tag_probes_use_tag_index(temp_db: None, query: Path) -> None:
+    plan = _file_plan(query, {"tag_id": 1, "clip_id": 1})
+    assert any("idx_clip_tags_tag_id" in line for line in plan), plan
+    assert not any(line.startswith("SCAN") for line in plan), plan
+
+
+def test_from_apps_reads_only_the_app_index(temp_db: None) -> None:
+    plan = _file_plan(GET_ALL_FROM_APPS, {})
+    assert plan == ["SCAN Clips USING COVERING INDEX idx_clips_from_app_name"]
+
+
+@pytest.mark.parametrize("query", [GET_N_CLIPS, GET_N_CLIPS_BEFORE_ID])
+def test_recent_clips_walk_rowid_order_without_sorting(temp_db: None, query: Path) -> None:
+    plan = _file_plan(query, {"n": 10, "before_id": 100})
+    assert not any("TEMP B-TREE" in line for line in plan), plan
+
+
+@pytest.mark.parametrize("time_frame", ["past_24_hours", "past_week", "past_year"])
+def test_time_frame_filter_seeks_instead_of_scanning(temp_db: None, time_frame: str) -> None:
+    plan = _plan(*filter_n_clips_query(Filters(time_frame=time_frame), n=10))
+    _assert_no_full_scan(plan)
+    assert any("INTEGER PRIMARY KEY (rowid>?)" in line for line in plan), plan
+    assert any("idx_clips_timestamp" in line for line in plan), plan
+
+    count_plan = _plan(*get_num_filtered_clips_query(Filters(time_frame=time_frame)))
+    _assert_no_full_scan(count_plan)
+    assert any("idx_clips_timestamp" in line for line in count_plan), count_plan
+
+
+def test_app_filter_uses_app_index(temp_db: None) -> None:
+    plan = _plan(*filter_n_clips_query(Filters(selected_apps=["Chrome"]), n=10))
+    _assert_no_full_scan(plan)
+    assert any("idx_clips_from_app_name" in line for line in plan), plan
+
+
+def test_word_search_probes_full_text_index(temp_db: None) -> None:
+    plan = _plan(*filter_n_clips_query(Filters(search="alpha beta", word_search=True), n=10))
+    _assert_no_full_scan(plan)
+    assert any("VIRTUAL TABLE INDEX" in line for line in plan), plan
+
+
+def test_search_probes_trigram_index(temp_db: None) -> None:
+    plan = _plan(*filter_n_clips_query(Filters(search="oken:12"), n=10))
+    _assert_no_full_scan(plan)
+    assert any("VIRTUAL TABLE INDEX" in line for line in plan), plan
+
+
+def test_clips_page_seeks_by_rowid_without_sorting(temp_db: None) -> None:
+    plan = _plan(*filter_clips_page_query(Filters(), before_id=1000, limit=50))
+    assert any("INTEGER PRIMARY KEY (rowid<?)" in line for line in plan), plan
+    assert not any("TEMP B-TREE" in line for line in plan), plan
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+
+from app.core.constants import (
+    ADD_CLIPS,
+    CONTENT_HEAD_CHARS,
+    GET_ALL_CLIPS,
+    GET_ALL_CLIPS_PREVIEW,
+    GET_CLIP_CONTENT,
+    GET_N_CLIPS,
+    GET_N_CLIPS_PREVIEW,
+)
+from app.db.db import execute_dynamic_query, execute_query
+from app.db.queries.filter_clips_dynamic_queries import filter_clips_page_query
+from app.models.clipboard.filters import Filters
+
+
+def log_file(marker: str) -> str:
+    """A few KiB of repetitive text (stored compressed) ending in `marker`."""
+    lines = [f"2025-01-01 00:00:{i % 60:02d} INFO worker-{i % 4} processed batch {i}" for i in range(200)]
+    return "\n".join(lines) + f"\nERROR {marker} failed"
+
+
+# Compressed, plain but longer than the head, and short
+CONTENTS = [log_file("needle"), "ünïcode " * 100, "short"]
+
+
+def add_contents() -> None:
+    items = [{"content": c, "from_app_name": None, "timestamp": "2025-01-01 00:00:00"} for c in CONTENTS]
+    execute_query(ADD_CLIPS, {"clips": json.dumps(items)})
+
+
+def test_preview_queries_return_the_head_and_full_length(temp_db: None) -> None:
+    add_contents()
+    expected = [(c[:CONTENT_HEAD_CHARS], len(c)) for c in reversed(CONTENTS)]
+
+    for preview, full in ((GET_ALL_CLIPS_PREVIEW, GET_ALL_CLIPS), (GET_N_CLIPS_PREVIEW, GET_N_CLIPS)):
+        params = {"n": 3} if preview == GET_N_CLIPS_PREVIEW else None
+        rows = execute_query(preview, params)
+        assert [(row[1], row[6]) for row in rows] == expected
+        # Everything but the content is what the full query returns
+        assert [row[:1] + row[2:6] for row in rows] == [row[:1] + row[2:] for row in execute_query(full, params)]
+
+
+def test_clip_content_returns_the_rest_from_an_offset(temp_db: None) -> None:
+    add_contents()
+
+    for clip_id, content in enumerate(CONTENTS, start=1):
+        head = content[:CONTENT_HEAD_CHARS]
+        assert execute_query(GET_CLIP_CONTENT, {"clip_id": clip_id, "offset": 0}) == [(content, len(content))]
+        rest, length = execute_query(GET_CLIP_CONTENT, {"clip_id": clip_id, "offset": len(head)})[0]
+        assert head + rest == content and length == len(content)
+
+    assert execute_query(GET_CLIP_CONTENT, {"clip_id": 99, "offset": 0}) == []
+
+
+def test_preview_filter_queries_skip_decompression_but_not_search(temp_db: None) -> None:
+    add_contents()
+    filters = Filters(search="needle")
+
+    sql, params = filter_clips_page_query(filters, before_id=None, limit=10, preview=True)
+    select_list = sql.split("FROM Clips")[0]
+    assert "decompress_content" not in select_list and "ContentLength" in select_list
+    # Found past the stored head, returned as the head only
+    assert [(row[0], row[1], row[6]) for row in execute_dynamic_query(lambda: (sql, params))] == [
+        (1, CONTENTS[0][:CONTENT_HEAD_CHARS], len(CONTENTS[0]))
+    ]
+    assert params == filter_clips_page_query(filters, before_id=None, limit=10)[1]
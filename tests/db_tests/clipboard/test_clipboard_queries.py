@@ -1,17 +1,21 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Iterator
-import re
-
 import pytest
 
-from app.db.db import execute_query, execute_dynamic_query, init_db
+from app.db.db import (
+    execute_query,
+    execute_dynamic_query,
+    execute_batch,
+    iterate_dynamic_query,
+    iterate_query,
+)
 from app.core.constants import (
     ADD_CLIP,
     ADD_CLIP_WITH_TIMESTAMP,
     GET_ALL_CLIPS,
     GET_N_CLIPS,
+    GET_CLIP_BY_ID,
+    GET_CLIPS_BY_IDS,
     GET_ALL_CLIPS_AFTER_ID,
     GET_N_CLIPS_BEFORE_ID,
     GET_NUM_CLIPS,
@@ -36,17 +40,6 @@ from app.db.queries.filter_clips_dynamic_queries import (
 )
 
 
-@pytest.fixture
-def temp_db(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[None]:
-    """Point DB_PATH to a temp SQLite file and initialize real schema/triggers."""
-    import app.db.db as dbmod
-
-    tmp_db = tmp_path / "test_clipboard.db"
-    monkeypatch.setattr(dbmod, "DB_PATH", tmp_db, raising=False)
-    init_db()
-    yield
-
-
 def test_add_clip_and_get_all_returns_inserted_row(temp_db: None) -> None:
     execute_query(ADD_CLIP, {"content": "alpha", "from_app_name": None})
 
@@ -137,6 +130,133 @@ def test_dynamic_filter_queries(temp_db: None):
     assert rows[0][0] == 2
 
 
+def test_word_search_matches_prefixes_of_every_keyword(temp_db: None):
+    from app.models.clipboard.filters import Filters
+
+    _insert_many(["alphabet soup", "alpha beta", "beta-gamma", "arrow -> here"])
+
+    def contents(search: str) -> list[str]:
+        rows = execute_dynamic_query(lambda: filter_all_clips_query(Filters(search=search, word_search=True)))
+        return [r[1] for r in rows]
+
+    assert contents("alpha") == ["alpha beta", "alphabet soup"]
+    assert contents("ALP be") == ["alpha beta"]
+    assert contents("gam") == ["beta-gamma"]
+    # Keywords without word characters are not indexed; they still substring-match
+    assert contents("->") == ["arrow -> here"]
+    assert contents('"quoted') == []
+
+
+def test_word_search_checks_keywords_with_symbols_literally(temp_db: None):
+    from app.models.clipboard.filters import Filters
+
+    _insert_many(["cat food", "learning c++ today", "foo bar", "foo.bar()", "snake__case", "x-y plot"])
+
+    def contents(search: str) -> list[str]:
+        rows = execute_dynamic_query(lambda: filter_all_clips_query(Filters(search=search, word_search=True)))
+        return [r[1] for r in rows]
+
+    assert contents("c++") == ["learning c++ today"]
+    assert contents("foo.bar") == ["foo.bar()"]
+    assert contents("x-y") == ["x-y plot"]
+    # Underscores are separators to the tokenizer, so this falls back to LIKE
+    # (where "_" is still the single-character wildcard)
+    assert contents("__") == ["x-y plot", "snake__case", "foo.bar()", "foo bar", "learning c++ today", "cat food"]
+
+
+def test_search_index_follows_deletes_and_recopies(temp_db: None):
+    from app.models.clipboard.filters import Filters
+
+    _insert_many(["needle one", "needle two", "hay"])
+    execute_query(DELETE_CLIP, {"clip_id": 1})
+    execute_query(ADD_CLIP, {"content": "needle two", "from_app_name": None})  # moves to ID 4
+
+    rows = execute_dynamic_query(lambda: filter_all_clips_query(Filters(search="needle")))
+    assert [(r[0], r[1]) for r in rows] == [(4, "needle two")]
+
+
+def test_search_keeps_infix_like_semantics(temp_db: None):
+    from app.models.clipboard.filters import Filters
+
+    _insert_many(["token:1234", "TOKEN:12 upper", "spoken 12", "ok"])
+
+    def contents(search: str) -> list[str]:
+        filters = Filters(search=search)
+        return [r[1] for r in execute_dynamic_query(lambda: filter_all_clips_query(filters))]
+
+    assert contents("oken:12") == ["TOKEN:12 upper", "token:1234"]
+    assert contents("oken 12") == ["spoken 12", "TOKEN:12 upper", "token:1234"]
+    # Too short for trigrams: plain LIKE over every clip
+    assert contents("ok") == ["ok", "spoken 12", "TOKEN:12 upper", "token:1234"]
+    # LIKE wildcards keep their meaning
+    assert contents("to_en:1") == ["TOKEN:12 upper", "token:1234"]
+    count = execute_dynamic_query(
+        lambda: get_num_filtered_clips_query(Filters(search="oken:12"))
+    )
+    assert count == [(2,)]
+
+
+def test_search_can_order_by_relevance(temp_db: None):
+    from app.models.clipboard.filters import Filters
+
+    _insert_many(["cat cat cat", "a cat among many other words here", "dog"])
+    for word_search in (False, True):
+        filters = Filters(search="cat", sort_by_relevance=True, word_search=word_search)
+        rows = execute_dynamic_query(lambda: filter_n_clips_query(filters, n=10))
+        assert [r[1] for r in rows] == ["cat cat cat", "a cat among many other words here"]
+
+
+def test_clips_pages_walk_the_filtered_history_once(temp_db: None):
+    from app.services.clipboard import clipboard_service as svc
+
+    _insert_many([f"page item {i}" for i in range(7)] + ["other"])
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page = svc.get_clips_page(search="item", cursor=cursor, limit=3)
+        seen.extend(c.content for c in page.clips)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [f"page item {i}" for i in reversed(range(7))]
+
+
+def test_iterate_query_streams_rows_in_batches(temp_db: None):
+    from app.models.clipboard.filters import Filters
+
+    _insert_many([f"row {i}" for i in range(7)])
+
+    rows = list(iterate_query(GET_ALL_CLIPS, batch_size=3))
+    assert rows == execute_query(GET_ALL_CLIPS)
+
+    filtered = iterate_dynamic_query(lambda: filter_all_clips_query(Filters(search="row")), batch_size=2)
+    assert [r[1] for r in filtered] == [f"row {i}" for i in reversed(range(7))]
+
+
+def test_abandoned_iteration_releases_its_cursor(temp_db: None):
+    import os
+    from app.db.backends import RUNNER_MODE_ENV, NodeBackend, get_backend
+
+    _insert_many([f"row {i}" for i in range(5)])
+    backend = get_backend()
+    # One-shot runners read everything up front and hold no cursor
+    holds_cursor = not (isinstance(backend, NodeBackend) and os.getenv(RUNNER_MODE_ENV) == "oneshot")
+
+    rows = iterate_query(GET_ALL_CLIPS, batch_size=2)
+    assert next(rows)[1] == "row 4"
+    assert backend.open_streams == (1 if holds_cursor else 0)
+    cursor_ids = set(getattr(backend, "_cursors", ()))
+
+    rows.close()
+    assert backend.open_streams == 0
+    if isinstance(backend, NodeBackend) and cursor_ids:
+        # The runner-side cursor is gone too
+        (cursor_id,) = cursor_ids
+        result = backend._get_runner().request({"op": "next", "cursor": cursor_id, "count": 1})
+        assert not result["ok"] and "Unknown or closed cursor" in result["error"]
+
+
 def test_add_clip_with_timestamp(temp_db: None):
     execute_query(ADD_CLIP_WITH_TIMESTAMP, {"content": "ts-test", "timestamp": "2024-01-01 12:00:00", "from_app_name": None})
     rows = execute_query(GET_ALL_CLIPS)
@@ -144,7 +264,32 @@ def test_add_clip_with_timestamp(temp_db: None):
     # Updated schema: static retrieval now returns (ID, Content, FromAppName, Tags, Timestamp, IsFavorite)
     timestamp_val = rows[0][4]
     assert isinstance(timestamp_val, str)
-    assert re.match(r"\d{4}-\d{2}-\d{2} ", timestamp_val)
+    # Stored as "YYYY-MM-DD HH:MM:SS", returned in UTC ISO format
+    assert timestamp_val == "2024-01-01T12:00:00Z"
+
+
+@pytest.mark.parametrize("stored", ["2025-01-01 12:00:00", "2025-01-01T12:00:00", "2025-01-01T12:00:00Z"])
+def test_clip_queries_return_utc_timestamps(temp_db: None, stored: str) -> None:
+    from app.models.clipboard.filters import Filters
+    execute_query(ADD_CLIP_WITH_TIMESTAMP, {"content": "ts", "timestamp": stored, "from_app_name": None})
+    static = execute_query(GET_ALL_CLIPS)
+    dynamic = execute_dynamic_query(lambda: filter_all_clips_query(Filters()))
+    assert static[0][4] == dynamic[0][4] == "2025-01-01T12:00:00Z"
+
+
+def test_clips_by_id_match_the_list_rows(temp_db: None):
+    _insert_many(["a", "b", "c"])  # IDs 1..3
+    execute_query(ADD_TAG_IF_NOT_EXISTS, {"tag_name": "t"})
+    execute_query(ADD_CLIP_TAG, {"clip_id": 2, "tag_name": "t"})
+    execute_query(ADD_FAVORITE, {"clip_id": 2})
+    listed = {row[0]: row for row in execute_query(GET_ALL_CLIPS)}
+
+    assert execute_query(GET_CLIP_BY_ID, {"clip_id": 2}) == [listed[2]]
+    assert execute_query(GET_CLIP_BY_ID, {"clip_id": 9}) == []
+    # Newest first, unknown and repeated IDs ignored
+    rows = execute_query(GET_CLIPS_BY_IDS, {"clip_ids": "[1, 9, 2, 2]"})
+    assert rows == [listed[2], listed[1]]
+    assert execute_query(GET_CLIPS_BY_IDS, {"clip_ids": "[]"}) == []
 
 
 def test_tag_and_favorite_queries(temp_db: None):
@@ -179,3 +324,92 @@ def test_tag_and_favorite_queries(temp_db: None):
     execute_query(REMOVE_CLIP_TAG, {"clip_id": clip_id, "tag_id": tag_id})
     # Tag might be auto-deleted if unused; ensure no clip-tags remain
     # (Cannot reliably assert tag deletion depending on query logic correctness.)
+
+
+def test_batch_returns_rows_per_step(temp_db: None):
+    results = execute_batch([
+        (ADD_CLIP, {"content": "one", "from_app_name": None}),
+        (ADD_CLIP, {"content": "two", "from_app_name": None}),
+        GET_NUM_CLIPS,
+        (lambda: ("SELECT Content FROM Clips WHERE ID = ?", [2])),
+    ])
+    # Inserts return the new clip's ID (RETURNING)
+    assert results == [[(1,)], [(2,)], [(2,)], [("two",)]]
+
+
+def test_batch_is_atomic(temp_db: None):
+    execute_query(ADD_CLIP, {"content": "keep", "from_app_name": None})
+
+    with pytest.raises(RuntimeError):
+        execute_batch([
+            (DELETE_ALL_CLIPS, None),
+            (lambda: "SELECT * FROM NoSuchTable"),
+        ])
+
+    assert [r[1] for r in execute_query(GET_ALL_CLIPS)] == ["keep"]
+
+
+def test_service_delete_clip_keeps_shared_tags(temp_db: None):
+    from app.services.clipboard import clipboard_service as svc
+
+    _insert_many(["first", "second"])
+    svc.add_clip_tag(1, "shared")
+    svc.add_clip_tag(1, "solo")
+    svc.add_clip_tag(2, "shared")
+
+    svc.delete_clip(1)
+
+    assert [r[1] for r in execute_query(GET_ALL_TAGS)] == ["shared"]
+    assert [r[1] for r in execute_query(GET_ALL_CLIPS)] == ["second"]
+
+
+def test_service_add_clips_reports_ids_and_dedupe_outcomes(temp_db: None):
+    from app.models.clipboard.clipboard_models import ClipInput
+    from app.services.clipboard import clipboard_service as svc
+
+    _insert_many(["old"])
+    svc.add_clip_tag(1, "kept")
+    result = svc.add_clips(
+        [
+            ClipInput(content="new", tags=["a", "b", "a"], timestamp="2025-01-01T00:00:00Z"),
+            ClipInput(content="old", is_favorite=True, from_app_name="Editor"),
+            ClipInput(content="new", tags=["c"], is_favorite=True),
+        ],
+        from_app_name="Importer",
+    )
+
+    # "new" was upserted twice, so both of its items point at its final (newest) ID
+    assert [(c.id, c.outcome) for c in result.clips] == [(4, "inserted"), (3, "existing"), (4, "repeated")]
+    clips = {c.content: c for c in svc.get_all_clips().clips}
+    assert clips["new"].id == 4 and sorted(clips["new"].tags) == ["a", "b", "c"] and clips["new"].is_favorite
+    assert clips["new"].from_app_name == "Importer"
+    assert clips["old"].id == 3 and clips["old"].tags == ["kept"] and clips["old"].is_favorite
+    assert clips["old"].from_app_name == "Editor"
+    assert svc.get_num_clips() == 2 and svc.get_num_favorites() == 2
+    assert svc.check_counters() == []
+
+
+def test_service_add_clips_ingests_a_large_batch_in_one_call(temp_db: None):
+    from app.models.clipboard.clipboard_models import ClipInput
+    from app.services.clipboard import clipboard_service as svc
+
+    result = svc.add_clips([ClipInput(content=f"clip {i}", tags=[f"t{i % 3}"]) for i in range(2000)])
+
+    assert [c.id for c in result.clips] == list(range(1, 2001))
+    assert svc.get_num_clips() == 2000
+    assert sorted(t.name for t in svc.get_all_tags().tags) == ["t0", "t1", "t2"]
+
+
+def test_service_add_clip_applies_tags_and_favorite_and_returns_the_clip(temp_db: None):
+    from app.services.clipboard import clipboard_service as svc
+
+    _insert_many(["other"])
+    svc.add_clip_tag(1, "old")
+    clip = svc.add_clip_with_timestamp_support("fresh", "2025-01-01T00:00:00Z", "App", tags=["x", "y"], is_favorite=True)
+    assert (clip.id, clip.content, clip.from_app_name, clip.timestamp) == (2, "fresh", "App", "2025-01-01T00:00:00Z")
+    assert sorted(clip.tags) == ["x", "y"] and clip.is_favorite
+
+    # A re-copy moves to a new ID and keeps the tags it had
+    recopied = svc.add_clip_with_timestamp_support("other", tags=["new"])
+    assert recopied.id == 3 and sorted(recopied.tags) == ["new", "old"] and not recopied.is_favorite
+    assert execute_query(ADD_CLIP_WITH_TIMESTAMP, {"content": "fresh", "timestamp": "2025-01-02 00:00:00", "from_app_name": None}) == [(4,)]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.core.constants import ADD_CLIP_WITH_TIMESTAMP, GET_ALL_CLIPS
+from app.db.db import execute_dynamic_query, execute_query
+from app.services.clipboard import clipboard_service as svc
+from app.services.clipboard.retention import RetentionPolicy
+
+
+def add_clips(contents: list[str], timestamp: str = "2025-01-01 00:00:00") -> None:
+    for content in contents:
+        execute_query(ADD_CLIP_WITH_TIMESTAMP, {"content": content, "timestamp": timestamp, "from_app_name": None})
+
+
+def stored_ids() -> list[int]:
+    return sorted(row[0] for row in execute_query(GET_ALL_CLIPS))
+
+
+def test_max_clips_evicts_the_oldest_in_batches_and_spares_favorites_and_tags(temp_db: None) -> None:
+    add_clips([f"clip {i}" for i in range(1, 11)])
+    svc.add_favorite(1)
+    svc.add_clip_tag(2, "keep")
+    start = svc.get_last_event_id()
+
+    removed = svc.enforce_retention(RetentionPolicy(max_clips=5), batch_size=2)
+
+    assert removed == 5
+    assert stored_ids() == [1, 2, 8, 9, 10]
+    assert svc.get_num_clips() == 5
+    assert svc.check_counters() == []
+    evicted = [event.data["ids"] for event in svc.get_events_since(start)]
+    assert evicted == [[3, 4], [5, 6], [7]]
+
+
+def test_eviction_stops_when_only_exempt_clips_are_left(temp_db: None) -> None:
+    add_clips(["a", "b", "c"])
+    for clip_id in (1, 2, 3):
+        svc.add_favorite(clip_id)
+    assert svc.enforce_retention(RetentionPolicy(max_clips=1)) == 0
+    assert stored_ids() == [1, 2, 3]
+
+
+def test_max_age_evicts_clips_older_than_the_limit(temp_db: None) -> None:
+    add_clips(["old", "old favorite"], timestamp="2000-01-01 00:00:00")
+    add_clips(["new"], timestamp="2999-01-01 00:00:00")
+    svc.add_favorite(2)
+
+    assert svc.enforce_retention(RetentionPolicy(max_age_days=30)) == 1
+    assert stored_ids() == [2, 3]
+
+
+def test_max_bytes_evicts_just_enough_of_the_oldest_content(temp_db: None) -> None:
+    add_clips(["x" * 100, "é" * 50, "y" * 100, "z" * 100])  # "é" is two bytes in UTF-8
+    total = lambda: execute_dynamic_query(lambda: "SELECT Value FROM Counters WHERE Name = 'content_bytes';")[0][0]
+    assert total() == 400
+
+    assert asyncio.run(svc.enforce_retention_async(RetentionPolicy(max_bytes=250))) == 2
+    assert stored_ids() == [3, 4]
+    assert total() == 200
+    assert svc.check_counters() == []
+
+
+def test_limits_combine_and_an_empty_policy_does_nothing(temp_db: None) -> None:
+    add_clips(["a" * 10, "b" * 10, "c" * 10, "d" * 10])
+    assert svc.enforce_retention(RetentionPolicy()) == 0
+    assert svc.enforce_retention(RetentionPolicy(max_clips=3, max_bytes=15)) == 3
+    assert stored_ids() == [4]
@@ -1,25 +1,25 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Iterator
 
-import pytest
+from app.db.db import _run, execute_dynamic_query, execute_query, init_db
+from app.core.constants import (
+    ADD_CLIP,
+    ADD_CLIP_TAG,
+    ADD_CLIP_WITH_TIMESTAMP,
+    ADD_FAVORITE,
+    ADD_TAG_IF_NOT_EXISTS,
+    GET_ALL_CLIPS,
+    GET_NUM_CLIPS,
+    GET_NUM_CLIPS_PER_TAG,
+    GET_NUM_FAVORITES,
+    GET_SCHEMA_VERSION,
+)
+from app.db.queries.filter_clips_dynamic_queries import filter_all_clips_query
+from app.models.clipboard.filters import Filters
 
-from app.db.db import execute_query, init_db
-from app.core.constants import ADD_CLIP, GET_ALL_CLIPS
 
-
-@pytest.fixture
-def temp_db(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[None]:
-    import app.db.db as dbmod
-
-    tmp_db = tmp_path / "test_clipboard.db"
-    monkeypatch.setattr(dbmod, "DB_PATH", tmp_db, raising=False)
-    init_db()
-    yield
-
-
-def test_trigger_delete_old_if_duplicate_keeps_single_latest_row(temp_db: None) -> None:
+def test_duplicate_clip_is_upserted_to_latest_row(temp_db: None) -> None:
     execute_query(ADD_CLIP, {"content": "dup", "from_app_name": None})
     execute_query(ADD_CLIP, {"content": "dup", "from_app_name": None})
 
@@ -28,3 +28,166 @@ def test_trigger_delete_old_if_duplicate_keeps_single_latest_row(temp_db: None)
     only_row = rows[0]
     assert only_row[1] == "dup"
     assert only_row[0] == 2
+
+
+def test_duplicate_clip_moves_ahead_and_keeps_tags_and_favorite(temp_db: None) -> None:
+    execute_query(
+        ADD_CLIP_WITH_TIMESTAMP,
+        {"content": "keep me", "from_app_name": "Old", "timestamp": "2020-01-01 00:00:00"},
+    )
+    execute_query(ADD_TAG_IF_NOT_EXISTS, {"tag_name": "work"})
+    execute_query(ADD_CLIP_TAG, {"clip_id": 1, "tag_name": "work"})
+    execute_query(ADD_FAVORITE, {"clip_id": 1})
+    execute_query(ADD_CLIP, {"content": "other", "from_app_name": None})
+
+    execute_query(ADD_CLIP, {"content": "keep me", "from_app_name": "New"})
+
+    rows = execute_query(GET_ALL_CLIPS)
+    assert [row[0] for row in rows] == [3, 2]
+    clip_id, content, app, tags, timestamp, is_favorite = rows[0]
+    assert (clip_id, content, app, tags, is_favorite) == (3, "keep me", "New", "work", 1)
+    assert timestamp > "2020-01-01 00:00:00"
+
+    # AUTOINCREMENT continues after the moved ID
+    execute_query(ADD_CLIP, {"content": "fresh", "from_app_name": None})
+    assert execute_query(GET_ALL_CLIPS)[0][0] == 4
+
+
+def test_init_db_migrates_legacy_schema(temp_db_path: Path) -> None:
+    _run({"op": "exec", "sql": """
+        CREATE TABLE Clips (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Content TEXT NOT NULL,
+            FromAppName TEXT,
+            Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TRIGGER delete_old_if_duplicate BEFORE INSERT ON Clips
+        BEGIN DELETE FROM Clips WHERE Content = NEW.Content; END;
+        INSERT INTO Clips (Content) VALUES ('a'), ('b');
+    """})
+
+    init_db()
+    init_db()  # idempotent once migrated
+
+    assert execute_query(GET_SCHEMA_VERSION) == [(6,)]
+    from app.services.clipboard.clipboard_service import check_counters
+    assert check_counters() == []  # including the backfilled content_bytes
+    execute_query(ADD_CLIP, {"content": "a", "from_app_name": None})
+    assert [(row[0], row[1]) for row in execute_query(GET_ALL_CLIPS)] == [(3, "a"), (2, "b")]
+
+    # Existing clips were backfilled into the full-text index
+    rows = execute_dynamic_query(lambda: filter_all_clips_query(Filters(search="b")))
+    assert [row[1] for row in rows] == ["b"]
+    rows = execute_dynamic_query(lambda: filter_all_clips_query(Filters(search="xyz")))
+    assert rows == []
+
+
+def test_legacy_duplicate_references_move_to_surviving_clip(temp_db_path: Path) -> None:
+    _run({"op": "exec", "sql": """
+        CREATE TABLE Clips (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Content TEXT NOT NULL,
+            FromAppName TEXT,
+            Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE Tags (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT UNIQUE NOT NULL);
+        CREATE TABLE ClipTags (ClipID INTEGER, TagID INTEGER, PRIMARY KEY (ClipID, TagID));
+        CREATE TABLE FavoriteClips (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            ClipID INTEGER NOT NULL UNIQUE
+        );
+        INSERT INTO Clips (Content) VALUES ('dup'), ('dup'), ('other'), ('dup');
+        INSERT INTO Tags (Name) VALUES ('work'), ('home');
+        INSERT INTO ClipTags (ClipID, TagID) VALUES (1, 1), (2, 2), (4, 2), (3, 1);
+        INSERT INTO FavoriteClips (ClipID) VALUES (1);
+    """})
+
+    init_db()
+
+    assert [row[0] for row in execute_query(GET_ALL_CLIPS)] == [4, 3]
+    # Counters were backfilled from the surviving rows
+    assert execute_query(GET_NUM_CLIPS) == [(2,)]
+    assert execute_query(GET_NUM_FAVORITES) == [(1,)]
+    assert execute_query(GET_NUM_CLIPS_PER_TAG, {"tag_id": 1}) == [(2,)]
+    tags = execute_dynamic_query(lambda: "SELECT ClipID, TagID FROM ClipTags ORDER BY ClipID, TagID;")
+    assert tags == [(3, 1), (4, 1), (4, 2)]
+    assert execute_dynamic_query(lambda: "SELECT ClipID FROM FavoriteClips;") == [(4,)]
+
+
+def test_counters_follow_every_write_path(temp_db: None) -> None:
+    from app.services.clipboard import clipboard_service as svc
+
+    for content in ["a", "b", "c"]:
+        execute_query(ADD_CLIP, {"content": content, "from_app_name": None})
+    svc.add_clip_tag(1, "work")
+    svc.add_clip_tag(2, "work")
+    svc.add_clip_tag(2, "home")
+    svc.add_clip_tag(2, "home")  # already tagged
+    tag_ids = {tag.name: tag.id for tag in svc.get_all_tags().tags}
+
+    def counts() -> tuple[int, int, int, int]:
+        return (
+            svc.get_num_clips(),
+            svc.get_num_favorites(),
+            svc.get_num_clips_per_tag(tag_ids["work"]),
+            svc.get_num_clips_per_tag(tag_ids["home"]),
+        )
+
+    svc.add_favorite(1)
+    svc.add_favorite(1)  # already a favorite
+    assert counts() == (3, 1, 2, 1)
+
+    # Re-copying moves the clip instead of adding one
+    execute_query(ADD_CLIP, {"content": "a", "from_app_name": None})
+    assert counts() == (3, 1, 2, 1)
+
+    svc.delete_clip(2)
+    assert counts() == (2, 1, 1, 0)
+    svc.remove_favorite(4)
+    assert counts() == (2, 0, 1, 0)
+    assert svc.check_counters() == []
+
+    svc.delete_all_clips()
+    assert counts() == (0, 0, 0, 0)
+    assert svc.check_counters() == []
+
+
+def test_counter_drift_is_reported_and_rebuilt(temp_db: None) -> None:
+    from app.services.clipboard import clipboard_service as svc
+
+    execute_query(ADD_CLIP, {"content": "a", "from_app_name": None})
+    svc.add_clip_tag(1, "work")
+    _run({"op": "exec", "sql": """
+        UPDATE Counters SET Value = 7 WHERE Name = 'clips';
+        DELETE FROM TagCounters;
+    """})
+
+    assert sorted(svc.check_counters()) == [("clips", 7, 1), ("tag:1", 0, 1)]
+    svc.rebuild_counters()
+    assert svc.check_counters() == []
+    assert (svc.get_num_clips(), svc.get_num_clips_per_tag(1)) == (1, 1)
+
+
+def test_data_version_moves_on_every_data_change(temp_db: None) -> None:
+    from app.services.clipboard import clipboard_service as svc
+
+    seen = [svc.get_data_version()]
+
+    def moved() -> bool:
+        seen.append(svc.get_data_version())
+        return seen[-1] != seen[-2]
+
+    execute_query(ADD_CLIP, {"content": "a", "from_app_name": None})
+    assert moved()
+    assert not moved()  # reads leave it alone
+    execute_query(ADD_CLIP, {"content": "a", "from_app_name": None})  # re-copy (update)
+    assert moved()
+    svc.add_clip_tag(2, "work")
+    assert moved()
+    svc.add_favorite(2)
+    assert moved()
+    svc.rebuild_counters()
+    assert moved()
+    svc.delete_clip(2)
+    assert moved()
+    assert len(set(seen)) == len(seen) - 1
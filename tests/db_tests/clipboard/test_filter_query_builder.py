@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from app.db.queries.filter_clips_dynamic_queries import (
+    filter_clips_page_query,
+    filter_n_clips_query,
+    filter_query_sql,
+    get_num_filtered_clips_query,
+)
+from app.models.clipboard.filters import Filters
+
+
+def test_requests_of_the_same_shape_share_sql_text() -> None:
+    sql_a, params_a = filter_n_clips_query(
+        Filters(search="alpha beta", selected_tags=["x"], time_frame="past_week"), n=10
+    )
+    sql_b, params_b = filter_n_clips_query(
+        Filters(search="gamma delta", selected_tags=["y"], time_frame="past_year"), n=None
+    )
+
+    assert sql_a is sql_b  # memoized on the shape
+    # Each LIKE pattern twice: against the stored head, then the decompressed text
+    assert params_a == ['"alpha" "beta"', "%alpha%", "%alpha%", "%beta%", "%beta%", "%x%", "-7 days", "-7 days", 10]
+    assert params_b == ['"gamma" "delta"', "%gamma%", "%gamma%", "%delta%", "%delta%", "%y%", "-1 year", "-1 year", None]
+
+
+def test_values_are_never_interpolated() -> None:
+    sql, params = filter_clips_page_query(Filters(selected_apps=["Chrome"]), before_id=123, limit=51)
+
+    assert "123" not in sql and "51" not in sql and "Chrome" not in sql
+    assert params == ["Chrome", 123, 51]
+    assert "1=1" not in sql
+
+
+def test_shape_changes_the_sql_text() -> None:
+    no_filters, _ = get_num_filtered_clips_query(Filters())
+    with_tag, _ = get_num_filtered_clips_query(Filters(selected_tags=["x"]))
+
+    assert no_filters != with_tag
+    assert "ClipTags" not in no_filters  # counting needs no tag joins without a tag filter
+    assert filter_query_sql.cache_info().currsize >= 2
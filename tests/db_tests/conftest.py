@@ -0,0 +1,26 @@
+"""Shared fixtures for tests that run against a real (temporary) database."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from app.db.db import init_db
+
+
+@pytest.fixture
+def temp_db_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Point DB_PATH to a temp file without creating any schema."""
+    import app.db.db as dbmod
+
+    tmp_db = tmp_path / "test_clipboard.db"
+    monkeypatch.setattr(dbmod, "DB_PATH", tmp_db, raising=False)
+    return tmp_db
+
+
+@pytest.fixture
+def temp_db(temp_db_path: Path) -> Iterator[None]:
+    """Point DB_PATH to a temp SQLite file and initialize real schema/triggers."""
+    init_db()
+    yield
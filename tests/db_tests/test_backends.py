@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from app.db import backends
+from app.db import db as dbmod
+from app.db.db import (
+    execute_batch_async,
+    execute_query,
+    execute_query_async,
+    get_connection,
+    init_db,
+    iterate_query,
+)
+from app.db.pool import ConnectionPool
+from app.core.constants import ADD_CLIP, GET_ALL_CLIPS, GET_NUM_CLIPS
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch: pytest.MonkeyPatch, temp_db_path: Path) -> Iterator[None]:
+    """Run against the in-process sqlite3 backend on a temp DB."""
+    monkeypatch.setenv(backends.BACKEND_ENV, "sqlite")
+    init_db()
+    yield
+
+
+def test_get_backend_honours_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(backends.BACKEND_ENV, "sqlite")
+    assert isinstance(backends.get_backend(), backends.SQLiteBackend)
+    assert backends.get_backend() is backends.get_backend()
+
+    monkeypatch.setenv(backends.BACKEND_ENV, "node")
+    assert isinstance(backends.get_backend(), backends.NodeBackend)
+
+
+def test_node_runner_timeout_comes_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(backends.RUNNER_TIMEOUT_ENV, "0")
+    assert backends.NodeBackend()._get_runner().timeout is None
+
+    monkeypatch.setenv(backends.RUNNER_TIMEOUT_ENV, "5.5")
+    assert backends.NodeBackend()._get_runner().timeout == 5.5
+
+
+def test_get_backend_rejects_unknown_name() -> None:
+    with pytest.raises(ValueError, match="Unknown DB backend"):
+        backends.get_backend("mysql")
+
+
+def test_sqlite_backend_executes_query_files(sqlite_db: None) -> None:
+    execute_query(ADD_CLIP, {"content": "alpha", "from_app_name": None})
+    execute_query(ADD_CLIP, {"content": "beta", "from_app_name": "App"})
+
+    assert execute_query(GET_NUM_CLIPS) == [(2,)]
+
+
+def test_sqlite_backend_reports_errors_like_runner(sqlite_db: None) -> None:
+    with pytest.raises(RuntimeError, match="DB runner error"):
+        execute_query(ADD_CLIP, {"content": "missing from_app_name"})
+
+
+def test_get_connection_lends_pooled_connection(sqlite_db: None) -> None:
+    with get_connection() as first:
+        pass
+    with get_connection() as second:
+        assert second is first
+        assert second.execute("SELECT COUNT(*) FROM Clips").fetchone() == (0,)
+
+
+def test_pool_blocks_beyond_max_size() -> None:
+    created: list[object] = []
+
+    class FakeConn:
+        def close(self) -> None:
+            pass
+
+    def connect() -> FakeConn:
+        conn = FakeConn()
+        created.append(conn)
+        return conn
+
+    pool = ConnectionPool(connect, max_size=1, timeout=0.05)
+    with pool.connection():
+        errors: list[BaseException] = []
+
+        def borrow() -> None:
+            try:
+                with pool.connection():
+                    pass
+            except TimeoutError as exc:
+                errors.append(exc)
+
+        t = threading.Thread(target=borrow)
+        t.start()
+        t.join()
+        assert len(errors) == 1
+
+    with pool.connection():
+        pass
+    assert len(created) == 1
+
+
+def test_stalled_streams_do_not_starve_the_pool(
+    monkeypatch: pytest.MonkeyPatch, temp_db_path: Path
+) -> None:
+    monkeypatch.setenv(backends.BACKEND_ENV, "sqlite")
+    monkeypatch.setenv(backends.POOL_SIZE_ENV, "1")
+    monkeypatch.setattr(backends, "MAX_OPEN_STREAMS", 2)
+    backends.close_backends()  # pick up the pool size
+    init_db()
+    for i in range(3):
+        execute_query(ADD_CLIP, {"content": f"clip {i}", "from_app_name": None})
+
+    # Two clients that read one row and stall
+    stalled = [iterate_query(GET_ALL_CLIPS, batch_size=1) for _ in range(2)]
+    for stream in stalled:
+        next(stream)
+
+    # Regular queries still get the single pooled connection
+    assert execute_query(GET_NUM_CLIPS) == [(3,)]
+
+    # A third stream is refused instead of waiting behind the stalled ones
+    with pytest.raises(RuntimeError, match="Too many open streams"):
+        next(iterate_query(GET_ALL_CLIPS))
+
+    for stream in stalled:
+        stream.close()
+    assert backends.get_backend().open_streams == 0
+    backends.close_backends()
+
+
+def test_unregistered_query_files_are_rejected_before_reaching_the_db(tmp_path: Path) -> None:
+    stray = tmp_path / "get_num_clips.sql"
+    stray.write_text("SELECT 1;")
+    with pytest.raises(FileNotFoundError, match="Query file not found"):
+        execute_query(stray)
+    with pytest.raises(FileNotFoundError, match="Query file not found"):
+        execute_query("no_such_query.sql")
+
+
+def test_async_api_runs_on_the_active_backend(temp_db: None) -> None:
+    async def scenario() -> list[tuple]:
+        await execute_query_async(ADD_CLIP, {"content": "alpha", "from_app_name": None})
+        await execute_batch_async([(ADD_CLIP, {"content": "beta", "from_app_name": "App"})])
+        counts = await asyncio.gather(*(execute_query_async(GET_NUM_CLIPS) for _ in range(10)))
+        assert set(map(tuple, counts)) == {((2,),)}
+        return await execute_query_async(GET_ALL_CLIPS)
+
+    assert [row[1] for row in asyncio.run(scenario())] == ["beta", "alpha"]
+
+
+class _SlowBackend(backends.DBBackend):
+    """Answers every request after `delay` seconds, recording how many were in flight at once."""
+
+    name = "slow"
+    requires_key = False
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    def run(self, payload: dict[str, Any]) -> dict[str, Any]:
+        raise NotImplementedError
+
+    async def run_async(self, payload: dict[str, Any]) -> dict[str, Any]:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return {"ok": True, "rows": [[1]]}
+
+
+def test_async_api_limits_calls_in_flight(monkeypatch: pytest.MonkeyPatch) -> None:
+    backend = _SlowBackend(delay=0.01)
+    monkeypatch.setattr(dbmod, "get_backend", lambda: backend)
+    monkeypatch.setenv(backends.MAX_CONCURRENCY_ENV, "3")
+
+    async def scenario() -> list[list[tuple]]:
+        return await asyncio.gather(*(execute_query_async(GET_NUM_CLIPS) for _ in range(20)))
+
+    assert asyncio.run(scenario()) == [[(1,)]] * 20
+    assert backend.peak == 3
+
+
+def test_async_api_times_out_per_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(dbmod, "get_backend", lambda: _SlowBackend(delay=5))
+
+    with pytest.raises(TimeoutError, match="within 0.05s"):
+        asyncio.run(execute_query_async(GET_NUM_CLIPS, timeout=0.05))
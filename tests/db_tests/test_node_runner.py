@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import shutil
+import sys
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from app.core.constants import QUERIES_DIR, SCHEMA_DIR
+from app.db.backends import NODE_DB_RUNNER, NODE_DB_RUNNER_ARGS
+from app.db.node_runner import NodeRunner
+
+
+# Stand-in for `db_runner.mjs --serve`: echoes requests, exits on op=crash
+FAKE_RUNNER = textwrap.dedent(
+    """
+    import json, os, sys, time
+    for line in sys.stdin:
+        req = json.loads(line)
+        if req["op"] == "crash":
+            sys.exit(3)
+        if req["op"] == "sleep":
+            time.sleep(req["params"][0])
+        out = {"id": req["id"], "ok": True, "rows": [[req["params"][0], os.getpid()]]}
+        sys.stdout.write(json.dumps(out) + "\\n")
+        sys.stdout.flush()
+    """
+)
+
+
+@pytest.fixture
+def runner(tmp_path: Path):
+    script = tmp_path / "fake_runner.py"
+    script.write_text(FAKE_RUNNER, encoding="utf-8")
+    r = NodeRunner(script, node=sys.executable, timeout=10)
+    yield r
+    r.close()
+
+
+def test_runner_reuses_one_process(runner: NodeRunner) -> None:
+    pids = {runner.request({"op": "sql", "params": [i]})["rows"][0][1] for i in range(5)}
+    assert len(pids) == 1
+
+
+def test_runner_routes_concurrent_responses_by_id(runner: NodeRunner) -> None:
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: runner.request({"op": "sql", "params": [i]}), range(50)))
+    assert [r["rows"][0][0] for r in results] == list(range(50))
+
+
+def test_runner_restarts_after_crash(runner: NodeRunner) -> None:
+    first_pid = runner.request({"op": "sql", "params": [1]})["rows"][0][1]
+
+    with pytest.raises(RuntimeError, match="exited"):
+        runner.request({"op": "crash"})
+
+    second_pid = runner.request({"op": "sql", "params": [2]})["rows"][0][1]
+    assert second_pid != first_pid
+    assert runner.restarts == 1
+
+
+def test_runner_timeout_can_be_overridden_per_request(runner: NodeRunner) -> None:
+    runner.timeout = 0.2
+    with pytest.raises(TimeoutError):
+        runner.request({"op": "sleep", "params": [1]})
+
+    # No timeout: a slow request completes on the restarted runner
+    assert runner.request({"op": "sleep", "params": [0.5]}, timeout=None)["rows"][0][0] == 0.5
+
+
+def test_runner_answers_concurrent_async_requests(runner: NodeRunner) -> None:
+    async def scenario() -> list[dict]:
+        return await asyncio.gather(*(runner.request_async({"op": "sql", "params": [i]}) for i in range(50)))
+
+    assert [r["rows"][0][0] for r in asyncio.run(scenario())] == list(range(50))
+
+
+def test_async_timeout_abandons_the_request_but_keeps_the_runner(runner: NodeRunner) -> None:
+    pid = runner.request({"op": "sql", "params": [0]})["rows"][0][1]
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(runner.request_async({"op": "sleep", "params": [0.5]}, timeout=0.05))
+
+    # The late answer is dropped; the next request gets its own on the same process
+    assert runner.request({"op": "sql", "params": [7]})["rows"][0] == [7, pid]
+    assert runner.restarts == 0
+
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+@requires_node
+def test_db_runner_refuses_to_start_with_a_broken_query(tmp_path: Path) -> None:
+    queries = tmp_path / "queries"
+    queries.mkdir()
+    (queries / "get_num_clips.sql").write_text((QUERIES_DIR / "get_num_clips.sql").read_text(encoding="utf-8"))
+    (queries / "broken.sql").write_text("SELECT Nope FROM NoSuchTable;")
+    runner = NodeRunner(NODE_DB_RUNNER, timeout=30, args=["--queries", str(queries), "--schema", str(SCHEMA_DIR)])
+    try:
+        with pytest.raises(RuntimeError, match="Query broken failed to prepare"):
+            runner.request({"op": "query", "query": "get_num_clips"})
+    finally:
+        runner.close()
+
+
+@requires_node
+def test_db_runner_serves_registered_queries_by_name(tmp_path: Path) -> None:
+    runner = NodeRunner(NODE_DB_RUNNER, timeout=30, args=NODE_DB_RUNNER_ARGS)
+    db = {"dbPath": str(tmp_path / "runner.db"), "key": "k"}
+    try:
+        assert runner.request({"op": "query", "query": "get_schema_version", **db}) == {"ok": True, "rows": [[0]]}
+        # Served from the connection's prepared statement on repeat calls
+        assert runner.request({"op": "query", "query": "get_schema_version", **db})["rows"] == [[0]]
+        unknown = runner.request({"op": "query", "query": "no_such_query", **db})
+        assert not unknown["ok"] and "Unknown query: no_such_query" in unknown["error"]
+    finally:
+        runner.close()
+
+
+@requires_node
+def test_db_runner_binary_protocol_decodes_like_json(tmp_path: Path) -> None:
+    db = {"dbPath": str(tmp_path / "runner.db"), "key": "k"}
+    # INT / REAL / TEXT / all-NULL columns, plus columns that fall back to JSON (mixed, NUL in text)
+    sql = (
+        "SELECT * FROM (VALUES "
+        "(1, 2.5, 'a', NULL, 1, 'x'), "
+        "(NULL, NULL, '', NULL, 'two', 'y' || char(0) || 'z'), "
+        "(9007199254740991, -0.125, 'é✓', NULL, 3.5, NULL))"
+    )
+    requests = [
+        {"op": "sql", "sql": sql, **db},
+        {"op": "sql", "sql": sql + " WHERE 0", **db},
+        {"op": "batch", "steps": [{"sql": sql}, {"sql": "SELECT 7"}, {"sql": "CREATE TABLE T (A)"}], **db},
+        {"op": "query", "query": "no_such_query", **db},
+    ]
+
+    responses = {}
+    for protocol in ("json", "binary"):
+        runner = NodeRunner(NODE_DB_RUNNER, timeout=30, args=NODE_DB_RUNNER_ARGS, protocol=protocol)
+        try:
+            responses[protocol] = [runner.request({**r, "dbPath": str(tmp_path / f"{protocol}.db")}) for r in requests]
+            cursor = runner.request({"op": "iterate", "sql": sql, **db})["cursor"]
+            responses[protocol].append(runner.request({"op": "next", "cursor": cursor, "count": 2}))
+            responses[protocol].append(runner.request({"op": "next", "cursor": cursor, "count": 2}))
+        finally:
+            runner.close()
+
+    def as_lists(value):
+        if isinstance(value, (list, tuple)):
+            return [as_lists(v) for v in value]
+        if isinstance(value, dict):
+            return {k: as_lists(v) for k, v in value.items()}
+        return value
+
+    binary = responses["binary"]
+    # repr: 1 == 1.0, but the value types must match too
+    assert repr(as_lists(binary)) == repr(responses["json"])
+    assert binary[0]["rows"][2] == (9007199254740991, -0.125, "é✓", None, 3.5, None)
+    assert binary[0]["rows"][1][5] == "y\0z"
+    assert [r["done"] for r in binary[-2:]] == [False, True]
@@ -1,16 +1,28 @@
 from __future__ import annotations
 
+import json
+
 from unittest.mock import patch
 
+import pytest
 from fastapi.testclient import TestClient
 
 from app.api.main import app
-from app.models.clipboard.clipboard_models import Clip, Clips
+from app.models.clipboard.clipboard_models import Clip, ClipContent, Clips, ClipsPage
 
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def data_version():
+    """Reads are ETagged from the DB data version; these tests run without a DB."""
+    with patch(
+        "app.api.conditional.clipboard_service.get_data_version_async", return_value=41
+    ) as version:
+        yield version
+
+
 def test_get_recent_clips_endpoint_returns_clips_json():
     fake = Clips(
         clips=[
@@ -20,14 +32,14 @@ def test_get_recent_clips_endpoint_returns_clips_json():
     )
 
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_recent_clips",
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_recent_clips_async",
         return_value=fake,
     ) as mock_get:
         resp = client.get("/clipboard/get_recent_clips", params={"n": 2})
         assert resp.status_code == 200
         data = resp.json()
         assert "clips" in data and len(data["clips"]) == 2
-        mock_get.assert_called_once_with(2)
+        mock_get.assert_called_once_with(2, False)
 
 
 def test_get_all_clips_endpoint_returns_clips_json():
@@ -38,27 +50,31 @@ def test_get_all_clips_endpoint_returns_clips_json():
     )
 
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_clips",
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_clips_async",
         return_value=fake,
     ) as mock_get:
         resp = client.get("/clipboard/get_all_clips")
         assert resp.status_code == 200
         data = resp.json()
         assert data["clips"][0]["id"] == 1
-        mock_get.assert_called_once_with()
+        mock_get.assert_called_once_with(False)
 
 
 def test_add_clip_endpoint_calls_service():
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.add_clip_with_timestamp_support", return_value=None) as mock_add:
-        body = {"content": "hello", "timestamp": "2025-01-01T00:00:00Z"}
+    created = Clip(id=9, content="hello", from_app_name="Src", tags=["t"], timestamp="2025-01-01T00:00:00Z", is_favorite=True)
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.add_clip_with_timestamp_support_async", return_value=created) as mock_add:
+        body = {"content": "hello", "timestamp": "2025-01-01T00:00:00Z", "tags": ["t"], "is_favorite": True}
         resp = client.post("/clipboard/add_clip", params={"from_app_name": "Src"}, json=body)
         assert resp.status_code == 200
-        mock_add.assert_called_once_with(content="hello", timestamp="2025-01-01T00:00:00Z", from_app_name="Src")
+        assert resp.json()["id"] == 9
+        mock_add.assert_called_once_with(
+            content="hello", timestamp="2025-01-01T00:00:00Z", from_app_name="Src", tags=["t"], is_favorite=True
+        )
 
 
 def test_delete_clip_endpoint_calls_service():
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.delete_clip",
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.delete_clip_async",
         return_value=None,
     ) as mock_del:
         resp = client.post("/clipboard/delete_clip", params={"id": 123})
@@ -68,7 +84,7 @@ def test_delete_clip_endpoint_calls_service():
 
 def test_delete_all_clips_endpoint_calls_service():
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.delete_all_clips",
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.delete_all_clips_async",
         return_value=None,
     ) as mock_del_all:
         resp = client.post("/clipboard/delete_all_clips")
@@ -80,7 +96,7 @@ def test_delete_all_clips_endpoint_calls_service():
 
 
 def test_get_all_clips_after_id_endpoint():
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_clips_after_id") as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_clips_after_id_async") as m:
         m.return_value = Clips(clips=[])
         resp = client.get("/clipboard/get_all_clips_after_id", params={"before_id": 2})
         assert resp.status_code == 200
@@ -88,7 +104,7 @@ def test_get_all_clips_after_id_endpoint():
 
 
 def test_get_n_clips_before_id_endpoint():
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_n_clips_before_id") as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_n_clips_before_id_async") as m:
         m.return_value = Clips(clips=[])
         resp = client.get("/clipboard/get_n_clips_before_id", params={"n": 1, "before_id": 3})
         assert resp.status_code == 200
@@ -96,7 +112,7 @@ def test_get_n_clips_before_id_endpoint():
 
 
 def test_get_num_clips_endpoint():
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_clips", return_value=5) as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_clips_async", return_value=5) as m:
         resp = client.get("/clipboard/get_num_clips")
         assert resp.status_code == 200
         assert resp.json() == 5
@@ -106,85 +122,101 @@ def test_get_num_clips_endpoint():
 def test_dynamic_filter_endpoints():
     dummy = Clips(clips=[])
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.filter_all_clips", return_value=dummy) as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.filter_all_clips_async", return_value=dummy) as m:
         assert client.get(
             "/clipboard/filter_all_clips",
             params={"search": "a", "time_frame": "", "selected_tags": ["x"], "favorites_only": True},
         ).status_code == 200
-        m.assert_called_once_with("a", "", ["x"], [], True)
+        m.assert_called_once_with("a", "", ["x"], [], True, False, False, False)
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.filter_n_clips", return_value=dummy) as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.filter_n_clips_async", return_value=dummy) as m:
         assert client.get(
             "/clipboard/filter_n_clips",
-            params={"search": "a", "time_frame": "", "n": 1, "selected_tags": ["x"], "favorites_only": False},
+            params={
+                "search": "a",
+                "time_frame": "",
+                "n": 1,
+                "selected_tags": ["x"],
+                "favorites_only": False,
+                "sort_by_relevance": True,
+            },
         ).status_code == 200
-        m.assert_called_once_with("a", "", 1, ["x"], [], False)
+        m.assert_called_once_with("a", "", 1, ["x"], [], False, True, False, False)
 
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.filter_all_clips_after_id",
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.filter_all_clips_after_id_async",
         return_value=dummy,
     ) as m:
         assert client.get(
             "/clipboard/filter_all_clips_after_id",
             params={"search": "", "time_frame": "", "after_id": 2, "selected_tags": [], "favorites_only": False},
         ).status_code == 200
-    m.assert_called_once_with("", "", 2, [], [], False)
+    m.assert_called_once_with("", "", 2, [], [], False, False, False)
 
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.filter_n_clips_before_id",
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.filter_n_clips_before_id_async",
         return_value=dummy,
     ) as m:
         assert client.get(
             "/clipboard/filter_n_clips_before_id",
-            params={"search": "", "time_frame": "", "n": 1, "before_id": 4, "selected_tags": [], "favorites_only": False},
+            params={
+                "search": "",
+                "time_frame": "",
+                "n": 1,
+                "before_id": 4,
+                "selected_tags": [],
+                "favorites_only": False,
+                "word_search": True,
+                "preview": True,
+            },
         ).status_code == 200
-        m.assert_called_once_with("", "", 1, 4, [], [], False)
+        m.assert_called_once_with("", "", 1, 4, [], [], False, True, True)
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_filtered_clips", return_value=7) as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_filtered_clips_async", return_value=7) as m:
         resp = client.get(
             "/clipboard/get_num_filtered_clips",
             params={"search": "", "time_frame": "", "selected_tags": [], "favorites_only": False},
         )
         assert resp.status_code == 200
         assert resp.json() == 7
-        m.assert_called_once_with("", "", [], [], False)
+        m.assert_called_once_with("", "", [], [], False, False)
 
 
 def test_tag_and_favorite_endpoints():
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.add_clip_tag") as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.add_clip_tag_async") as m:
         assert (
             client.post("/clipboard/add_clip_tag", params={"clip_id": 1, "tag_name": "x"}).status_code == 200
         )
         m.assert_called_once_with(1, "x")
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.remove_clip_tag") as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.remove_clip_tag_async") as m:
         assert (
             client.post("/clipboard/remove_clip_tag", params={"clip_id": 1, "tag_id": 2}).status_code == 200
         )
         m.assert_called_once_with(1, 2)
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_tags", return_value={"tags": []}) as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_tags_async", return_value={"tags": []}) as m:
         assert client.get("/clipboard/get_all_tags").status_code == 200
         m.assert_called_once_with()
 
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_clips_per_tag", return_value=3
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_clips_per_tag_async", return_value=3
     ) as m:
         resp = client.get("/clipboard/get_num_clips_per_tag", params={"tag_id": 1})
         assert resp.status_code == 200
         assert resp.json() == 3
         m.assert_called_once_with(1)
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.add_favorite") as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.add_favorite_async") as m:
         assert client.post("/clipboard/add_favorite", params={"clip_id": 5}).status_code == 200
         m.assert_called_once_with(5)
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.remove_favorite") as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.remove_favorite_async") as m:
         assert client.post("/clipboard/remove_favorite", params={"clip_id": 5}).status_code == 200
         m.assert_called_once_with(5)
 
     with patch(
-        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_favorites",
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_favorites_async",
         return_value={"clip_ids": [1, 2]},
     ) as m:
         resp = client.get("/clipboard/get_all_favorites")
@@ -192,7 +224,7 @@ def test_tag_and_favorite_endpoints():
         assert resp.json()["clip_ids"] == [1, 2]
         m.assert_called_once_with()
 
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_favorites", return_value=4) as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_favorites_async", return_value=4) as m:
         resp = client.get("/clipboard/get_num_favorites")
         assert resp.status_code == 200
         assert resp.json() == 4
@@ -200,8 +232,243 @@ def test_tag_and_favorite_endpoints():
 
 
 def test_get_all_from_apps_endpoint():
-    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_from_apps", return_value=["Chrome", "Safari"]) as m:
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_from_apps_async", return_value=["Chrome", "Safari"]) as m:
         resp = client.get("/clipboard/get_all_from_apps")
         assert resp.status_code == 200
         assert set(resp.json()) == {"Chrome", "Safari"}
         m.assert_called_once_with()
+
+
+def test_cache_stats_endpoint():
+    resp = client.get("/clipboard/cache_stats")
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"hits", "misses", "evictions", "entries", "max_entries", "data_version"}
+
+
+def test_clip_by_id_and_multi_get_endpoints():
+    clip = Clip(id=3, content="c", tags=["t"], timestamp="2025-01-01T00:00:00Z", is_favorite=True)
+
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_clip_async", return_value=clip) as m:
+        resp = client.get("/clipboard/clip/3")
+        assert resp.status_code == 200
+        assert resp.json()["tags"] == ["t"] and resp.json()["is_favorite"] is True
+        m.assert_called_once_with(3)
+
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_clip_async", return_value=None):
+        assert client.get("/clipboard/clip/9").status_code == 404
+
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_clips_by_ids_async",
+        return_value=Clips(clips=[clip]),
+    ) as m:
+        resp = client.post("/clipboard/clips/multi_get", json=[3, 9])
+        assert resp.status_code == 200
+        assert [c["id"] for c in resp.json()["clips"]] == [3]
+        m.assert_called_once_with([3, 9])
+
+    assert client.post("/clipboard/clips/multi_get", json=list(range(1001))).status_code == 422
+    assert client.post("/clipboard/clips/multi_get", json=["x"]).status_code == 422
+
+
+def test_clip_content_endpoint():
+    content = ClipContent(id=3, offset=256, content="rest", content_length=260)
+
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_clip_content_async", return_value=content
+    ) as m:
+        resp = client.get("/clipboard/clip_content", params={"clip_id": 3, "offset": 256})
+        assert resp.status_code == 200
+        assert resp.json() == {"id": 3, "offset": 256, "content": "rest", "content_length": 260}
+        m.assert_called_once_with(3, 256)
+
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_clip_content_async", return_value=None):
+        assert client.get("/clipboard/clip_content", params={"clip_id": 9}).status_code == 404
+    assert client.get("/clipboard/clip_content", params={"clip_id": 3, "offset": -1}).status_code == 422
+
+
+def test_clips_page_endpoint():
+    page = ClipsPage(clips=[Clip(id=3, content="c", timestamp="2025-01-01T00:00:00Z")], next_cursor="abc")
+
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_clips_page_async", return_value=page) as m:
+        resp = client.get("/clipboard/clips", params={"search": "c", "cursor": "xyz", "limit": 1, "preview": True})
+        assert resp.status_code == 200
+        assert resp.json()["next_cursor"] == "abc"
+        m.assert_called_once_with("c", "", [], [], False, False, "xyz", 1, True)
+
+    assert client.get("/clipboard/clips", params={"limit": 10_000}).status_code == 422
+
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_clips_page_async",
+        side_effect=ValueError("Invalid cursor"),
+    ):
+        resp = client.get("/clipboard/clips", params={"cursor": "bad"})
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Invalid cursor"
+
+
+def test_stream_endpoints_write_ndjson():
+    clips = [Clip(id=2, content="b", timestamp="t"), Clip(id=1, content="a", timestamp="t")]
+
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.stream_all_clips",
+        return_value=iter(clips),
+    ):
+        resp = client.get("/clipboard/stream_all_clips")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        assert [Clip.model_validate_json(line) for line in resp.text.splitlines()] == clips
+
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.stream_filter_all_clips",
+        return_value=iter(clips[:1]),
+    ) as m:
+        resp = client.get("/clipboard/stream_filter_all_clips", params={"search": "b"})
+        assert resp.text.splitlines() == [clips[0].model_dump_json()]
+        m.assert_called_once_with("b", "", [], [], False, False, False)
+
+
+def test_stream_endpoint_reports_open_failures_and_cut_short_streams():
+    def failing_later():
+        yield Clip(id=1, content="a", timestamp="t")
+        raise RuntimeError("DB runner error: boom")
+
+    def failing_now():
+        raise RuntimeError("DB runner error: Too many open cursors (16)")
+        yield  # pragma: no cover
+
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.stream_all_clips",
+        return_value=failing_now(),
+    ):
+        resp = client.get("/clipboard/stream_all_clips")
+        assert resp.status_code == 503
+
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.stream_all_clips",
+        return_value=failing_later(),
+    ):
+        resp = client.get("/clipboard/stream_all_clips")
+        assert resp.status_code == 200
+        lines = resp.text.splitlines()
+        assert Clip.model_validate_json(lines[0]).id == 1
+        assert json.loads(lines[-1]) == {"error": "DB runner error: boom"}
+
+
+def test_db_timeouts_become_504():
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_clips_async",
+        side_effect=TimeoutError("DB call did not finish within 60.0s"),
+    ):
+        resp = client.get("/clipboard/get_num_clips")
+    assert resp.status_code == 504
+    assert "did not finish" in resp.json()["detail"]
+
+
+def test_add_clips_endpoint_passes_items_and_returns_outcomes():
+    from app.models.clipboard.clipboard_models import AddedClip, AddedClips
+
+    result = AddedClips(clips=[AddedClip(id=1, outcome="inserted"), AddedClip(id=1, outcome="repeated")])
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.add_clips_async", return_value=result
+    ) as m:
+        body = [{"content": "a", "tags": ["x"], "is_favorite": True}, {"content": "a"}]
+        resp = client.post("/clipboard/add_clips", params={"from_app_name": "Importer"}, json=body)
+    assert resp.status_code == 200
+    assert resp.json() == {"clips": [{"id": 1, "outcome": "inserted"}, {"id": 1, "outcome": "repeated"}]}
+    clips = m.call_args.args[0]
+    assert [(c.content, c.tags, c.is_favorite) for c in clips] == [("a", ["x"], True), ("a", [], False)]
+    assert m.call_args.kwargs == {"from_app_name": "Importer"}
+
+
+def test_add_clips_endpoint_declares_its_batch_limit():
+    from app.core.constants import MAX_ADD_CLIPS
+
+    schema = client.get("/openapi.json").json()
+    body = schema["paths"]["/clipboard/add_clips"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    assert body["maxItems"] == MAX_ADD_CLIPS
+
+
+def test_reads_answer_a_matching_if_none_match_with_304_without_querying(data_version):
+    fake = Clips(clips=[Clip(id=1, content="a", timestamp="2025-01-01T00:00:00Z")])
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.get_recent_clips_async", return_value=fake
+    ) as mock_get:
+        first = client.get("/clipboard/get_recent_clips", params={"n": 5})
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and etag.startswith('W/"')
+
+        again = client.get("/clipboard/get_recent_clips", params={"n": 5}, headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+        assert mock_get.call_count == 1
+
+        # Other parameters, or a newer data version: a different tag, full answer
+        other = client.get("/clipboard/get_recent_clips", params={"n": 6}, headers={"If-None-Match": etag})
+        assert other.status_code == 200 and other.headers["etag"] != etag
+        data_version.return_value = 42
+        newer = client.get("/clipboard/get_recent_clips", params={"n": 5}, headers={"If-None-Match": etag})
+        assert newer.status_code == 200 and newer.headers["etag"] != etag
+        assert mock_get.call_count == 3
+
+
+def test_time_frame_reads_and_writes_are_not_etagged(data_version):
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_num_filtered_clips_async", return_value=1):
+        resp = client.get("/clipboard/get_num_filtered_clips", params={"time_frame": "past_week"})
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.delete_clip_async"):
+        write = client.post("/clipboard/delete_clip", params={"id": 1})
+    assert "etag" not in resp.headers and "etag" not in write.headers
+    data_version.assert_not_called()
+
+
+def test_large_bodies_are_gzipped_for_clients_that_accept_it():
+    fake = Clips(clips=[Clip(id=i, content="x" * 100, timestamp="2025-01-01T00:00:00Z") for i in range(50)])
+    with patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_all_clips_async", return_value=fake):
+        gzipped = client.get("/clipboard/get_all_clips", headers={"Accept-Encoding": "gzip"})
+        plain = client.get("/clipboard/get_all_clips", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert gzipped.json() == plain.json() and len(gzipped.json()["clips"]) == 50
+
+
+def test_events_endpoint_streams_server_sent_events():
+    from app.services.clipboard.event_feed import ClipEvent
+
+    batches = [
+        [ClipEvent(8, "clip_added", {"id": 3}), ClipEvent(9, "clip_favorited", {"clip_id": 3})],
+        [],
+        None,
+    ]
+    with (
+        patch(
+            "app.api.clipboard.clipboard_endpoints.clipboard_service.wait_for_events",
+            side_effect=batches,
+        ) as wait,
+        patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_last_event_id", return_value=12),
+        # TestClient reads the whole body, so end the stream after three rounds
+        patch("starlette.requests.Request.is_disconnected", side_effect=[False, False, False, True]),
+    ):
+        resp = client.get("/clipboard/events", headers={"Last-Event-ID": "7"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert "etag" not in resp.headers
+    assert resp.text == (
+        'id: 8\nevent: clip_added\ndata: {"id": 3}\n\n'
+        'id: 9\nevent: clip_favorited\ndata: {"clip_id": 3}\n\n'
+        ": keep-alive\n\n"
+        "id: 12\nevent: reset\ndata: {}\n\n"
+    )
+    # Resumes after the header's ID, then after the last event it sent
+    assert [c.args[0] for c in wait.call_args_list] == [7, 9, 9]
+
+
+def test_events_endpoint_without_an_id_starts_at_the_newest_event():
+    with (
+        patch(
+            "app.api.clipboard.clipboard_endpoints.clipboard_service.wait_for_events", side_effect=[[]]
+        ) as wait,
+        patch("app.api.clipboard.clipboard_endpoints.clipboard_service.get_last_event_id", return_value=5),
+        patch("starlette.requests.Request.is_disconnected", side_effect=[False, True]),
+    ):
+        resp = client.get("/clipboard/events")
+    assert resp.text == ": keep-alive\n\n"
+    assert wait.call_args.args[0] == 5
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.models.clipboard.clipboard_models import AddedClips
+from app.poller.clipboard_poller import ApiClipSink, ClipboardPoller, ClipSpool, FakeClipboardSource
+
+
+class FakeApi:
+    """httpx transport recording /add_clips batches; `up = False` refuses connections."""
+
+    def __init__(self) -> None:
+        self.up = True
+        self.status = 200
+        self.batches: list[list[str]] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if not self.up:
+            raise httpx.ConnectError("connection refused", request=request)
+        if self.status == 200:
+            self.batches.append([clip["content"] for clip in json.loads(request.content)])
+        return httpx.Response(self.status, json={"clips": []})
+
+    def client(self) -> httpx.Client:
+        return httpx.Client(transport=httpx.MockTransport(self), base_url="http://api")
+
+
+@pytest.fixture
+def api() -> FakeApi:
+    return FakeApi()
+
+
+def make_poller(source: FakeClipboardSource, api: FakeApi, tmp_path: Path, **kwargs) -> ClipboardPoller:
+    options = {"debounce": 1.0, "batch_size": 3, "flush_after": 5.0, "retry_after": 30.0, **kwargs}
+    return ClipboardPoller(source, ApiClipSink(api.client()), ClipSpool(tmp_path / "spool.jsonl"), **options)
+
+
+def test_unchanged_content_is_skipped_and_bursts_are_debounced(api: FakeApi, tmp_path: Path) -> None:
+    source = FakeClipboardSource("already there")
+    poller = make_poller(source, api, tmp_path)
+    poller.poll_once(0.0)  # the starting content counts as stored
+
+    # Keystroke-level edits: only the text that stays put for the debounce period is recorded
+    for t, text in enumerate(["h", "he", "hel", "hello"]):
+        source.copy(text)
+        poller.poll_once(1.0 + t * 0.2)
+    for t in (2.0, 2.5, 3.0):
+        poller.poll_once(t)
+    poller.close(3.0)
+
+    assert api.batches == [["hello"]]
+
+
+def test_clips_are_sent_in_batches(api: FakeApi, tmp_path: Path) -> None:
+    source = FakeClipboardSource()
+    poller = make_poller(source, api, tmp_path)
+    poller.poll_once(0.0)
+
+    now = 0.0
+    for i in range(4):
+        source.copy(f"clip {i}")
+        for _ in range(2):
+            now += 1.0
+            poller.poll_once(now)
+    assert api.batches == [["clip 0", "clip 1", "clip 2"]]  # a full batch goes at once
+
+    poller.poll_once(now + 5.0)  # the rest once the oldest has waited flush_after
+    assert api.batches[1:] == [["clip 3"]]
+
+
+def test_poll_interval_backs_off_while_idle(api: FakeApi, tmp_path: Path) -> None:
+    source = FakeClipboardSource("x")
+    poller = make_poller(source, api, tmp_path, interval=0.5, idle_interval=2.0)
+    delays = [poller.poll_once(float(t)) for t in range(6)]
+    assert delays == sorted(delays) and delays[-1] == 2.0
+
+    source.copy("y")
+    assert poller.poll_once(6.0) == 0.5
+
+
+def test_clips_are_spooled_while_the_api_is_down_and_replayed_in_order(api: FakeApi, tmp_path: Path) -> None:
+    source = FakeClipboardSource()
+    poller = make_poller(source, api, tmp_path, batch_size=1)
+    poller.poll_once(0.0)
+    spool = tmp_path / "spool.jsonl"
+
+    api.up = False
+    for t, text in ((1.0, "a"), (3.0, "b")):
+        source.copy(text)
+        poller.poll_once(t)
+        poller.poll_once(t + 1.0)
+    assert api.batches == []
+    assert [json.loads(line)["content"] for line in spool.read_text().splitlines()] == ["a", "b"]
+
+    # While waiting to retry, new clips go straight to the spool without an HTTP call
+    api.up = True
+    source.copy("c")
+    poller.poll_once(5.0)
+    poller.poll_once(6.0)
+    assert api.batches == []
+
+    poller.poll_once(32.0)  # retry time: the spool is replayed oldest first
+    assert api.batches == [["a", "b", "c"]]
+    assert not spool.exists()
+
+
+def test_spool_left_by_a_previous_run_is_replayed_on_start(api: FakeApi, tmp_path: Path) -> None:
+    spool = ClipSpool(tmp_path / "spool.jsonl")
+    spool.append([{"content": "from last run", "timestamp": "2025-01-01T00:00:00Z", "from_app_name": None}])
+    with spool.path.open("a") as f:
+        f.write('{"content": "cut sh')  # crash mid-append
+
+    make_poller(FakeClipboardSource(), api, tmp_path).poll_once(0.0)
+    assert api.batches == [["from last run"]]
+    assert not spool.has_clips()
+
+
+def test_batches_the_api_rejects_are_dropped_not_retried(api: FakeApi, tmp_path: Path) -> None:
+    source = FakeClipboardSource()
+    poller = make_poller(source, api, tmp_path)
+    poller.poll_once(0.0)
+    api.status = 422
+    source.copy("bad")
+    poller.poll_once(0.5)
+    poller.close(0.5)
+    assert api.batches == []
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+def test_batches_are_accepted_by_the_add_clips_endpoint(tmp_path: Path) -> None:
+    source = FakeClipboardSource()
+    poller = ClipboardPoller(
+        source, ApiClipSink(TestClient(app)), ClipSpool(tmp_path / "spool.jsonl"), from_app_name="Poller"
+    )
+    poller.poll_once(0.0)
+    source.copy("hello")
+    poller.poll_once(0.5)
+    with patch(
+        "app.api.clipboard.clipboard_endpoints.clipboard_service.add_clips_async",
+        return_value=AddedClips(clips=[]),
+    ) as add:
+        poller.close(0.0)
+    (items,), _ = add.call_args
+    assert [(i.content, i.from_app_name) for i in items] == [("hello", "Poller")]
+    assert items[0].timestamp.endswith("Z")
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from pathlib import Path
 from typing import Any
 from unittest.mock import patch
 
@@ -9,23 +12,15 @@ from app.services.clipboard import clipboard_service
 
 
 @pytest.fixture
-def fake_rows() -> list[dict[str, Any]]:
+def fake_rows() -> list[tuple[Any, ...]]:
+    # (ClipID, Content, FromAppName, Tags, Timestamp, IsFavorite); the queries return timestamps in UTC format
     return [
-    {"ClipID": 1, "Content": "alpha", "FromAppName": "AppA", "Tags": "x,y", "Timestamp": "2025-01-01T00:00:00Z", "IsFavorite": 1},
-    {"ClipID": 2, "Content": "beta", "FromAppName": None, "Tags": None, "Timestamp": "2025-01-02T00:00:00Z", "IsFavorite": 0},
+    (1, "alpha", "AppA", "x,y", "2025-01-01T00:00:00Z", 1),
+    (2, "beta", None, None, "2025-01-02T00:00:00Z", 0),
     ]
 
 
-@pytest.fixture
-def fake_rows_sqlite_format() -> list[dict[str, Any]]:
-    # Simulate SQLite datetime format without timezone info
-    return [
-    {"ClipID": 1, "Content": "alpha", "FromAppName": "AppA", "Tags": "x,y", "Timestamp": "2025-01-01 00:00:00", "IsFavorite": 1},
-    {"ClipID": 2, "Content": "beta", "FromAppName": None, "Tags": None, "Timestamp": "2025-01-02 12:30:45", "IsFavorite": 0},
-    ]
-
-
-def test_get_recent_clips_maps_rows_to_model(fake_rows: list[dict[str, Any]]):
+def test_get_recent_clips_maps_rows_to_model(fake_rows: list[tuple[Any, ...]]):
     with patch("app.services.clipboard.clipboard_service.execute_query", return_value=fake_rows) as exec_mock:
         result = clipboard_service.get_recent_clips(2)
         exec_mock.assert_called_once()
@@ -37,18 +32,23 @@ def test_get_recent_clips_maps_rows_to_model(fake_rows: list[dict[str, Any]]):
     assert result.clips[0].is_favorite is True
 
 
-def test_get_recent_clips_converts_sqlite_timestamps_to_utc_format(fake_rows_sqlite_format: list[dict[str, Any]]):
-    """Test that SQLite datetime format gets converted to UTC with Z suffix."""
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=fake_rows_sqlite_format) as exec_mock:
-        result = clipboard_service.get_recent_clips(2)
-        exec_mock.assert_called_once()
-        assert len(result.clips) == 2
-        # Timestamps should be converted to UTC format with Z suffix
-        assert result.clips[0].timestamp == "2025-01-01T00:00:00Z"
-        assert result.clips[1].timestamp == "2025-01-02T12:30:45Z"
+def test_clips_from_rows_matches_validated_models(fake_rows: list[tuple[Any, ...]]):
+    """The unvalidated fast path builds the same models (and JSON) as validation would."""
+    from app.models.clipboard.clipboard_models import Clip, Clips
+
+    fast = clipboard_service._clips_from_rows(fake_rows)
+    validated = Clips(clips=[
+        Clip(
+            id=1, content="alpha", from_app_name="AppA", tags=["x", "y"], timestamp="2025-01-01T00:00:00Z",
+            is_favorite=True, content_length=5,
+        ),
+        Clip(id=2, content="beta", timestamp="2025-01-02T00:00:00Z", content_length=4),
+    ])
+    assert fast == validated
+    assert fast.model_dump_json() == validated.model_dump_json()
 
 
-def test_get_all_clips_maps_rows_to_model(fake_rows: list[dict[str, Any]]):
+def test_get_all_clips_maps_rows_to_model(fake_rows: list[tuple[Any, ...]]):
     with patch("app.services.clipboard.clipboard_service.execute_query", return_value=fake_rows) as exec_mock:
         result = clipboard_service.get_all_clips()
         exec_mock.assert_called_once()
@@ -58,7 +58,7 @@ def test_get_all_clips_maps_rows_to_model(fake_rows: list[dict[str, Any]]):
 
 
 def test_add_clip_calls_execute_query():
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_mock:
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(1,)]) as exec_mock:
         clipboard_service.add_clip("hello world", from_app_name="AppSrc")
         exec_mock.assert_called_once()
         args, kwargs = exec_mock.call_args
@@ -76,47 +76,48 @@ def test_add_clip_calls_execute_query():
         )
 
 
-def test_delete_clip_calls_execute_query():
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_mock:
+def test_delete_clip_runs_single_batch():
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[]) as batch_mock:
         clipboard_service.delete_clip(123)
-        # multiple calls now for composed deletion logic; ensure last call deletes clip
-        assert exec_mock.call_count >= 2
-        last_call = exec_mock.call_args_list[-1]
-        args, kwargs = last_call
-        # Expect DELETE_CLIP file path then params dict
-        assert any(
-            (isinstance(a, dict) and a.get("clip_id") == 123)
-            or (isinstance(kwargs.get("params"), dict) and kwargs.get("params").get("clip_id") == 123)
-            for a in args
-        ) or (kwargs.get("clip_id") == 123)
-
-
-def test_delete_all_clips_calls_execute_query():
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_mock:
+        # All deletion steps go out as one atomic batch; the clip row is removed last
+        batch_mock.assert_called_once()
+        steps = batch_mock.call_args.args[0]
+        assert len(steps) == 4
+        query, params = steps[-1]
+        assert str(query).endswith("delete_clip.sql")
+        assert all(p == {"clip_id": 123} for _, p in steps)
+
+
+def test_delete_all_clips_runs_single_batch():
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[]) as batch_mock:
         clipboard_service.delete_all_clips()
-        assert exec_mock.call_count == 4
+        batch_mock.assert_called_once()
+        assert len(batch_mock.call_args.args[0]) == 4
 
 
 def test_add_clip_with_timestamp_support_uses_provided_timestamp():
     """Test that add_clip_with_timestamp_support properly handles provided UTC timestamps."""
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_mock:
-        clipboard_service.add_clip_with_timestamp_support(
+    stored = [(7, "test content", "TestApp", None, "2025-01-01T15:30:00Z", 0)]
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[[(7,)], stored]) as batch_mock:
+        clip = clipboard_service.add_clip_with_timestamp_support(
             content="test content",
             timestamp="2025-01-01T15:30:00Z",
             from_app_name="TestApp"
         )
-        exec_mock.assert_called_once()
-        args, kwargs = exec_mock.call_args
+        batch_mock.assert_called_once()
         # Should use ADD_CLIP_WITH_TIMESTAMP and convert timestamp to SQLite format
-        query_params = args[1] if len(args) >= 2 else kwargs.get("params")
+        query, query_params = batch_mock.call_args.args[0][0]
+        assert str(query).endswith("add_clip_with_timestamp.sql")
         assert query_params["content"] == "test content"
         assert query_params["timestamp"] == "2025-01-01 15:30:00"  # Converted to SQLite format
         assert query_params["from_app_name"] == "TestApp"
+    assert clip.id == 7 and clip.timestamp == "2025-01-01T15:30:00Z"
 
 
 def test_add_clip_with_timestamp_support_generates_utc_when_no_timestamp():
     """Test that add_clip_with_timestamp_support generates UTC timestamp when none provided."""
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_mock:
+    stored = [(1, "test content", "TestApp", None, "2025-08-15 12:00:00", 0)]
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[[(1,)], stored]) as batch_mock:
         with patch("app.services.clipboard.clipboard_service._generate_utc_timestamp", return_value="2025-08-15T12:00:00Z") as time_mock:
             clipboard_service.add_clip_with_timestamp_support(
                 content="test content",
@@ -124,27 +125,27 @@ def test_add_clip_with_timestamp_support_generates_utc_when_no_timestamp():
                 from_app_name="TestApp"
             )
             time_mock.assert_called_once()
-            exec_mock.assert_called_once()
-            args, kwargs = exec_mock.call_args
-            query_params = args[1] if len(args) >= 2 else kwargs.get("params")
+            _, query_params = batch_mock.call_args.args[0][0]
             assert query_params["timestamp"] == "2025-08-15 12:00:00"  # Converted to SQLite format
 
 
-# ---- Merged tests from test_new_service.py ----
-
-
-def test_ensure_utc_format_handles_various_inputs():
-    """Test _ensure_utc_format helper function with different timestamp formats."""
-    from app.services.clipboard.clipboard_service import _ensure_utc_format
-
-    # Already UTC format with Z
-    assert _ensure_utc_format("2025-01-01T12:00:00Z") == "2025-01-01T12:00:00Z"
+def test_add_clip_with_tags_and_favorite_is_one_batch():
+    stored = [(3, "c", None, "a,b", "2025-01-01 00:00:00", 1)]
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[[(3,)], [], [], [], stored]) as batch_mock:
+        clip = clipboard_service.add_clip_with_timestamp_support("c", tags=["a", "b", "a"], is_favorite=True)
+    steps = batch_mock.call_args.args[0]
+    assert [Path(str(q)).stem for q, _ in steps] == [
+        "add_clip_with_timestamp",
+        "add_tags_for_clips",
+        "add_clip_tags_for_clips",
+        "add_favorites_for_hashes",
+        "get_clip_by_content_hash",
+    ]
+    assert [tag for _, tag in json.loads(steps[1][1]["clip_tags"])] == ["a", "b"]
+    assert clip.tags == ["a", "b"] and clip.is_favorite
 
-    # SQLite datetime format (space-separated)
-    assert _ensure_utc_format("2025-01-01 12:00:00") == "2025-01-01T12:00:00Z"
 
-    # ISO format without Z
-    assert _ensure_utc_format("2025-01-01T12:00:00") == "2025-01-01T12:00:00Z"
+# ---- Merged tests from test_new_service.py ----
 
 
 def test_parse_timestamp_for_db_converts_utc_to_sqlite_format():
@@ -176,7 +177,7 @@ def test_generate_utc_timestamp_returns_utc_with_z_suffix():
 def test_get_all_clips_after_id_calls_execute_query():
     from app.services.clipboard import clipboard_service as svc
 
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(3, "c", "t")]) as exec_q:
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(3, "c", None, None, "2025-01-01T00:00:00Z", 0)]) as exec_q:
         result = svc.get_all_clips_after_id(2)
         exec_q.assert_called_once()
         assert result.clips[0].id == 3
@@ -185,7 +186,7 @@ def test_get_all_clips_after_id_calls_execute_query():
 def test_get_n_clips_before_id_calls_execute_query():
     from app.services.clipboard import clipboard_service as svc
 
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(2, "b", "t")]) as exec_q:
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(2, "b", None, None, "2025-01-01T00:00:00Z", 0)]) as exec_q:
         result = svc.get_n_clips_before_id(1, 3)
         exec_q.assert_called_once()
         assert result.clips[0].id == 2
@@ -203,7 +204,7 @@ def test_get_num_clips_calls_execute_query():
 def test_add_clip_with_timestamp_calls_execute_query():
     from app.services.clipboard import clipboard_service as svc
 
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_q:
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(1,)]) as exec_q:
         svc.add_clip_with_timestamp("x", "2024-01-01 00:00:00", from_app_name="Src")
         exec_q.assert_called_once()
 
@@ -240,13 +241,13 @@ def test_dynamic_filters_use_execute_dynamic_query():
 def test_tag_and_favorite_methods():
     from app.services.clipboard import clipboard_service as svc
 
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_q:
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[]) as exec_b:
         svc.add_clip_tag(1, "tag")
-        exec_q.assert_called()
+        exec_b.assert_called_once()
 
-    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[]) as exec_q:
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[]) as exec_b:
         svc.remove_clip_tag(1, 2)
-        exec_q.assert_called()
+        exec_b.assert_called_once()
 
     with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(1, "tag")]) as exec_q:
         tags = svc.get_all_tags()
@@ -281,3 +282,208 @@ def test_get_all_from_apps():
         apps = svc.get_all_from_apps()
         exec_q.assert_called_once()
         assert set(apps) == {"Chrome", "Safari"}
+
+
+def test_get_clips_page_returns_next_cursor_only_when_more_rows_exist():
+    from app.services.clipboard import clipboard_service as svc
+
+    rows = [(i, f"c{i}", None, None, "2025-01-01 00:00:00", 0) for i in (9, 8, 7)]
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query", return_value=rows) as exec_d:
+        page = svc.get_clips_page(search="c", limit=2)
+        exec_d.assert_called_once()
+    assert [c.id for c in page.clips] == [9, 8]
+    assert page.next_cursor is not None
+
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query", return_value=rows[2:]):
+        last = svc.get_clips_page(search="c", cursor=page.next_cursor, limit=2)
+    assert [c.id for c in last.clips] == [7]
+    assert last.next_cursor is None
+
+
+def test_get_clips_page_rejects_foreign_or_garbled_cursors():
+    from app.services.clipboard import clipboard_service as svc
+
+    cursor = svc._encode_cursor(5, svc._ensure_filters(search="a"))
+    assert svc._decode_cursor(cursor, svc._ensure_filters(search="a")) == 5
+
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query") as exec_d:
+        with pytest.raises(ValueError, match="does not match"):
+            svc.get_clips_page(search="b", cursor=cursor)
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            svc.get_clips_page(cursor="not-a-cursor!")
+        exec_d.assert_not_called()
+
+
+def test_preview_pages_are_cached_apart_and_share_cursors():
+    from app.services.clipboard import clipboard_service as svc
+
+    # Preview rows carry the full length as a seventh column
+    rows = [(i, f"c{i}"[:2], None, None, "2025-01-01T00:00:00Z", 0, 1000 + i) for i in (9, 8, 7)]
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query", return_value=rows) as exec_d:
+        preview = svc.get_clips_page(search="prev", limit=2, preview=True)
+        assert svc.get_clips_page(search="prev", limit=2, preview=True) is preview
+        assert svc.get_clips_page(search="prev", limit=2) is not preview
+        assert exec_d.call_count == 2
+    assert [(c.content, c.content_length) for c in preview.clips] == [("c9", 1009), ("c8", 1008)]
+
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query", return_value=[]):
+        assert svc.get_clips_page(search="prev", cursor=preview.next_cursor, limit=2).clips == []
+
+
+def test_get_clip_and_multi_get_look_up_ids(fake_rows: list[tuple[Any, ...]]):
+    from app.services.clipboard import clipboard_service as svc
+
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=fake_rows[:1]) as exec_q:
+        clip = svc.get_clip(1)
+        exec_q.assert_called_once_with(svc.GET_CLIP_BY_ID, {"clip_id": 1})
+    assert (clip.id, clip.tags, clip.is_favorite) == (1, ["x", "y"], True)
+
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=fake_rows) as exec_q:
+        clips = svc.get_clips_by_ids([2, 1])
+        exec_q.assert_called_once_with(svc.GET_CLIPS_BY_IDS, {"clip_ids": "[2, 1]"})
+    assert [c.id for c in clips.clips] == [1, 2]
+
+    with patch("app.services.clipboard.clipboard_service.execute_query_async", return_value=[]):
+        assert asyncio.run(svc.get_clip_async(7)) is None
+        assert asyncio.run(svc.get_clips_by_ids_async([7])).clips == []
+
+
+def test_get_clip_content_returns_none_for_missing_clips():
+    from app.services.clipboard import clipboard_service as svc
+
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[("rest", 300)]) as exec_q:
+        content = svc.get_clip_content(4, offset=256)
+        exec_q.assert_called_once_with(svc.GET_CLIP_CONTENT, {"clip_id": 4, "offset": 256})
+    assert (content.id, content.offset, content.content, content.content_length) == (4, 256, "rest", 300)
+
+    with patch("app.services.clipboard.clipboard_service.execute_query_async", return_value=[]):
+        assert asyncio.run(svc.get_clip_content_async(5)) is None
+
+
+def test_stream_all_clips_maps_rows_lazily():
+    from app.services.clipboard import clipboard_service as svc
+
+    rows = iter([(2, "b", None, None, "2025-01-01T00:00:00Z", 0), (1, "a", None, "x", "2025-01-01T00:00:00Z", 1)])
+    with patch("app.services.clipboard.clipboard_service.iterate_query", return_value=rows) as it:
+        clips = svc.stream_all_clips()
+        it.assert_not_called()
+        first = next(clips)
+        assert first.id == 2 and first.timestamp == "2025-01-01T00:00:00Z"
+        assert [c.tags for c in clips] == [["x"]]
+
+
+def test_repeated_filter_reads_are_served_from_the_cache_until_a_write():
+    from app.services.clipboard import clipboard_service as svc
+
+    rows = [(1, "a", None, None, "2025-01-01 00:00:00", 0)]
+    version = svc.get_result_cache_stats().data_version
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query", return_value=rows) as exec_d:
+        first = svc.filter_n_clips(search="a", n=5, selected_tags=["x", "y"])
+        # Same filters, tags in another order: no DB round trip
+        assert svc.filter_n_clips(search="a", n=5, selected_tags=["y", "x"]) is first
+        assert exec_d.call_count == 1
+        # Different page parameters are a different entry
+        svc.filter_n_clips(search="a", n=6, selected_tags=["x", "y"])
+        assert exec_d.call_count == 2
+
+        with patch("app.services.clipboard.clipboard_service.execute_query"):
+            svc.add_favorite(1)
+        svc.filter_n_clips(search="a", n=5, selected_tags=["x", "y"])
+        assert exec_d.call_count == 3
+
+    stats = svc.get_result_cache_stats()
+    assert (stats.hits, stats.misses, stats.data_version) == (1, 3, version + 1)
+
+
+def test_time_frame_reads_bypass_the_cache():
+    from app.services.clipboard import clipboard_service as svc
+
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query", return_value=[(0,)]) as exec_d:
+        svc.get_num_filtered_clips(time_frame="past_24_hours")
+        svc.get_num_filtered_clips(time_frame="past_24_hours")
+        assert exec_d.call_count == 2
+
+
+def test_async_twins_share_the_cache_and_writes_bump_it():
+    from app.services.clipboard import clipboard_service as svc
+
+    rows = [(1, "a", None, None, "2025-01-01T00:00:00Z", 0)]
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query_async", return_value=rows) as exec_a:
+        first = asyncio.run(svc.filter_n_clips_async(search="a", n=5))
+        assert first.clips[0].timestamp == "2025-01-01T00:00:00Z"
+        # The sync read of the same filters is a cache hit
+        assert svc.filter_n_clips(search="a", n=5) is first
+
+        with patch("app.services.clipboard.clipboard_service.execute_batch_async") as batch_a:
+            asyncio.run(svc.add_clip_tag_async(1, "t"))
+        assert batch_a.call_count == 1
+        asyncio.run(svc.filter_n_clips_async(search="a", n=5))
+        assert exec_a.call_count == 2
+
+
+def test_async_page_rejects_bad_cursor_before_querying():
+    from app.services.clipboard import clipboard_service as svc
+
+    with patch("app.services.clipboard.clipboard_service.execute_dynamic_query_async") as exec_a:
+        with pytest.raises(ValueError):
+            asyncio.run(svc.get_clips_page_async(cursor="garbage"))
+        exec_a.assert_not_called()
+
+
+def test_writes_publish_change_events():
+    from app.services.clipboard import clipboard_service as svc
+
+    start = svc.get_last_event_id()
+    with patch("app.services.clipboard.clipboard_service.execute_query", return_value=[(12,)]):
+        svc.add_clip("hello")
+        svc.add_favorite(12)
+    with patch("app.services.clipboard.clipboard_service.execute_batch", return_value=[]):
+        svc.add_clip_tag(12, "work")
+        svc.delete_clip(12)
+    with patch("app.services.clipboard.clipboard_service.execute_batch_async", return_value=[]):
+        asyncio.run(svc.remove_clip_tag_async(12, 3))
+
+    events = svc.get_events_since(start)
+    assert [(e.type, e.data) for e in events] == [
+        ("clip_added", {"id": 12}),
+        ("clip_favorited", {"clip_id": 12}),
+        ("clip_tagged", {"clip_id": 12, "tag_name": "work"}),
+        ("clip_deleted", {"id": 12}),
+        ("clip_untagged", {"clip_id": 12, "tag_id": 3}),
+    ]
+    assert svc.get_last_event_id() == events[-1].id
+
+
+def test_failed_writes_publish_nothing():
+    from app.services.clipboard import clipboard_service as svc
+
+    start = svc.get_last_event_id()
+    with patch("app.services.clipboard.clipboard_service.execute_batch", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError):
+            svc.delete_clip(1)
+    assert svc.get_events_since(start) == []
+
+
+def test_retention_policy_reads_positive_limits_from_env(monkeypatch: pytest.MonkeyPatch):
+    from app.services.clipboard.retention import RetentionPolicy
+
+    assert not RetentionPolicy.from_env().enabled
+    monkeypatch.setenv("CLIPBOARD_RETENTION_MAX_CLIPS", "1000")
+    monkeypatch.setenv("CLIPBOARD_RETENTION_MAX_AGE_DAYS", "0.5")
+    monkeypatch.setenv("CLIPBOARD_RETENTION_MAX_BYTES", "0")  # 0 = off
+    assert RetentionPolicy.from_env() == RetentionPolicy(max_clips=1000, max_age_days=0.5)
+
+
+def test_enforce_retention_runs_only_the_configured_limits():
+    from app.services.clipboard import clipboard_service as svc
+    from app.services.clipboard.retention import RetentionPolicy
+
+    with patch(
+        "app.services.clipboard.clipboard_service.execute_batch", side_effect=[[[(1,), (2,)]], [[]]]
+    ) as exec_b:
+        assert svc.enforce_retention(RetentionPolicy(max_age_days=7), batch_size=2) == 2
+    assert exec_b.call_count == 2
+    (steps,) = exec_b.call_args.args
+    assert [(query.name, params) for query, params in steps] == [
+        ("evict_clips_over_age.sql", {"max_age": "-7 days", "batch_size": 2})
+    ]
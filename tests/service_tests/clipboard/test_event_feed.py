@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from app.services.clipboard.event_feed import EventFeed
+
+
+def test_since_returns_the_events_after_an_id() -> None:
+    feed = EventFeed(max_events=8)
+    for i in range(3):
+        feed.publish("clip_added", {"id": i})
+
+    assert [e.id for e in feed.since(1)] == [2, 3]
+    assert feed.since(3) == []
+    assert feed.since(0)[0].data == {"id": 0}
+
+
+def test_since_reports_events_that_fell_out_of_the_buffer() -> None:
+    feed = EventFeed(max_events=2)
+    for i in range(4):
+        feed.publish("clip_added", {"id": i})
+
+    assert [e.id for e in feed.since(2)] == [3, 4]
+    assert feed.since(1) is None  # event 2 is gone
+    assert feed.since(9) is None  # an ID from another process run
+
+
+def test_wait_wakes_on_a_publish_from_another_thread() -> None:
+    feed = EventFeed(max_events=8)
+
+    async def scenario():
+        waiting = asyncio.create_task(feed.wait(0, timeout=5))
+        await asyncio.sleep(0.05)
+        threading.Thread(target=feed.publish, args=("clip_deleted", {"id": 7})).start()
+        return await waiting
+
+    events = asyncio.run(scenario())
+    assert [(e.id, e.type, e.data) for e in events] == [(1, "clip_deleted", {"id": 7})]
+
+
+def test_wait_returns_empty_after_the_timeout() -> None:
+    feed = EventFeed(max_events=8)
+    assert asyncio.run(feed.wait(0, timeout=0.01)) == []
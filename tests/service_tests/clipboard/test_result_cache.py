@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from app.services.clipboard.result_cache import ResultCache
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = ResultCache(max_entries=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: -1)  # refreshes "a"
+    cache.get_or_load("c", lambda: 3)  # evicts "b"
+
+    assert cache.get_or_load("a", lambda: -1) == 1
+    assert cache.get_or_load("b", lambda: 22) == 22
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 4, 2, 2)
+
+
+def test_bump_drops_entries() -> None:
+    cache = ResultCache(max_entries=4)
+    cache.get_or_load("a", lambda: 1)
+    cache.bump()
+
+    assert cache.get_or_load("a", lambda: 2) == 2
+    assert cache.stats()["data_version"] == 1
+
+
+def test_result_loaded_across_a_write_is_not_stored() -> None:
+    cache = ResultCache(max_entries=4)
+
+    def load_while_writing() -> str:
+        cache.bump()  # a write lands while the read is in flight
+        return "stale"
+
+    assert cache.get_or_load("a", load_while_writing) == "stale"
+    assert cache.get_or_load("a", lambda: "fresh") == "fresh"